@@ -0,0 +1,261 @@
+""" Benchmarks of the Discovergy client against a local API simulator.
+
+Run from the repository root:
+
+    python -m benchmarks.run
+    python -m benchmarks.run --json results.json
+    python -m benchmarks.run --baseline results.json
+
+The simulator runs in a thread of the benchmark process by default and
+therefore competes with the client for the GIL. Start it in another process
+with python -m discovergy.simulator and pass --base-url to measure the client
+alone. The import and cli scenarios start fresh interpreters, their
+latencies are the wall times of whole processes. With --baseline the exit
+status is 1 if the throughput of a scenario dropped by more than --tolerance.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from discovergy.discovergy import DAY, Discovergy
+from discovergy.metrics import Metrics
+from discovergy.simulator import Simulator
+from discovergy.tokens import FileTokenStore
+from discovergy.transport import Transport
+
+
+def percentile(values, fraction):
+    """ Return the nearest-rank percentile of values. """
+
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))]
+
+
+class Recorder:
+    """ Metrics hook collecting the duration of every request. """
+
+    def __init__(self):
+        self.durations = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            self.durations.append(event['duration'])
+
+
+def logged_in(base_url, metrics, transport=None):
+    discovergy = Discovergy('Benchmark', transport=transport, metrics=metrics,
+                            base_url=base_url)
+    discovergy.login('benchmark@example.com', 'secret')
+    return discovergy
+
+
+def scenario_login(base_url, arguments, metrics):
+    """ Full OAuth login flows, one after another. """
+
+    transport = Transport()
+
+    def work():
+        for _ in range(arguments.logins):
+            logged_in(base_url, metrics, transport)
+        return arguments.logins
+    return work
+
+
+def scenario_polling(base_url, arguments, metrics):
+    """ Rounds of last readings of all meters. """
+
+    discovergy = logged_in(base_url, metrics)
+    meter_ids = [meter['meterId'] for meter in discovergy.get_meters()]
+
+    def work():
+        return sum(len(discovergy.get_last_readings(meter_ids, max_workers=arguments.workers))
+                   for _ in range(arguments.rounds))
+    return work
+
+
+def scenario_history(base_url, arguments, metrics):
+    """ Raw readings of one meter over several days in parallel windows. """
+
+    discovergy = logged_in(base_url, metrics)
+    meter_id = discovergy.get_meters()[0]['meterId']
+    end = int(time.time() * 1000) // DAY * DAY
+
+    def work():
+        return len(discovergy.get_readings_range(meter_id, end - arguments.days * DAY, end,
+                                                 'raw', max_workers=arguments.workers))
+    return work
+
+
+def scenario_history_streamed(base_url, arguments, metrics):
+    """ Raw readings of one meter over several days streamed into columns. """
+
+    discovergy = logged_in(base_url, metrics)
+    meter_id = discovergy.get_meters()[0]['meterId']
+    end = int(time.time() * 1000) // DAY * DAY
+
+    def work():
+        return len(discovergy.get_readings_columnar(meter_id, end - arguments.days * DAY, end,
+                                                    'raw').time)
+    return work
+
+
+def run_process(argv, metrics, endpoint):
+    """ Run a Python process and record its wall time as a request.
+    :raises subprocess.CalledProcessError: if the process failed """
+
+    with metrics.measure(endpoint, ' '.join(argv)) as measurement:
+        try:
+            subprocess.run([sys.executable] + argv, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.PIPE, check=True)
+        except subprocess.CalledProcessError as e:
+            measurement.fail(e.stderr.decode('utf-8', 'replace'))
+            raise
+
+
+def scenario_import(base_url, arguments, metrics):
+    """ Fresh processes importing the client, the latency is the startup
+    time. """
+
+    def work():
+        for _ in range(arguments.processes):
+            run_process(['-c', 'import discovergy.discovergy'], metrics, '/import')
+        return arguments.processes
+    return work
+
+
+def scenario_cli(base_url, arguments, metrics):
+    """ Fresh command line client processes writing the last readings of ten
+    meters with cached tokens, as in a cron job. """
+
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, 'tokens.json')
+    discovergy = Discovergy('Benchmark', token_store=FileTokenStore(path), base_url=base_url)
+    discovergy.login('benchmark@example.com', 'secret')
+    meter_ids = [meter['meterId'] for meter in discovergy.get_meters()[:10]]
+    argv = ['-m', 'discovergy', '--client', 'Benchmark', '--email', 'benchmark@example.com',
+            '--tokens', path, '--base-url', base_url, 'last-readings'] + meter_ids
+
+    def work():
+        with directory:
+            for _ in range(arguments.processes):
+                run_process(argv, metrics, '/cli')
+        return arguments.processes
+    return work
+
+
+# Each scenario prepares its clients and returns the function to measure,
+# which returns the number of processed items
+SCENARIOS = {'login': scenario_login,
+             'polling': scenario_polling,
+             'history': scenario_history,
+             'history_streamed': scenario_history_streamed,
+             'import': scenario_import,
+             'cli': scenario_cli}
+
+
+def run(name, base_url, arguments):
+    """ Run a scenario and measure throughput, request latency and, in a
+    second run, peak memory.
+    :rtype: dict """
+
+    metrics = Metrics()
+    work = SCENARIOS[name](base_url, arguments, metrics)
+    recorder = Recorder()
+    metrics.add_hook(recorder)
+    started = time.perf_counter()
+    items = work()
+    elapsed = time.perf_counter() - started
+    metrics.remove_hook(recorder)
+    result = {'seconds': elapsed,
+              'items': items,
+              'items_per_second': items / elapsed if elapsed else 0.0,
+              'requests': len(recorder.durations),
+              'latency_p50': percentile(recorder.durations, 0.5),
+              'latency_p95': percentile(recorder.durations, 0.95),
+              'latency_p99': percentile(recorder.durations, 0.99)}
+
+    if arguments.memory:
+        work = SCENARIOS[name](base_url, arguments, Metrics())
+        tracemalloc.start()
+        try:
+            work()
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Discovergy client.")
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS),
+                        help="scenarios to run: %s" % ", ".join(SCENARIOS))
+    parser.add_argument('--base-url', help="URL of a running simulator")
+    parser.add_argument('--meters', type=int, default=100)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--logins', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=10)
+    parser.add_argument('--processes', type=int, default=10,
+                        help="processes started by the import and cli scenarios")
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help="simulated seconds per request")
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="skip the second run measuring peak memory")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--baseline', help="results of an earlier run to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed relative throughput drop against the baseline")
+    arguments = parser.parse_args(argv)
+
+    simulator = None
+    base_url = arguments.base_url
+    if base_url is None:
+        simulator = Simulator(meters=arguments.meters, latency=arguments.latency)
+        simulator.start()
+        base_url = simulator.base_url
+
+    results = {}
+    try:
+        for name in arguments.scenarios:
+            results[name] = run(name, base_url, arguments)
+    finally:
+        if simulator is not None:
+            simulator.stop()
+
+    print("%-18s %10s %12s %9s %9s %9s %9s %11s" % (
+        "scenario", "seconds", "items/s", "requests", "p50 ms", "p95 ms", "p99 ms", "peak MiB"))
+    for name, result in results.items():
+        print("%-18s %10.3f %12.1f %9d %9.2f %9.2f %9.2f %11s" % (
+            name, result['seconds'], result['items_per_second'], result['requests'],
+            result['latency_p50'] * 1000, result['latency_p95'] * 1000,
+            result['latency_p99'] * 1000,
+            "%.1f" % (result['peak_bytes'] / 2 ** 20) if 'peak_bytes' in result else "-"))
+
+    if arguments.json:
+        with open(arguments.json, 'w', encoding='utf-8') as results_file:
+            json.dump(results, results_file, indent=2)
+
+    if arguments.baseline:
+        with open(arguments.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = [name for name, result in results.items() if name in baseline and
+                       result['items_per_second'] <
+                       baseline[name]['items_per_second'] * (1 - arguments.tolerance)]
+        for name in regressions:
+            print("Regression in %s: %.1f items/s, baseline %.1f items/s" % (
+                name, results[name]['items_per_second'], baseline[name]['items_per_second']))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
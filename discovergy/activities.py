@@ -0,0 +1,122 @@
+class _Node:
+    """ Node of a centered interval tree holding the activities that contain
+    its center. """
+
+    __slots__ = ('center', 'by_start', 'by_end', 'left', 'right')
+
+    def __init__(self, center, by_start, by_end, left, right):
+        self.center = center
+        self.by_start = by_start
+        self.by_end = by_end
+        self.left = left
+        self.right = right
+
+
+class ActivityIndex:
+    """ Interval index of the activities of a meter, a centered interval tree
+    over [startTime, endTime). Point and window queries take O(log n + k)
+    for k matching activities instead of a scan over all of them. Activities
+    without duration can never overlap a window and are not indexed. """
+
+    def __init__(self, activities=()):
+        """ Inititalize ActivityIndex class.
+        :param activities: activities in the format of
+        Discovergy.get_activities()
+        """
+
+        self.activities = sorted((activity for activity in activities
+                                  if activity['endTime'] > activity['startTime']),
+                                 key=lambda activity: (activity['startTime'], activity['endTime']))
+        self._root = self._build(self.activities)
+
+    @classmethod
+    def _build(cls, activities):
+        """ Build the subtree of activities sorted by 'startTime'. The center
+        is the median start, so every node holds at least that activity and
+        both subtrees get at most half of the starts. """
+
+        if not activities:
+            return None
+        center = activities[len(activities) // 2]['startTime']
+        left, here, right = [], [], []
+        for activity in activities:
+            if activity['startTime'] > center:
+                right.append(activity)
+            elif activity['endTime'] <= center:
+                left.append(activity)
+            else:
+                here.append(activity)
+        by_end = sorted(here, key=lambda activity: activity['endTime'], reverse=True)
+        return _Node(center, here, by_end, cls._build(left), cls._build(right))
+
+    def __len__(self):
+        return len(self.activities)
+
+    def overlapping(self, start, end):
+        """ Return the activities overlapping a window.
+        :param int start: start of window as unix milliseconds timestamp
+        :param int end: end of window as unix milliseconds timestamp,
+        exclusive
+        :return: activities ordered by 'startTime'
+        :rtype: list """
+
+        if start >= end:
+            return []
+        result = []
+        nodes = [self._root]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+            if end <= node.center:
+                # All activities of the node end after the window starts
+                for activity in node.by_start:
+                    if activity['startTime'] >= end:
+                        break
+                    result.append(activity)
+                nodes.append(node.left)
+            elif start > node.center:
+                # All activities of the node start before the window ends
+                for activity in node.by_end:
+                    if activity['endTime'] <= start:
+                        break
+                    result.append(activity)
+                nodes.append(node.right)
+            else:
+                result.extend(node.by_start)
+                nodes.append(node.left)
+                nodes.append(node.right)
+
+        result.sort(key=lambda activity: (activity['startTime'], activity['endTime']))
+        return result
+
+    def at(self, timestamp):
+        """ Return the activities running at a point in time.
+        :param int timestamp: unix milliseconds timestamp
+        :return: activities ordered by 'startTime'
+        :rtype: list """
+
+        return self.overlapping(timestamp, timestamp + 1)
+
+    def devices_at(self, timestamp):
+        """ Return the devices active at a point in time.
+        :param int timestamp: unix milliseconds timestamp
+        :rtype: set """
+
+        return {activity['deviceName'] for activity in self.at(timestamp)}
+
+    def overlap(self, start, end):
+        """ Return how long each device was active during a window, e.g. a
+        peak interval of analytics.peak_intervals().
+        :param int start: start of window as unix milliseconds timestamp
+        :param int end: end of window as unix milliseconds timestamp,
+        exclusive
+        :return: milliseconds of activity within the window per device name,
+        overlapping activities of a device are counted separately
+        :rtype: dict """
+
+        result = {}
+        for activity in self.overlapping(start, end):
+            duration = min(end, activity['endTime']) - max(start, activity['startTime'])
+            result[activity['deviceName']] = result.get(activity['deviceName'], 0) + duration
+        return result
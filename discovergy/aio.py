@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import aiohttp
+from yarl import URL
+from .api import (Endpoints, check_response, exception_template, log_failure,
+                  parse_consumer_tokens, parse_tokens, parse_verifier, sign)
+from .decoders import get_decoder
+from .discovergy import BASE_URL, TIMEOUT
+
+
+logger = logging.getLogger(__name__)
+MAX_CONCURRENCY = 100
+
+
+class AsyncDiscovergy:
+    """ Asyncio counterpart of class Discovergy to query the Discovergy API
+    with many requests in flight from a single thread. """
+
+    def __init__(self, client_name, base_url=BASE_URL,
+                 max_concurrency=MAX_CONCURRENCY, timeout=TIMEOUT):
+        """ Inititalize AsyncDiscovergy class.
+        :param client_name: client name for OAuth process
+        :param str base_url: root URL of the Discovergy API
+        :param int max_concurrency: maximum number of requests in flight
+        :param int timeout: total timeout of a request in seconds
+        """
+
+        self._client_name = client_name
+        self._endpoints = Endpoints(base_url)
+        self._oauth_key = None
+        self._oauth_secret = None
+        self._resource_owner_key = None
+        self._resource_owner_secret = None
+        self._max_concurrency = max_concurrency
+        self._timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session = None
+        self._json_decoder = get_decoder()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """ Close the pooled HTTP connections. """
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        """ Return the shared HTTP session, creating it on first use.
+        :rtype: aiohttp.ClientSession """
+
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._max_concurrency,
+                                             limit_per_host=self._max_concurrency)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self._timeout))
+        return self._session
+
+    async def _request(self, method, url, headers=None, data=None):
+        """ Send a request over the pooled transport.
+        :return: status code and body of the response
+        :rtype: tuple """
+
+        async with self._semaphore:
+            async with self._get_session().request(method, URL(url, encoded=True),
+                                                   headers=headers,
+                                                   data=data) as response:
+                return response.status, await response.read()
+
+    async def _signed_request(self, method, url, **client_kwargs):
+        """ Send a request signed with the OAuth1 consumer credentials and
+        the given client arguments.
+        :return: status code and body of the response
+        :rtype: tuple """
+
+        uri, headers = sign(url, method, self._oauth_key, self._oauth_secret, **client_kwargs)
+        return await self._request(method, uri, headers=headers)
+
+    async def _fetch_consumer_tokens(self):
+        """ Get consumer key and secret (not part of OAuth 1.0).
+        :return: True on success, False otherwise
+        :rtype: bool """
+
+        try:
+            status, content = await self._request('POST', self._endpoints.consumer_token,
+                                                  data={'client': self._client_name})
+            self._oauth_key, self._oauth_secret = parse_consumer_tokens(status, content)
+        except Exception as e:
+            log_failure(logger, 'Failed to fetch consumer token:', e)
+            return False
+
+        return True
+
+    async def _fetch_token(self, url, **client_kwargs):
+        """ Fetch an OAuth request or access token.
+        :return: token and token_secret on success, None otherwise
+        :rtype: dict """
+
+        try:
+            status, content = await self._signed_request('POST', url, **client_kwargs)
+            result = parse_tokens(status, content)
+        except Exception as e:
+            log_failure(logger, 'Failed to fetch token:', e)
+            return None
+
+        return result
+
+    async def _authorize_request_token(self, email, password, resource_owner_key):
+        """ Authorize request token for client account.
+        :param str email: the username/email of the client account
+        :param str password: the password of the client account
+        :param resource_owner_key: the request token
+        :return: OAuth verifier on success, "" otherwise
+        :rtype: str """
+
+        try:
+            url = self._endpoints.authorization(resource_owner_key, email, password)
+            status, content = await self._request('GET', url)
+            verifier = parse_verifier(status, content)
+        except Exception as e:
+            log_failure(logger, 'Failed to authorize request token:', e)
+            return ""
+
+        return verifier
+
+    async def login(self, email, password):
+        """ Authentication workflow for client account.
+        :param str email: the username/email of the client account
+        :param str password: the password of the client account
+        :return: True on success, False on failure
+        :rtype: bool """
+
+        if not await self._fetch_consumer_tokens():
+            return False
+
+        request_token = await self._fetch_token(self._endpoints.request_token,
+                                                callback_uri='oob')
+        if request_token is None:
+            return False
+
+        verifier = await self._authorize_request_token(email, password,
+                                                       request_token["token"])
+        if not verifier:
+            return False
+
+        access_token = await self._fetch_token(
+            self._endpoints.access_token,
+            resource_owner_key=request_token["token"],
+            resource_owner_secret=request_token["token_secret"],
+            verifier=verifier)
+        if access_token is None:
+            return False
+
+        self._resource_owner_key = access_token["token"]
+        self._resource_owner_secret = access_token["token_secret"]
+        return True
+
+    async def _get_json(self, url):
+        """ Send a signed GET request and decode the JSON response.
+        :raises ValueError: if the request failed or the response is not
+        valid JSON """
+
+        status, content = await self._signed_request(
+            'GET', url, resource_owner_key=self._resource_owner_key,
+            resource_owner_secret=self._resource_owner_secret)
+        return check_response(status, content, self._json_decoder)
+
+    async def get_meters(self):
+        """ Get all meters for client account.
+        :return: meters
+        :rtype: list """
+
+        try:
+            return await self._get_json(self._endpoints.meters())
+
+        except Exception as e:
+            message = exception_template.format(type(e).__name__, e.args)
+            logger.error(message)
+            return []
+
+    async def get_fieldnames_for_meter(self, meter_id):
+        """ Return the available measurement field names for the specified
+        meter.
+        :param str meter_id: identifier of the meter to get readings for
+        :return: fieldnames
+        :rtype: list """
+
+        try:
+            return await self._get_json(self._endpoints.field_names(meter_id))
+
+        except ValueError:
+            return []
+
+    async def get_last_reading(self, meter_id):
+        """ Return the last measurement for the specified meter, see
+        Discovergy.get_last_reading().
+        :param str meter_id: identifier of the meter to get readings for
+        :rtype: dict """
+
+        try:
+            return await self._get_json(self._endpoints.last_reading(meter_id))
+
+        except ValueError:
+            return {}
+
+    async def get_disaggregation(self, meter_id, start, end):
+        """ Return the disaggregation for the specified meter in the specified
+        time interval, see Discovergy.get_disaggregation().
+        :param str meter_id: identifier of the meter to get readings for
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp
+        :rtype: dict """
+
+        try:
+            return await self._get_json(self._endpoints.disaggregation(meter_id, start, end))
+
+        except ValueError:
+            return {}
+
+    async def get_readings(self, meter_id, start, end, resolution):
+        """ Return the measurements for the specified meter in the specified
+        time interval, see Discovergy.get_readings().
+        :param str meter_id: identifier of the meter to get readings for
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp
+        :param str resolution: time distance between returned readings
+        :rtype: list """
+
+        try:
+            return await self._get_json(self._endpoints.readings(meter_id, start, end,
+                                                                 resolution))
+
+        except ValueError:
+            return []
+
+    async def get_activities(self, meter_id, start, end):
+        """ Returns the activities recognised for the given meter during the
+        given interval, see Discovergy.get_activities().
+        :param str meter_id: identifier of the meter to get readings for
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp
+        :rtype: list """
+
+        try:
+            return await self._get_json(self._endpoints.activities(meter_id, start, end))
+
+        except ValueError:
+            return []
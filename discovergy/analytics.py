@@ -0,0 +1,242 @@
+import calendar
+import operator
+import time
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, compress, repeat
+from .columnar import ColumnarReadings
+from .resample import _increase
+
+
+# The API returns power in mW and energy in mWh
+KILOWATTS_PER_MILLIWATT = 1e-6
+KILOWATT_HOURS_PER_MILLIWATT_HOUR = 1e-6
+PHASES = ('power1', 'power2', 'power3')
+
+
+def to_kilowatts(milliwatts):
+    """ Convert power from mW to kW.
+    :param milliwatts: number or iterable of numbers in mW
+    :return: float or array('d') in kW """
+
+    if isinstance(milliwatts, (int, float)):
+        return milliwatts * KILOWATTS_PER_MILLIWATT
+    return array('d', map(operator.mul, milliwatts, repeat(KILOWATTS_PER_MILLIWATT)))
+
+
+def to_kilowatt_hours(milliwatt_hours):
+    """ Convert energy from mWh to kWh.
+    :param milliwatt_hours: number or iterable of numbers in mWh
+    :return: float or array('d') in kWh """
+
+    if isinstance(milliwatt_hours, (int, float)):
+        return milliwatt_hours * KILOWATT_HOURS_PER_MILLIWATT_HOUR
+    return array('d', map(operator.mul, milliwatt_hours,
+                          repeat(KILOWATT_HOURS_PER_MILLIWATT_HOUR)))
+
+
+def month_boundaries(start, end):
+    """ Return the starts of the UTC months overlapping [start, end) and
+    the start of the following month, e.g. for consumption().
+    :param int start: unix milliseconds timestamp
+    :param int end: unix milliseconds timestamp
+    :rtype: list """
+
+    year, month = time.gmtime(start // 1000)[:2]
+    boundaries = []
+    while True:
+        boundary = calendar.timegm((year, month, 1, 0, 0, 0)) * 1000
+        boundaries.append(boundary)
+        if boundary >= end:
+            return boundaries
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _columns(readings):
+    if isinstance(readings, ColumnarReadings):
+        return readings
+    return ColumnarReadings.from_readings(readings)
+
+
+def _valid(times, values):
+    """ Drop measurements whose value is NaN. """
+
+    if values.typecode == 'q':
+        return times, values
+    keep = list(map(operator.eq, values, values))
+    return array('q', compress(times, keep)), array('d', compress(values, keep))
+
+
+def cumulative(readings, field='energy'):
+    """ Return a counter with resets removed, so that the difference of any
+    two values is the energy in between. A decreasing counter is treated as
+    reset to zero.
+    :param readings: ColumnarReadings or measurements in the format of
+    Discovergy.get_readings()
+    :param str field: counter field, e.g. 'energy' or 'energyOut'
+    :return: timestamps and counter values in mWh
+    :rtype: tuple """
+
+    readings = _columns(readings)
+    if not readings.time:
+        return array('q'), array('q')
+    times, values = _valid(readings.time, readings[field])
+    if not any(map(operator.lt, values[1:], values[:-1])):
+        return times, values
+    increases = map(_increase, values[1:], values[:-1])
+    return times, array('d', accumulate(increases, initial=values[0]))
+
+
+def _interpolate(times, values, timestamp):
+    """ Return the value at timestamp, interpolated linearly and clamped to
+    the first and last measurement. """
+
+    i = bisect_right(times, timestamp)
+    if i == 0:
+        return values[0]
+    if i == len(times):
+        return values[-1]
+    start, end = times[i - 1], times[i]
+    return values[i - 1] + (values[i] - values[i - 1]) * (timestamp - start) / (end - start)
+
+
+def consumption(readings, boundaries, field='energy'):
+    """ Return the energy consumed between consecutive boundaries, with the
+    counter interpolated linearly at each boundary. Periods before the first
+    or after the last measurement count as no consumption.
+    :param readings: ColumnarReadings or measurements in the format of
+    Discovergy.get_readings()
+    :param boundaries: ascending unix milliseconds timestamps, e.g. from
+    month_boundaries()
+    :param str field: counter field, 'energyOut' for the feed-in
+    :return: energy in mWh per period
+    :rtype: array.array """
+
+    times, values = cumulative(readings, field)
+    if not times:
+        return array('d', [0.0] * max(0, len(boundaries) - 1))
+    at_boundaries = [_interpolate(times, values, boundary) for boundary in boundaries]
+    return array('d', map(operator.sub, at_boundaries[1:], at_boundaries[:-1]))
+
+
+def feed_in(readings, boundaries):
+    """ Return the energy fed into the grid between consecutive boundaries,
+    see consumption().
+    :return: energy in mWh per period
+    :rtype: array.array """
+
+    return consumption(readings, boundaries, 'energyOut')
+
+
+def peak_load(readings, field='power'):
+    """ Return the highest load.
+    :param readings: ColumnarReadings or measurements in the format of
+    Discovergy.get_readings()
+    :param str field: power field
+    :return: unix milliseconds timestamp and power in mW of the peak, None if
+    there are no measurements
+    :rtype: tuple """
+
+    readings = _columns(readings)
+    times, values = _valid(readings.time, readings[field])
+    if not values:
+        return None
+    peak = max(values)
+    return times[values.index(peak)], peak
+
+
+def peak_intervals(readings, threshold, field='power'):
+    """ Return the intervals in which the load exceeds threshold.
+    :param readings: ColumnarReadings or measurements in the format of
+    Discovergy.get_readings()
+    :param threshold: power in mW
+    :param str field: power field
+    :return: (start, end, peak) per interval with start and end as the unix
+    milliseconds timestamps of the first and last measurement above threshold
+    and the highest power in mW
+    :rtype: list """
+
+    readings = _columns(readings)
+    times, values = _valid(readings.time, readings[field])
+    above = list(map(operator.gt, values, repeat(threshold)))
+    intervals = []
+    i = 0
+    while True:
+        try:
+            start = above.index(True, i)
+        except ValueError:
+            return intervals
+        try:
+            i = above.index(False, start)
+        except ValueError:
+            i = len(above)
+        intervals.append((times[start], times[i - 1], max(values[start:i])))
+
+
+def phase_balance(readings):
+    """ Return the average power per phase and the imbalance, the largest
+    deviation of a phase from the average of all phases relative to that
+    average.
+    :param readings: ColumnarReadings or measurements in the format of
+    Discovergy.get_readings() with 'power1' to 'power3'
+    :return: average power in mW per phase field and 'imbalance' as fraction
+    :rtype: dict """
+
+    readings = _columns(readings)
+    result = {}
+    for phase in PHASES:
+        values = _valid(readings.time, readings[phase])[1]
+        result[phase] = sum(values) / len(values) if values else float('nan')
+    average = sum(result.values()) / len(PHASES)
+    result['imbalance'] = (max(abs(result[phase] - average) for phase in PHASES) / abs(average)
+                           if average else float('nan'))
+    return result
+
+
+def load_duration_curve(readings, field='power', points=None):
+    """ Return the load values sorted in descending order, the load
+    duration curve for equally spaced measurements.
+    :param readings: ColumnarReadings or measurements in the format of
+    Discovergy.get_readings()
+    :param str field: power field
+    :param int points: number of equally spaced quantiles to return, None
+    for all values
+    :return: power in mW
+    :rtype: array.array """
+
+    readings = _columns(readings)
+    values = sorted(_valid(readings.time, readings[field])[1], reverse=True)
+    if points is not None and len(values) > points > 1:
+        step = (len(values) - 1) / (points - 1)
+        values = [values[round(i * step)] for i in range(points)]
+    return array('d', values)
+
+
+def fleet_report(readings_by_meter, boundaries):
+    """ Summarize many meters per period, e.g. per month.
+    :param dict readings_by_meter: ColumnarReadings or measurements per meter
+    id
+    :param boundaries: ascending unix milliseconds timestamps, e.g. from
+    month_boundaries()
+    :return: per meter id 'consumption_kwh' and 'feed_in_kwh' per period,
+    'peak_kw' and its 'peak_time' and the 'imbalance' of the phases, fields
+    the meter does not measure are omitted
+    :rtype: dict """
+
+    report = {}
+    for meter_id, readings in readings_by_meter.items():
+        readings = _columns(readings)
+        fields = readings.fields
+        summary = {}
+        if 'energy' in fields:
+            summary['consumption_kwh'] = to_kilowatt_hours(consumption(readings, boundaries))
+        if 'energyOut' in fields:
+            summary['feed_in_kwh'] = to_kilowatt_hours(feed_in(readings, boundaries))
+        if 'power' in fields:
+            peak = peak_load(readings)
+            if peak is not None:
+                summary['peak_time'], summary['peak_kw'] = peak[0], to_kilowatts(peak[1])
+        if all(phase in fields for phase in PHASES):
+            summary['imbalance'] = phase_balance(readings)['imbalance']
+        report[meter_id] = summary
+    return report
@@ -0,0 +1,143 @@
+import json
+import logging
+from urllib.parse import parse_qs
+
+
+logger = logging.getLogger(__name__)
+exception_template = "An exception of type {0} occurred. Arguments:\n{1!r}"
+
+
+class Endpoints:
+    """ URLs of the Discovergy API below a base URL, shared by Discovergy and
+    AsyncDiscovergy so that both send identical requests. """
+
+    def __init__(self, base_url):
+        """ Inititalize Endpoints class.
+        :param str base_url: root URL of the Discovergy API
+        """
+
+        self.base_url = base_url
+        self.consumer_token = base_url + '/oauth1/consumer_token'
+        self.request_token = base_url + '/oauth1/request_token'
+        self.authorize = base_url + '/oauth1/authorize'
+        self.access_token = base_url + '/oauth1/access_token'
+
+    def path(self, url):
+        """ Return the endpoint path of url, e.g. '/readings'.
+        :rtype: str """
+
+        return url[len(self.base_url):].split('?')[0]
+
+    def authorization(self, resource_owner_key, email, password):
+        """ Return the URL authorizing a request token for a client account.
+        :rtype: str """
+
+        return self.authorize + "?oauth_token=" + resource_owner_key + "&email=" + email + \
+            "&password=" + password
+
+    def meters(self):
+        return self.base_url + "/meters"
+
+    def field_names(self, meter_id):
+        return self.base_url + "/field_names?meterId=" + meter_id
+
+    def last_reading(self, meter_id):
+        return self.base_url + "/last_reading?meterId=" + meter_id
+
+    def disaggregation(self, meter_id, start, end):
+        url = self.base_url + "/disaggregation?meterId=" + meter_id + "&from=" + str(start)
+        if end is not None:
+            url += "&to=" + str(end)
+        return url
+
+    def readings(self, meter_id, start, end, resolution):
+        url = self.base_url + "/readings?meterId=" + meter_id + "&from=" + str(start)
+        if end is not None:
+            url += "&to=" + str(end)
+        return url + "&resolution=" + resolution
+
+    def activities(self, meter_id, start, end):
+        return self.base_url + "/activities?meterId=" + meter_id + "&from=" + str(start) + \
+            "&to=" + str(end)
+
+
+def log_failure(log, description, e):
+    """ Log a failed step of a request with its exception.
+    :param logging.Logger log: logger of the calling module
+    :param str description: the failed step, e.g. 'Failed to fetch token:'
+    :param Exception e: the exception raised by the step """
+
+    log.error(description)
+    log.error(exception_template.format(type(e).__name__, e.args))
+
+
+def sign(url, method, consumer_key, consumer_secret, **client_kwargs):
+    """ Sign a request with OAuth1.
+    :param str url: request URL
+    :param str method: HTTP method, e.g. 'GET'
+    :param client_kwargs: further arguments of oauthlib.oauth1.Client, e.g.
+    resource_owner_key and resource_owner_secret
+    :return: signed URL and headers
+    :rtype: tuple """
+
+    from oauthlib.oauth1 import Client
+
+    client = Client(consumer_key, client_secret=consumer_secret, **client_kwargs)
+    uri, headers, _ = client.sign(url, http_method=method)
+    return uri, headers
+
+
+def parse_consumer_tokens(status, content):
+    """ Return key and secret of a consumer token response.
+    :rtype: tuple
+    :raises ValueError: if the request failed
+    :raises KeyError: if key or secret are missing """
+
+    if status != 200:
+        raise ValueError("Failed to create consumer token.")
+    tokens = json.loads(content)
+    return tokens['key'], tokens['secret']
+
+
+def parse_tokens(status, content):
+    """ Return token and token_secret of a request or access token response.
+    :rtype: dict
+    :raises ValueError: if the request failed
+    :raises KeyError: if a token is missing """
+
+    if status != 200:
+        raise ValueError("Unexpected status code %s" % status)
+    parsed_response = parse_qs(content.decode('utf-8'))
+    return {"token": parsed_response['oauth_token'][0],
+            "token_secret": parsed_response['oauth_token_secret'][0]}
+
+
+def parse_verifier(status, content):
+    """ Return the OAuth verifier of an authorization response.
+    :rtype: str
+    :raises ValueError: if the API rejected email or password
+    :raises KeyError: if the verifier is missing """
+
+    if status != 200:
+        raise ValueError("Failed to login. "
+                         "Please check if your email and password are correct and try again.")
+    return parse_qs(content.decode('utf-8'))["oauth_verifier"][0]
+
+
+def check_response(status, content, decoder=None):
+    """ Return the body of a response to a data request.
+    :param int status: status code of the response
+    :param bytes content: body of the response
+    :param decoder: callable decoding the body, None to return it undecoded
+    :raises ValueError: if the request failed or decoding failed """
+
+    if status != 200:
+        logger.error(content.decode('utf-8', 'replace'))
+        raise ValueError("Request failed with status code %s" % status)
+    if decoder is None:
+        return content
+    try:
+        return decoder(content)
+    except ValueError:
+        logger.error("Status %s: %s", status, content.decode('utf-8', 'replace'))
+        raise
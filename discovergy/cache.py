@@ -0,0 +1,198 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from .discovergy import DAY, RESOLUTION_WINDOWS
+from .ratelimit import in_caller_context
+from .readings import merge_readings
+
+
+logger = logging.getLogger(__name__)
+MAX_BYTES = 512 * 1024 * 1024
+OPEN_MARGIN = 60 * 60 * 1000
+# Bucket size of resolutions whose request window is too long to ever close,
+# other resolutions are stored in buckets of RESOLUTION_WINDOWS
+BUCKET_SIZES = {'one_day': 31 * DAY,
+                'one_week': 364 * DAY,
+                'one_month': 365 * DAY,
+                'one_year': 365 * DAY}
+
+
+class ReadingsCache:
+    """ On-disk SQLite cache of historical readings. Readings are stored in
+    epoch-aligned buckets of the longest interval the API accepts per
+    resolution, or of BUCKET_SIZES for coarse resolutions, whose consecutive
+    missing buckets are fetched together. Buckets that may still receive
+    readings are never stored. """
+
+    def __init__(self, path, max_bytes=MAX_BYTES, open_margin=OPEN_MARGIN):
+        """ Inititalize ReadingsCache class.
+        :param str path: location of the SQLite database, ':memory:' for a
+        temporary cache
+        :param int max_bytes: size of the stored readings above which the
+        least recently used buckets are evicted
+        :param int open_margin: milliseconds before now in which buckets are
+        considered open and always fetched again
+        """
+
+        self._max_bytes = max_bytes
+        self._open_margin = open_margin
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "meter_id TEXT, resolution TEXT, bucket INTEGER, "
+                "data BLOB, size INTEGER, accessed REAL, "
+                "PRIMARY KEY (meter_id, resolution, bucket))")
+
+    def close(self):
+        """ Close the database connection. """
+
+        with self._lock:
+            self._connection.close()
+
+    def get_readings(self, discovergy, meter_id, start, end, resolution, max_workers=4):
+        """ Return the measurements for the specified meter in the specified
+        time interval, fetching only the buckets missing from the cache.
+        :param discovergy: logged in Discovergy instance used for missing
+        buckets
+        :param str meter_id: identifier of the meter to get readings for
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp,
+        exclusive, None for now
+        :param str resolution: time distance between returned readings, see
+        Discovergy.get_readings()
+        :param int max_workers: maximum number of concurrent requests
+        :return: measurements ordered by 'time', same format as
+        Discovergy.get_readings()
+        :rtype: list """
+
+        now = round(time.time() * 1e3)
+        if end is None:
+            end = now
+        size = BUCKET_SIZES.get(resolution, RESOLUTION_WINDOWS[resolution])
+        buckets = list(range(start - start % size, end, size))
+        cached = self._load(meter_id, resolution, buckets)
+
+        # Join consecutive missing buckets into runs fitting one request
+        runs = []
+        for bucket in buckets:
+            if bucket in cached:
+                continue
+            if (runs and runs[-1][-1] + size == bucket
+                    and (len(runs[-1]) + 1) * size <= RESOLUTION_WINDOWS[resolution]):
+                runs[-1].append(bucket)
+            else:
+                runs.append([bucket])
+
+        def fetch(run):
+            result = {bucket: [] for bucket in run}
+            for reading in discovergy.fetch_readings(meter_id, run[0], run[-1] + size,
+                                                     resolution):
+                bucket = reading['time'] - reading['time'] % size
+                if bucket in result:
+                    result[bucket].append(reading)
+            return result
+
+        fetched = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for result in executor.map(in_caller_context(fetch), runs):
+                    fetched.update(result)
+
+        except ValueError:
+            return []
+
+        closed = {bucket: readings for bucket, readings in fetched.items()
+                  if bucket + size <= now - self._open_margin}
+        self._store(meter_id, resolution, closed)
+
+        cached.update(fetched)
+        return [reading for reading in merge_readings(cached[bucket] for bucket in buckets)
+                if start <= reading['time'] < end]
+
+    def _load(self, meter_id, resolution, buckets):
+        """ Load the cached buckets and mark them as recently used.
+        :return: readings per bucket
+        :rtype: dict """
+
+        if not buckets:
+            return {}
+
+        with self._lock, self._connection:
+            rows = self._connection.execute(
+                "SELECT bucket, data FROM buckets WHERE meter_id = ? AND resolution = ? "
+                "AND bucket BETWEEN ? AND ?",
+                (meter_id, resolution, buckets[0], buckets[-1])).fetchall()
+            self._connection.execute(
+                "UPDATE buckets SET accessed = ? WHERE meter_id = ? AND resolution = ? "
+                "AND bucket BETWEEN ? AND ?",
+                (time.time(), meter_id, resolution, buckets[0], buckets[-1]))
+
+        return {bucket: json.loads(zlib.decompress(data).decode('utf-8'))
+                for bucket, data in rows}
+
+    def _store(self, meter_id, resolution, buckets):
+        """ Store closed buckets and evict the least recently used ones if
+        the cache grew too large.
+        :param dict buckets: readings per bucket """
+
+        if not buckets:
+            return
+
+        accessed = time.time()
+        rows = []
+        for bucket, readings in buckets.items():
+            data = zlib.compress(json.dumps(readings, separators=(',', ':')).encode('utf-8'))
+            rows.append((meter_id, resolution, bucket, data, len(data), accessed))
+
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._evict()
+
+    def _evict(self):
+        """ Delete least recently used buckets until the cache fits
+        max_bytes. Must be called with the lock held. """
+
+        total = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM buckets").fetchone()[0]
+        if total <= self._max_bytes:
+            return
+
+        evicted = []
+        for rowid, size in self._connection.execute(
+                "SELECT rowid, size FROM buckets ORDER BY accessed"):
+            if total <= self._max_bytes:
+                break
+            evicted.append((rowid,))
+            total -= size
+        self._connection.executemany("DELETE FROM buckets WHERE rowid = ?", evicted)
+        logger.info("Evicted %d buckets from readings cache.", len(evicted))
+
+    def size(self):
+        """ Return the size of the stored readings.
+        :return: size in bytes
+        :rtype: int """
+
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM buckets").fetchone()[0]
+
+    def invalidate(self, meter_id, resolution=None):
+        """ Delete the cached readings of a meter.
+        :param str meter_id: identifier of the meter
+        :param str resolution: only delete readings of this resolution """
+
+        with self._lock, self._connection:
+            if resolution is None:
+                self._connection.execute("DELETE FROM buckets WHERE meter_id = ?",
+                                         (meter_id,))
+            else:
+                self._connection.execute(
+                    "DELETE FROM buckets WHERE meter_id = ? AND resolution = ?",
+                    (meter_id, resolution))
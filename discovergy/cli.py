@@ -0,0 +1,312 @@
+""" Command line client for short-lived jobs such as cron scripts. Queries
+use OAuth tokens cached by `login` and are sent with the standard library and
+oauthlib only, so a run neither imports requests nor logs in. Results are
+written to stdout as JSON lines.
+
+    python -m discovergy login --client NAME --email EMAIL
+    python -m discovergy last-readings METER_ID [METER_ID ...]
+    python -m discovergy readings METER_ID --from MS --to MS --resolution one_hour
+
+DISCOVERGY_CLIENT, DISCOVERGY_EMAIL, DISCOVERGY_PASSWORD and DISCOVERGY_TOKENS
+provide defaults for the options. If the API rejects the cached tokens and
+DISCOVERGY_PASSWORD is set, the client logs in again and sends the rejected
+request again.
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+from .api import sign
+from .decoders import get_decoder
+from .discovergy import BASE_URL, MAX_THROTTLE_RETRIES, TIMEOUT, exception_template, throttle_delay
+from .tokens import FileTokenStore
+
+
+logger = logging.getLogger(__name__)
+TOKENS_PATH = os.path.join('~', '.config', 'discovergy', 'tokens.json')
+
+
+class TokenRejected(ValueError):
+    """ The API rejected the cached OAuth tokens. """
+
+
+class TokenClient:
+    """ Minimal client sending GET requests signed with cached OAuth tokens
+    over one keep-alive connection per thread. """
+
+    def __init__(self, tokens, base_url=BASE_URL, timeout=TIMEOUT, renew_tokens=None):
+        """ Inititalize TokenClient class.
+        :param dict tokens: consumer_key, consumer_secret, token and
+        token_secret as saved by Discovergy.login() in a token store
+        :param str base_url: root URL of the Discovergy API
+        :param timeout: timeout of requests in seconds
+        :param renew_tokens: optional callable returning new tokens, or None on
+        failure, called once if the API rejects the tokens
+        """
+
+        self._tokens = tokens
+        self._login = renew_tokens
+        self._login_lock = threading.Lock()
+        self._base_url = base_url
+        self._url = urlsplit(base_url)
+        self._timeout = timeout
+        self._json_decoder = get_decoder()
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self._url.scheme == 'https':
+                connection = http.client.HTTPSConnection(self._url.netloc, timeout=self._timeout)
+            else:
+                connection = http.client.HTTPConnection(self._url.netloc, timeout=self._timeout)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _send(self, tokens, url):
+        """ Send a GET request signed with tokens, reconnecting once if the
+        kept alive connection was closed.
+        :return: response and its body
+        :rtype: tuple """
+
+        uri, headers = sign(url, 'GET', tokens['consumer_key'], tokens['consumer_secret'],
+                            resource_owner_key=tokens['token'],
+                            resource_owner_secret=tokens['token_secret'])
+        parts = urlsplit(uri)
+        target = parts.path + ('?' + parts.query if parts.query else '')
+        try:
+            return self._request(target, headers)
+        except (http.client.HTTPException, ConnectionError):
+            return self._request(target, headers)
+
+    def _request(self, target, headers):
+        connection = self._connection()
+        try:
+            connection.request('GET', target, headers=headers)
+            response = connection.getresponse()
+            return response, response.read()
+        except (http.client.HTTPException, ConnectionError):
+            connection.close()
+            self._local.connection = None
+            raise
+
+    def _send_throttled(self, tokens, url):
+        """ Send a GET request, retrying while the API answers 429 Too Many
+        Requests.
+        :return: the last response and its body
+        :rtype: tuple """
+
+        for attempt in range(MAX_THROTTLE_RETRIES):
+            response, content = self._send(tokens, url)
+            if response.status != 429:
+                return response, content
+            time.sleep(throttle_delay(response, attempt))
+        return self._send(tokens, url)
+
+    def _renew_tokens(self, tokens):
+        """ Log in again after the API rejected tokens, once for all
+        threads.
+        :return: whether new tokens are available
+        :rtype: bool """
+
+        with self._login_lock:
+            if self._tokens is not tokens:
+                # Another thread already logged in again
+                return True
+            tokens = self._login() if self._login is not None else None
+            self._login = None
+            if tokens is None:
+                return False
+            self._tokens = tokens
+            return True
+
+    def get_json(self, path, **parameters):
+        """ Send a GET request to an endpoint and decode the JSON response,
+        retrying while the API answers 429 Too Many Requests and once with
+        new tokens if it rejected the tokens.
+        :param str path: path of the endpoint, e.g. '/last_reading'
+        :param parameters: query parameters
+        :return: decoded response
+        :raises TokenRejected: if the API rejected the tokens
+        :raises ValueError: if the request failed or the response is not
+        valid JSON """
+
+        url = self._base_url + path
+        if parameters:
+            url += '?' + urlencode(parameters)
+
+        tokens = self._tokens
+        response, content = self._send_throttled(tokens, url)
+        if response.status == 401 and self._renew_tokens(tokens):
+            response, content = self._send_throttled(self._tokens, url)
+
+        if response.status == 401:
+            raise TokenRejected("Request failed with status code 401")
+        if response.status != 200:
+            raise ValueError("Request failed with status code %s" % response.status)
+        return self._json_decoder(content)
+
+    def close(self):
+        """ Close the connections of all threads. """
+
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+
+
+def login(arguments, store, key):
+    """ Run the full OAuth workflow and save the tokens in the store.
+    :param str key: key of the client account in the store
+    :return: tokens on success, None otherwise
+    :rtype: dict """
+
+    from .discovergy import Discovergy
+
+    password = os.environ.get('DISCOVERGY_PASSWORD')
+    if password is None:
+        if not sys.stdin.isatty():
+            return None
+        import getpass
+        password = getpass.getpass("Password for %s: " % arguments.email)
+
+    discovergy = Discovergy(arguments.client, token_store=store, base_url=arguments.base_url,
+                            timeout=arguments.timeout)
+    store.delete(key)
+    if not discovergy.login(arguments.email, password):
+        return None
+    return store.load(key)
+
+
+def write(value):
+    sys.stdout.write(json.dumps(value, separators=(',', ':'), ensure_ascii=False) + '\n')
+
+
+def command_meters(client, arguments):
+    for meter in client.get_json('/meters'):
+        write(meter)
+    return 0
+
+
+def command_last_readings(client, arguments):
+    meter_ids = arguments.meter_ids
+    if meter_ids == ['-']:
+        meter_ids = [line.strip() for line in sys.stdin if line.strip()]
+
+    def fetch(meter_id):
+        try:
+            return meter_id, client.get_json('/last_reading', meterId=meter_id), None
+        except TokenRejected:
+            raise
+        except Exception as e:
+            return meter_id, None, e
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=arguments.max_workers) as executor:
+        for meter_id, reading, error in executor.map(fetch, meter_ids):
+            if error is not None:
+                message = exception_template.format(type(error).__name__, error.args)
+                logger.error("Failed to get last reading of meter %s: %s", meter_id, message)
+                failed += 1
+                continue
+            write({'meterId': meter_id, 'time': reading['time'], 'values': reading['values']})
+            sys.stdout.flush()
+    return 1 if failed else 0
+
+
+def command_readings(client, arguments):
+    parameters = {'meterId': arguments.meter_id, 'from': arguments.start,
+                  'resolution': arguments.resolution}
+    if arguments.end is not None:
+        parameters['to'] = arguments.end
+    for reading in client.get_json('/readings', **parameters):
+        write({'meterId': arguments.meter_id, 'time': reading['time'],
+               'values': reading['values']})
+    return 0
+
+
+COMMANDS = {'meters': command_meters,
+            'last-readings': command_last_readings,
+            'readings': command_readings}
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(prog='discovergy', description="Query the Discovergy API "
+                                     "with cached tokens and write JSON lines.")
+    parser.add_argument('--client', default=os.environ.get('DISCOVERGY_CLIENT', 'discovergy-cli'),
+                        help="client name for OAuth process")
+    parser.add_argument('--email', default=os.environ.get('DISCOVERGY_EMAIL'),
+                        help="email of the client account")
+    parser.add_argument('--tokens', default=os.environ.get('DISCOVERGY_TOKENS', TOKENS_PATH),
+                        help="token file, default %(default)s")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--timeout', type=float, default=TIMEOUT, help="seconds per request")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('login', help="log in and cache the tokens")
+    commands.add_parser('meters', help="meters of the client account")
+    last_readings = commands.add_parser('last-readings', help="last reading of meters")
+    last_readings.add_argument('meter_ids', nargs='+', metavar='METER_ID',
+                               help="identifiers of the meters, - to read them from stdin")
+    last_readings.add_argument('--max-workers', type=int, default=4,
+                               help="maximum number of concurrent requests")
+    readings = commands.add_parser('readings', help="readings of a meter")
+    readings.add_argument('meter_id', metavar='METER_ID')
+    readings.add_argument('--from', dest='start', type=int, required=True,
+                          help="unix milliseconds timestamp")
+    readings.add_argument('--to', dest='end', type=int, help="unix milliseconds timestamp")
+    readings.add_argument('--resolution', default='raw')
+    arguments = parser.parse_args(argv)
+    if arguments.email is None:
+        parser.error("--email or DISCOVERGY_EMAIL is required")
+    arguments.tokens = os.path.expanduser(arguments.tokens)
+    return arguments
+
+
+def main(argv=None):
+    """ Run the command line client.
+    :return: exit status
+    :rtype: int """
+
+    logging.basicConfig(format='%(levelname)s: %(message)s')
+    arguments = parse_arguments(argv)
+    os.makedirs(os.path.dirname(os.path.abspath(arguments.tokens)), exist_ok=True)
+    store = FileTokenStore(arguments.tokens)
+    key = arguments.client + ":" + arguments.email
+
+    tokens = store.load(key)
+    if arguments.command == 'login' or tokens is None:
+        tokens = login(arguments, store, key)
+        if tokens is None:
+            logger.error("Failed to login, set DISCOVERGY_PASSWORD or run the login command "
+                         "in a terminal.")
+            return 1
+        if arguments.command == 'login':
+            return 0
+
+    client = TokenClient(tokens, arguments.base_url, arguments.timeout,
+                         renew_tokens=lambda: login(arguments, store, key))
+    try:
+        return COMMANDS[arguments.command](client, arguments)
+    except TokenRejected:
+        logger.error("The API rejected the cached tokens and login failed.")
+        return 1
+    except Exception as e:
+        message = exception_template.format(type(e).__name__, e.args)
+        logger.error(message)
+        return 1
+    finally:
+        client.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
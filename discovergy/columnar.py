@@ -0,0 +1,110 @@
+from array import array
+
+
+class ColumnarReadings:
+    """ Readings of one meter stored as one typed array per field instead of
+    a dict per measurement. Columns are int64 ('q') as long as the API returns
+    integers and switch to float64 ('d') on the first float or missing value,
+    which is stored as NaN. """
+
+    def __init__(self, fieldnames=None):
+        """ Inititalize ColumnarReadings class.
+        :param fieldnames: names of the fields to keep, e.g. from
+        Discovergy.get_fieldnames_for_meter(), None to take the fields of the
+        first measurement
+        """
+
+        self.time = array('q')
+        self.fields = {}
+        if fieldnames:
+            self.fields = {name: array('q') for name in fieldnames}
+
+    @classmethod
+    def from_readings(cls, readings, fieldnames=None):
+        """ Build columns from measurements in the format of
+        Discovergy.get_readings().
+        :param readings: iterable of measurements, e.g.
+        Discovergy.iter_readings()
+        :param fieldnames: names of the fields to keep
+        :rtype: ColumnarReadings """
+
+        columns = cls(fieldnames)
+        for reading in readings:
+            columns.append(reading)
+        return columns
+
+    def append(self, reading):
+        """ Append a measurement in the format of Discovergy.get_readings().
+        :param dict reading: measurement with 'time' and 'values' """
+
+        values = reading['values']
+        if not self.fields and not self.time:
+            self.fields = {name: array('q') for name in values}
+
+        self.time.append(reading['time'])
+        for name, column in self.fields.items():
+            value = values.get(name)
+            if column.typecode == 'q' and not isinstance(value, int):
+                column = self.fields[name] = array('d', column)
+            column.append(float('nan') if value is None else value)
+
+    def __len__(self):
+        return len(self.time)
+
+    def __getitem__(self, name):
+        """ Return the column of a field, or the timestamps for 'time'.
+        :rtype: array.array """
+
+        if name == 'time':
+            return self.time
+        return self.fields[name]
+
+    @property
+    def fieldnames(self):
+        """ Names of the stored fields.
+        :rtype: list """
+
+        return list(self.fields)
+
+    @property
+    def nbytes(self):
+        """ Memory used by the column buffers.
+        :rtype: int """
+
+        return sum(column.itemsize * len(column)
+                   for column in [self.time, *self.fields.values()])
+
+    def to_readings(self):
+        """ Convert back to measurements in the format of
+        Discovergy.get_readings().
+        :rtype: list """
+
+        names = self.fieldnames
+        return [{'time': timestamp,
+                 'values': {name: self.fields[name][i] for name in names}}
+                for i, timestamp in enumerate(self.time)]
+
+    def to_numpy(self):
+        """ Return the columns as NumPy arrays sharing the buffers of this
+        instance. Requires numpy.
+        :return: array per field name and 'time'
+        :rtype: dict """
+
+        import numpy
+
+        result = {'time': numpy.frombuffer(self.time, dtype=numpy.int64)}
+        for name, column in self.fields.items():
+            dtype = numpy.int64 if column.typecode == 'q' else numpy.float64
+            result[name] = numpy.frombuffer(column, dtype=dtype)
+        return result
+
+    def to_dataframe(self):
+        """ Return the columns as a pandas DataFrame indexed by UTC time.
+        Requires pandas.
+        :rtype: pandas.DataFrame """
+
+        import pandas
+
+        columns = self.to_numpy()
+        index = pandas.to_datetime(columns.pop('time'), unit='ms', utc=True)
+        return pandas.DataFrame(columns, index=index)
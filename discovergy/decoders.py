@@ -0,0 +1,36 @@
+import json
+
+
+def stdlib_loads(content):
+    """ Decode JSON with the standard library, which accepts UTF-8 bytes
+    directly.
+    :param bytes content: UTF-8 encoded JSON
+    :return: decoded content """
+
+    return json.loads(content)
+
+
+def get_decoder(name=None):
+    """ Return a function decoding JSON from bytes.
+    :param str name: 'orjson', 'ujson' or 'json', None for the fastest
+    installed one
+    :return: callable taking bytes and returning the decoded content
+    :raises ImportError: if the requested decoder is not installed """
+
+    if name is None:
+        for candidate in ('orjson', 'ujson'):
+            try:
+                return get_decoder(candidate)
+            except ImportError:
+                pass
+        return stdlib_loads
+
+    if name == 'orjson':
+        import orjson
+        return orjson.loads
+    if name == 'ujson':
+        import ujson
+        return ujson.loads
+    if name == 'json':
+        return stdlib_loads
+    raise ValueError("Unknown JSON decoder %r" % name)
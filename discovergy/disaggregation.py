@@ -0,0 +1,119 @@
+import sys
+from array import array
+
+
+class DisaggregationMatrix:
+    """ Disaggregation of a meter as a dense matrix: one row per timestamp in
+    ascending order and one column per device, stored row-major in a single
+    typed array. Devices missing from a bucket of the API response are stored
+    as 0 μWh. """
+
+    def __init__(self, time=None, devices=(), values=None):
+        """ Inititalize DisaggregationMatrix class.
+        :param array.array time: unix milliseconds timestamps ('q')
+        :param devices: device names in column order
+        :param array.array values: energy in μWh of len(time) * len(devices)
+        cells, row-major, int64 ('q') or float64 ('d')
+        """
+
+        self.time = time if time is not None else array('q')
+        self.devices = tuple(sys.intern(device) for device in devices)
+        self.index = {device: i for i, device in enumerate(self.devices)}
+        self.values = values if values is not None else array('q')
+
+    @classmethod
+    def from_dict(cls, disaggregation):
+        """ Build a matrix from the result of Discovergy.get_disaggregation().
+        :param dict disaggregation: energy in μWh per device per timestamp
+        string
+        :rtype: DisaggregationMatrix """
+
+        return cls.from_chunks([disaggregation])
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """ Merge results of Discovergy.get_disaggregation() for consecutive
+        intervals into one matrix. Later chunks win for duplicate timestamps.
+        :param chunks: iterable of dicts of energy in μWh per device per
+        timestamp string
+        :rtype: DisaggregationMatrix """
+
+        rows = {}
+        devices = set()
+        for chunk in chunks:
+            for timestamp, row in chunk.items():
+                rows[int(timestamp)] = row
+                devices.update(row)
+
+        devices = sorted(devices)
+        times = sorted(rows)
+        cells = [rows[timestamp].get(device, 0) for timestamp in times for device in devices]
+        typecode = 'q' if all(isinstance(value, int) for value in cells) else 'd'
+        return cls(array('q', times), devices, array(typecode, cells))
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def shape(self):
+        """ Number of timestamps and devices.
+        :rtype: tuple """
+
+        return len(self.time), len(self.devices)
+
+    @property
+    def nbytes(self):
+        """ Memory used by the buffers.
+        :rtype: int """
+
+        return self.time.itemsize * len(self.time) + self.values.itemsize * len(self.values)
+
+    def row(self, i):
+        """ Return the energy of all devices in row i.
+        :rtype: array.array """
+
+        width = len(self.devices)
+        return self.values[i * width:(i + 1) * width]
+
+    def column(self, device):
+        """ Return the energy of a device per timestamp.
+        :param str device: name of the device
+        :rtype: array.array
+        :raises KeyError: if the device is unknown """
+
+        return self.values[self.index[device]::len(self.devices)]
+
+    def totals(self):
+        """ Return the energy in μWh per device over all timestamps.
+        :rtype: dict """
+
+        width = len(self.devices)
+        return {device: sum(self.values[i::width]) for i, device in enumerate(self.devices)}
+
+    def shares(self):
+        """ Return the fraction of the total energy per device.
+        :rtype: dict """
+
+        totals = self.totals()
+        total = sum(totals.values())
+        return {device: value / total if total else 0.0 for device, value in totals.items()}
+
+    def to_dict(self):
+        """ Convert back to the format of Discovergy.get_disaggregation().
+        :rtype: dict """
+
+        return {str(timestamp): dict(zip(self.devices, self.row(i)))
+                for i, timestamp in enumerate(self.time)}
+
+    def to_numpy(self):
+        """ Return the timestamps and a 2D array of shape (timestamps,
+        devices) sharing the buffers of this instance. Requires numpy.
+        :return: 'time', 'devices' and 'values'
+        :rtype: dict """
+
+        import numpy
+
+        dtype = numpy.int64 if self.values.typecode == 'q' else numpy.float64
+        return {'time': numpy.frombuffer(self.time, dtype=numpy.int64),
+                'devices': list(self.devices),
+                'values': numpy.frombuffer(self.values, dtype=dtype).reshape(self.shape)}
@@ -1,21 +1,117 @@
-import json
+import functools
 import logging
-from urllib.parse import parse_qs
-import requests
-from requests_oauthlib import OAuth1Session
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .activities import ActivityIndex
+from .api import Endpoints, check_response, exception_template, log_failure, parse_verifier
+from .columnar import ColumnarReadings
+from .decoders import get_decoder
+from .disaggregation import DisaggregationMatrix
+from .metrics import Metrics
+from .ratelimit import in_caller_context
+from .readings import iter_json_array, merge_readings, split_interval
+from .resample import best_resolution, resample, resolution_step
+from .singleflight import SingleFlight
+from .transport import Transport
 
 
 logger = logging.getLogger(__name__)
+BASE_URL = 'https://api.discovergy.com/public/v1'
 TIMEOUT = 10
-exception_template = "An exception of type {0} occurred. Arguments:\n{1!r}"
+STREAM_CHUNK_SIZE = 64 * 1024
+MAX_THROTTLE_RETRIES = 5
+THROTTLE_BACKOFF = 1.0
+
+DAY = 24 * 60 * 60 * 1000
+# Longest interval the API accepts for a single /readings request per resolution
+RESOLUTION_WINDOWS = {'raw': DAY,
+                      'three_minutes': 10 * DAY,
+                      'fifteen_minutes': 31 * DAY,
+                      'one_hour': 93 * DAY,
+                      'one_day': 10 * 365 * DAY,
+                      'one_week': 20 * 365 * DAY,
+                      'one_month': 50 * 365 * DAY,
+                      'one_year': 100 * 365 * DAY}
+# Interval of a single /disaggregation request of get_disaggregation_matrix()
+DISAGGREGATION_WINDOW = 31 * DAY
+
+
+def retry_after(response):
+    """ Return the delay requested by the Retry-After header of a response.
+    :param requests.Response response: a 429 or 503 response
+    :return: seconds to wait, None if the header is missing or invalid
+    :rtype: float """
+
+    value = getattr(response, 'headers', {}).get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def throttle_delay(response, attempt):
+    """ Return how long to wait before sending a throttled request again and
+    log the delay.
+    :param response: a 429 response
+    :param int attempt: number of retries so far
+    :return: seconds of the Retry-After header, exponential backoff without
+    it
+    :rtype: float """
+
+    delay = retry_after(response)
+    if delay is None:
+        delay = THROTTLE_BACKOFF * 2 ** attempt
+    logger.warning("Throttled by the API, retrying in %.1f seconds.", delay)
+    return delay
+
+
+class LastReadings(dict):
+    """ Last measurement per meter id of a bulk request, see
+    Discovergy.get_last_readings(). """
+
+    def __init__(self):
+        super().__init__()
+        self.errors = {}
+        self.elapsed = 0.0
 
 
 class Discovergy:
     """ Main class to query the Discovergy API. """
 
-    def __init__(self, client_name):
+    def __init__(self, client_name, token_store=None, transport=None, timeout=TIMEOUT,
+                 metrics=None, rate_limiter=None, metadata_cache=None, json_decoder=None,
+                 base_url=BASE_URL, coalesce=True, last_reading_ttl=0):
         """ Inititalize Discovergy class.
         :param client_name: client name for OAuth process
+        :param token_store: optional store to reuse OAuth tokens across
+        logins, e.g. discovergy.tokens.FileTokenStore
+        :param transport: connection pool for all requests, a new Transport
+        with default settings if None
+        :param timeout: default timeout of requests in seconds
+        :param metrics: registry recording every request, e.g. to share it
+        between instances, a new Metrics if None
+        :param rate_limiter: optional RateLimiter every data request waits
+        for, shared between threads and instances
+        :param metadata_cache: optional MetadataCache for the results of
+        get_meters() and get_fieldnames_for_meter()
+        :param json_decoder: callable decoding JSON response bodies from
+        bytes, the fastest installed of orjson, ujson and json if None
+        :param str base_url: root URL of the Discovergy API, e.g. of a
+        discovergy.simulator.Simulator
+        :param bool coalesce: let threads requesting the same URL at the same
+        time share one request and its decoded result, which callers must
+        therefore not modify
+        :param float last_reading_ttl: seconds to reuse the last reading of a
+        meter for, 0 to always fetch it
         """
 
         self._client_name = client_name
@@ -24,13 +120,33 @@ class Discovergy:
         self._consumer_key = ""
         self._consumer_secret = ""
         self._discovergy_oauth = None
-        self._base_url = 'https://api.discovergy.com/public/v1'
-        self._consumer_token_url = self._base_url + '/oauth1/consumer_token'
-        self._request_token_url = self._base_url + '/oauth1/request_token'
-        self._authorization_base_url = self._base_url + '/oauth1/authorize'
-        self._access_token_url = self._base_url + '/oauth1/access_token'
+        self._base_url = base_url
+        self._endpoints = Endpoints(base_url)
+        self._consumer_token_url = self._endpoints.consumer_token
+        self._request_token_url = self._endpoints.request_token
+        self._authorization_base_url = self._endpoints.authorize
+        self._access_token_url = self._endpoints.access_token
         self._oauth_key = None
         self._oauth_secret = None
+        self._transport = transport if transport is not None else Transport()
+        self._timeout = timeout
+        self._metrics = metrics if metrics is not None else Metrics()
+        self._rate_limiter = rate_limiter
+        self._metadata_cache = metadata_cache
+        self._json_decoder = json_decoder if json_decoder is not None else get_decoder()
+        self._token_store = token_store
+        self._login_lock = threading.Lock()
+        self._single_flight = SingleFlight() if coalesce else None
+        self._last_reading_ttl = last_reading_ttl
+        self._last_readings = {}
+        self._last_readings_lock = threading.Lock()
+
+    @property
+    def metrics(self):
+        """ Registry of the request metrics of this instance.
+        :rtype: Metrics """
+
+        return self._metrics
 
     def _fetch_consumer_tokens(self):
         """ Get consumer key and secret (not part of OAuth 1.0).
@@ -38,14 +154,12 @@ class Discovergy:
         :rtype: requests.models.Response """
 
         try:
-            response = requests.post(url=self._consumer_token_url,
-                                     data={'client': self._client_name},
-                                     headers={},
-                                     timeout=TIMEOUT)
+            response = self._transport.session.post(url=self._consumer_token_url,
+                                                    data={'client': self._client_name},
+                                                    headers={},
+                                                    timeout=self._timeout)
         except Exception as e:
-            logger.error('Failed request post:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Failed request post:', e)
             return None
 
         if not response.status_code == 200:
@@ -55,17 +169,13 @@ class Discovergy:
         try:
             self._oauth_key = response.json()['key']
         except Exception as e:
-            logger.error('Missing key in response:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Missing key in response:', e)
             return None
 
         try:
             self._oauth_secret = response.json()['secret']
         except Exception as e:
-            logger.error('Missing secret in response')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Missing secret in response', e)
             return None
 
         return response
@@ -75,24 +185,24 @@ class Discovergy:
         :return: token and token_secret on success, None otherwise
         :rtype: dict """
 
+        from requests_oauthlib import OAuth1Session
+
         try:
             request_token_oauth = OAuth1Session(self._oauth_key,
                                                 client_secret=self._oauth_secret,
                                                 callback_uri='oob')
+            self._transport.mount(request_token_oauth)
         except Exception as e:
-            logger.error('Failed to create OAuth1Session:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Failed to create OAuth1Session:', e)
             return None
 
         try:
-            oauth_token_response = request_token_oauth.fetch_request_token(self._request_token_url)
+            oauth_token_response = request_token_oauth.fetch_request_token(
+                self._request_token_url, timeout=self._timeout)
             result = {"token": oauth_token_response.get('oauth_token'),
                       "token_secret": oauth_token_response.get('oauth_token_secret')}
         except Exception as e:
-            logger.error('Failed to create oauth_token_response:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Failed to create oauth_token_response:', e)
             return None
 
         return result
@@ -107,27 +217,11 @@ class Discovergy:
         :rtype: str """
 
         try:
-            url = self._authorization_base_url + "?oauth_token=" + \
-                resource_owner_key + "&email=" + email + "&password=" + password
-            response = requests.get(url, headers={}, timeout=TIMEOUT)
-        except Exception as e:
-            logger.error('Failed authorization request:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
-            return ""
-
-        if not response.status_code == 200:
-            logger.error("Failed to login. "
-                         "Please check if your email and password are correct and try again.")
-            return ""
-
-        try:
-            parsed_response = parse_qs(response.content.decode('utf-8'))
-            verifier = parsed_response["oauth_verifier"][0]
+            url = self._endpoints.authorization(resource_owner_key, email, password)
+            response = self._transport.session.get(url, headers={}, timeout=self._timeout)
+            verifier = parse_verifier(response.status_code, response.content)
         except Exception as e:
-            logger.error('Failed to parse response:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Failed to authorize request token:', e)
             return ""
 
         return verifier
@@ -142,33 +236,85 @@ class Discovergy:
         :return: token and token_secret on success, None otherwise
         :rtype: dict """
 
+        from requests_oauthlib import OAuth1Session
+
         try:
             access_token_oauth = OAuth1Session(self._oauth_key,
                                                client_secret=self._oauth_secret,
                                                resource_owner_key=resource_owner_key,
                                                resource_owner_secret=resource_owner_secret,
                                                verifier=verifier)
+            self._transport.mount(access_token_oauth)
         except Exception as e:
-            logger.error('Failed to create OAuth1Session:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Failed to create OAuth1Session:', e)
             return None
 
         try:
             oauth_tokens = access_token_oauth.fetch_access_token(
-                self._access_token_url)
+                self._access_token_url, timeout=self._timeout)
             result = {"token": oauth_tokens.get('oauth_token'),
                       "token_secret": oauth_tokens.get('oauth_token_secret')}
         except Exception as e:
-            logger.error('Failed to create oauth_tokens:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Failed to create oauth_tokens:', e)
             return None
 
         return result
 
     def login(self, email, password):
-        """ Authentication workflow for client account.
+        """ Authentication workflow for client account. Tokens saved in the
+        token store are reused without contacting the API, the full OAuth
+        workflow only runs if there are none or the API rejects them later.
+        :param str email: the username/email of the client account
+        :param str password: the password of the client account
+        :return: True on success, False on failure
+        :rtype: bool """
+
+        self._email = email
+        self._password = password
+
+        if self._token_store is not None:
+            tokens = self._token_store.load(self._token_key())
+            if tokens is not None and self._open_session(tokens):
+                return True
+
+        with self._metrics.measure('/oauth1', self._access_token_url) as measurement:
+            if self._authenticate(email, password):
+                return True
+            measurement.fail("Login failed")
+            return False
+
+    def _token_key(self):
+        """ Key of the client account in the token store.
+        :rtype: str """
+
+        return self._client_name + ":" + self._email
+
+    def _open_session(self, tokens):
+        """ Create the OAuth session for data requests.
+        :param dict tokens: consumer_key, consumer_secret, token and
+        token_secret
+        :return: True on success, False on failure
+        :rtype: bool """
+
+        from requests_oauthlib import OAuth1Session
+
+        try:
+            self._oauth_key = tokens["consumer_key"]
+            self._oauth_secret = tokens["consumer_secret"]
+            self._discovergy_oauth = OAuth1Session(self._oauth_key,
+                                                   client_secret=self._oauth_secret,
+                                                   resource_owner_key=tokens["token"],
+                                                   resource_owner_secret=tokens["token_secret"])
+            self._transport.mount(self._discovergy_oauth)
+        except Exception as e:
+            log_failure(logger, 'Failed to create OAuth1Session:', e)
+            return False
+
+        else:
+            return True
+
+    def _authenticate(self, email, password):
+        """ Run the full OAuth workflow and save the resulting tokens.
         :param str email: the username/email of the client account
         :param str password: the password of the client account
         :return: True on success, False on failure
@@ -180,17 +326,13 @@ class Discovergy:
         try:
             resource_owner_key = request_tokens["token"]
         except Exception as e:
-            logger.error('Missing token in request_tokens:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Missing token in request_tokens:', e)
             return False
 
         try:
             resource_owner_secret = request_tokens["token_secret"]
         except Exception as e:
-            logger.error('Missing token_secret in request_tokens:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Missing token_secret in request_tokens:', e)
             return False
 
         verifier = self._authorize_request_token(email, password,
@@ -202,41 +344,142 @@ class Discovergy:
         try:
             resource_owner_key = access_token["token"]
         except Exception as e:
-            logger.error('Missing token in access_token:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Missing token in access_token:', e)
             return False
 
         try:
             resource_owner_secret = access_token["token_secret"]
         except Exception as e:
-            logger.error('Missing token_secret in access_token:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+            log_failure(logger, 'Missing token_secret in access_token:', e)
             return False
 
-        try:
-            self._discovergy_oauth = OAuth1Session(self._oauth_key,
-                                                   client_secret=self._oauth_secret,
-                                                   resource_owner_key=resource_owner_key,
-                                                   resource_owner_secret=resource_owner_secret)
-        except Exception as e:
-            logger.error('Failed to create OAuth1Session:')
-            message = exception_template.format(type(e).__name__, e.args)
-            logger.error(message)
+        tokens = {"consumer_key": self._oauth_key,
+                  "consumer_secret": self._oauth_secret,
+                  "token": resource_owner_key,
+                  "token_secret": resource_owner_secret}
+        if not self._open_session(tokens):
             return False
 
-        else:
-            return True
+        if self._token_store is not None:
+            self._token_store.save(self._token_key(), tokens)
+        return True
+
+    def _reauthenticate(self, session):
+        """ Log in again after the API rejected the access token of session.
+        :param session: the OAuth session whose request was rejected
+        :return: True if a new session is available, False otherwise
+        :rtype: bool """
+
+        if not self._password:
+            return False
 
-    def get_meters(self):
+        with self._login_lock:
+            if self._discovergy_oauth is not session:
+                # Another thread already logged in again
+                return True
+            logger.info("Access token rejected, logging in again.")
+            if self._token_store is not None:
+                self._token_store.delete(self._token_key())
+            return self._authenticate(self._email, self._password)
+
+    def _ensure_pool_size(self, size):
+        """ Grow the connection pool of the transport so that size
+        concurrent requests to the API do not open throwaway connections.
+        :param int size: number of connections to keep per host """
+
+        if size > self._transport.pool_maxsize:
+            self._transport.resize(size)
+
+    def _send(self, session, url, timeout, measurement, **kwargs):
+        """ Send a GET request with session, waiting for the rate limiter and
+        retrying while the API answers 429 Too Many Requests.
+        :return: the last response
+        :rtype: requests.Response """
+
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+            response = session.get(url, timeout=timeout, **kwargs)
+            if response.status_code != 429:
+                if self._rate_limiter is not None:
+                    self._rate_limiter.succeeded()
+                return response
+            if attempt == MAX_THROTTLE_RETRIES:
+                break
+
+            delay = throttle_delay(response, attempt)
+            response.close()
+            measurement.retried()
+            if self._rate_limiter is not None:
+                self._rate_limiter.throttled(delay)
+            else:
+                time.sleep(delay)
+
+        return response
+
+    def _get_json(self, url, timeout=None):
+        """ Send a GET request with the OAuth session and decode the JSON
+        response, sharing the request with other threads requesting the same
+        URL at the same time.
+        :param str url: request URL
+        :param timeout: timeout in seconds, None for the default timeout
+        :return: decoded response
+        :raises ValueError: if the request failed or the response is not
+        valid JSON """
+
+        if self._single_flight is None:
+            return self._request_json(url, timeout)
+        return self._single_flight.do(url, self._request_json, url, timeout)
+
+    def _request_json(self, url, timeout=None):
+        """ Send a GET request and decode the JSON response, see
+        _get_json(). """
+
+        return self._request(url, timeout, self._json_decoder)
+
+    def _get_content(self, url, timeout=None):
+        """ Send a GET request with the OAuth session and return the raw
+        response body, e.g. to decode it in another process.
+        :param str url: request URL
+        :param timeout: timeout in seconds, None for the default timeout
+        :rtype: bytes
+        :raises ValueError: if the request failed """
+
+        return self._request(url, timeout, None)
+
+    def _request(self, url, timeout, decoder):
+        """ Send a GET request, authenticating again if the API rejects the
+        tokens.
+        :param decoder: callable decoding the response body, None to return
+        it undecoded
+        :raises ValueError: if the request failed or decoding failed """
+
+        timeout = timeout if timeout is not None else self._timeout
+        with self._metrics.measure(self._endpoints.path(url), url) as measurement:
+            session = self._discovergy_oauth
+            response = self._send(session, url, timeout, measurement)
+            if response.status_code == 401 and self._reauthenticate(session):
+                response = self._send(self._discovergy_oauth, url, timeout, measurement)
+            measurement.response(response)
+            if decoder is not None:
+                decoder = functools.partial(measurement.decode, decoder)
+            return check_response(response.status_code, response.content, decoder)
+
+    def get_meters(self, timeout=None):
         """ Get all meters for client account.
+        :param timeout: timeout in seconds, None for the default timeout
         :return: meters
         :rtype: list """
 
+        if self._metadata_cache is not None:
+            meters = self._metadata_cache.get(self._metadata_key("meters"))
+            if meters is not None:
+                return meters
+
         try:
-            response = self._discovergy_oauth.get(self._base_url + "/meters")
-            meters = json.loads(response.content.decode('utf-8'))
+            meters = self._get_json(self._endpoints.meters(), timeout)
+            if self._metadata_cache is not None:
+                self._metadata_cache.set(self._metadata_key("meters"), meters)
             return meters
 
         except Exception as e:
@@ -244,68 +487,215 @@ class Discovergy:
             logger.error(message)
             return []
 
-    def get_fieldnames_for_meter(self, meter_id):
+    def get_fieldnames_for_meter(self, meter_id, timeout=None):
         """ Return the available measurement field names for the specified
         meter.
         :param str meter_id: identifier of the meter to get readings for
+        :param timeout: timeout in seconds, None for the default timeout
         :return: fieldnames
         :rtype: list """
 
+        if self._metadata_cache is not None:
+            fieldnames = self._metadata_cache.get(self._metadata_key("field_names", meter_id))
+            if fieldnames is not None:
+                return fieldnames
+
         try:
-            response = self._discovergy_oauth.get(self._base_url +
-                                                  "/field_names?meterId=" +
-                                                  meter_id)
-            fieldnames = json.loads(response.content.decode("utf-8"))
+            fieldnames = self._fetch_fieldnames(meter_id, timeout)
+            if self._metadata_cache is not None:
+                self._metadata_cache.set(self._metadata_key("field_names", meter_id),
+                                         fieldnames)
             return fieldnames
 
         except ValueError as e:
             logger.error("Exception: %s", str(e))
             return []
 
-    def get_last_reading(self, meter_id):
+    def _fetch_fieldnames(self, meter_id, timeout=None):
+        """ Fetch the field names of a meter, bypassing the metadata cache.
+        :rtype: list
+        :raises ValueError: if the request failed """
+
+        return self._get_json(self._endpoints.field_names(meter_id), timeout)
+
+    def _metadata_key(self, *parts):
+        """ Key of metadata of the client account in the metadata cache.
+        :rtype: str """
+
+        return "/".join((self._client_name, self._email) + parts)
+
+    def invalidate_metadata(self, meter_id=None):
+        """ Remove cached metadata, so that it is fetched again on next use.
+        :param str meter_id: only remove the field names of this meter, None
+        for the meter list and all field names """
+
+        if self._metadata_cache is None:
+            return
+        if meter_id is None:
+            self._metadata_cache.invalidate(self._metadata_key(""))
+        else:
+            self._metadata_cache.delete(self._metadata_key("field_names", meter_id))
+
+    def prefetch_fieldnames(self, meter_ids=None, max_workers=10):
+        """ Fetch the field names of many meters concurrently into the
+        metadata cache, e.g. at startup.
+        :param meter_ids: identifiers of the meters, None for all meters of
+        the client account
+        :param int max_workers: maximum number of concurrent requests
+        :return: field names per meter id, without meters that failed
+        :rtype: dict """
+
+        if meter_ids is None:
+            meter_ids = [meter["meterId"] for meter in self.get_meters()]
+
+        result = {}
+        missing = []
+        for meter_id in meter_ids:
+            fieldnames = None
+            if self._metadata_cache is not None:
+                fieldnames = self._metadata_cache.get(self._metadata_key("field_names",
+                                                                         meter_id))
+            if fieldnames is None:
+                missing.append(meter_id)
+            else:
+                result[meter_id] = fieldnames
+
+        def fetch(meter_id):
+            try:
+                return meter_id, self._fetch_fieldnames(meter_id)
+            except Exception as e:
+                message = exception_template.format(type(e).__name__, e.args)
+                logger.error(message)
+                return meter_id, None
+
+        self._ensure_pool_size(max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetched = {meter_id: fieldnames
+                       for meter_id, fieldnames in executor.map(in_caller_context(fetch), missing)
+                       if fieldnames is not None}
+
+        if self._metadata_cache is not None:
+            self._metadata_cache.set_many({self._metadata_key("field_names", meter_id): fieldnames
+                                           for meter_id, fieldnames in fetched.items()})
+        result.update(fetched)
+        return result
+
+    def get_last_reading(self, meter_id, timeout=None):
         """ Return the last measurement for the specified meter.
         :param str meter_id: identifier of the meter to get readings for
+        :param timeout: timeout in seconds, None for the default timeout
         :return: 'time' as unix milliseconds timestamp, 'power' in mW, 'power1' - 'powern'
         for disaggregated energy consumers, 'energyOut' in mWh, 'energy' in mWh
         :rtype: dict """
 
         try:
-            response = self._discovergy_oauth.get(
-                self._base_url + "/last_reading?meterId=" + meter_id)
-            measurement = json.loads(response.content.decode("utf-8"))
-            return measurement
+            return self._fetch_last_reading(meter_id, timeout)
 
         except ValueError:
-            logger.error(response.text)
             return {}
 
-    def get_disaggregation(self, meter_id, start, end):
+    def _fetch_last_reading(self, meter_id, timeout=None):
+        """ Like get_last_reading(), but raises on failure.
+        :raises ValueError: if the request failed """
+
+        if self._last_reading_ttl:
+            with self._last_readings_lock:
+                cached = self._last_readings.get(meter_id)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+
+        reading = self._get_json(self._endpoints.last_reading(meter_id), timeout)
+        if self._last_reading_ttl:
+            with self._last_readings_lock:
+                self._last_readings[meter_id] = (time.monotonic() + self._last_reading_ttl,
+                                                 reading)
+        return reading
+
+    def get_last_readings(self, meter_ids, max_workers=10, timeout=None):
+        """ Return the last measurement for each of the specified meters,
+        fetched concurrently over a shared connection pool.
+        :param meter_ids: identifiers of the meters to get readings for
+        :param int max_workers: maximum number of concurrent requests
+        :param timeout: timeout in seconds, None for the default timeout
+        :return: measurement per meter id in the format of get_last_reading(),
+        with the exception per failed meter id in 'errors' and the duration of
+        the sweep in seconds in 'elapsed'
+        :rtype: LastReadings """
+
+        meter_ids = list(meter_ids)
+        self._ensure_pool_size(max_workers)
+        result = LastReadings()
+        started = time.monotonic()
+
+        def fetch(meter_id):
+            try:
+                return meter_id, self._fetch_last_reading(meter_id, timeout), None
+            except Exception as e:
+                return meter_id, None, e
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for meter_id, reading, error in executor.map(in_caller_context(fetch), meter_ids):
+                if error is None:
+                    result[meter_id] = reading
+                else:
+                    result.errors[meter_id] = error
+
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def get_disaggregation(self, meter_id, start, end, timeout=None):
         """ Return the disaggregation for the specified meter in the specified
         time interval.
         :param str meter_id: identifier of the meter to get readings for
         :param int start: start of interval as unix milliseconds timestamp
         :param int end: end of interval as unix milliseconds timestamp
+        :param timeout: timeout in seconds, None for the default timeout
         :return: existing measurements for the specified meter in μWh per device
         :rtype: dict """
 
         try:
-            if end is None:
-                response = self._discovergy_oauth.get(
-                    self._base_url + "/disaggregation?meterId=" + meter_id + "&from=" + str(start))
-            else:
-                response = self._discovergy_oauth.get(self._base_url +
-                                                      "/disaggregation?meterId="
-                                                      + meter_id + "&from=" +
-                                                      str(start) + "&to=" +
-                                                      str(end))
-            measurement = json.loads(response.content.decode("utf-8"))
-            return measurement
+            return self._fetch_disaggregation(meter_id, start, end, timeout)
 
         except ValueError:
-            logger.error(response.text)
             return {}
 
-    def get_readings(self, meter_id, start, end, resolution):
+    def _fetch_disaggregation(self, meter_id, start, end, timeout=None):
+        """ Like get_disaggregation(), but raises on failure.
+        :raises ValueError: if the request failed """
+
+        return self._get_json(self._endpoints.disaggregation(meter_id, start, end), timeout)
+
+    def get_disaggregation_matrix(self, meter_id, start, end, max_workers=4, timeout=None):
+        """ Return the disaggregation for the specified meter in the specified
+        time interval as a dense matrix, split into windows of
+        DISAGGREGATION_WINDOW that are fetched concurrently.
+        :param str meter_id: identifier of the meter to get readings for
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp, None
+        for now
+        :param int max_workers: maximum number of concurrent requests
+        :param timeout: timeout in seconds, None for the default timeout
+        :return: energy in μWh per timestamp and device, empty if a request
+        failed
+        :rtype: DisaggregationMatrix """
+
+        if end is None:
+            end = round(time.time() * 1e3)
+        windows = split_interval(start, end, DISAGGREGATION_WINDOW)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                chunks = list(executor.map(in_caller_context(
+                    lambda window: self._fetch_disaggregation(meter_id, window[0], window[1],
+                                                              timeout)),
+                    windows))
+
+        except ValueError:
+            return DisaggregationMatrix()
+
+        return DisaggregationMatrix.from_chunks(chunks)
+
+    def get_readings(self, meter_id, start, end, resolution, timeout=None):
         """ Return the measurements for the specified meter in the specified
         time interval.
         :param str meter_id: identifier of the meter to get readings for
@@ -315,52 +705,216 @@ class Discovergy:
         readings with possible values 'raw', 'three_minutes',
         'fifteen_minutes', 'one_hour', 'one_day', 'one_week', 'one_month',
         'one_year'
+        :param timeout: timeout in seconds, None for the default timeout
         :return: each measurement with 'time' as unix milliseconds timestamp,
         'power' in mW, 'power1' - 'powern'
         for disaggregated energy consumers, 'energyOut' in mWh, 'energy' in mWh
         :rtype: list """
 
         try:
-            if end is None:
-                response = self._discovergy_oauth.get(self._base_url +
-                                                      "/readings?meterId=" +
-                                                      meter_id + "&from=" +
-                                                      str(start) +
-                                                      "&resolution="
-                                                      + resolution)
-            else:
-                response = self._discovergy_oauth.get(self._base_url +
-                                                      "/readings?meterId=" +
-                                                      meter_id + "&from="
-                                                      + str(start) + "&to=" +
-                                                      str(end) + "&resolution="
-                                                      + resolution)
-            measurements = json.loads(response.content.decode("utf-8"))
-            return measurements
+            return self.fetch_readings(meter_id, start, end, resolution, timeout)
+
+        except ValueError:
+            return []
+
+    def fetch_readings(self, meter_id, start, end, resolution, timeout=None, decode=True):
+        """ Like get_readings(), but raises on failure instead of returning an
+        empty list, for callers that handle failed requests themselves.
+        :param bool decode: False to return the undecoded JSON response, e.g.
+        to decode it in another process
+        :return: measurements as returned by the API, bytes if not decode
+        :rtype: list
+        :raises ValueError: if the request failed or the response is not
+        valid JSON """
+
+        url = self._endpoints.readings(meter_id, start, end, resolution)
+        if not decode:
+            return self._get_content(url, timeout)
+        return self._get_json(url, timeout)
+
+    def iter_readings(self, meter_id, start, end, resolution, batch_size=None,
+                      chunk_size=STREAM_CHUNK_SIZE, timeout=None):
+        """ Stream the measurements for the specified meter in the specified
+        time interval without holding the whole response in memory.
+        :param str meter_id: identifier of the meter to get readings for
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp
+        :param str resolution: time distance between returned readings, see
+        get_readings()
+        :param int batch_size: yield lists of up to batch_size measurements
+        instead of single measurements
+        :param int chunk_size: number of bytes read from the response at once
+        :param timeout: timeout in seconds, None for the default timeout
+        :return: generator of measurements in the format of get_readings()
+        :raises ValueError: if the request failed or the response is not a
+        valid JSON array """
+
+        url = self._endpoints.readings(meter_id, start, end, resolution)
+        timeout = timeout if timeout is not None else self._timeout
+        with self._metrics.measure(self._endpoints.path(url), url) as measurement:
+            session = self._discovergy_oauth
+            response = self._send(session, url, timeout, measurement, stream=True)
+            if response.status_code == 401 and self._reauthenticate(session):
+                response.close()
+                response = self._send(self._discovergy_oauth, url, timeout, measurement,
+                                      stream=True)
+            measurement.response(response, count_bytes=False)
+            if not response.status_code == 200:
+                logger.error(response.text)
+                response.close()
+                raise ValueError("Request failed with status code %s" % response.status_code)
+            yield from self._iter_response(response, measurement, batch_size, chunk_size)
+
+    @staticmethod
+    def _iter_response(response, measurement, batch_size, chunk_size):
+        """ Parse a streamed readings response, see iter_readings(). """
+
+        def chunks():
+            for chunk in response.iter_content(chunk_size):
+                measurement.add_bytes(len(chunk))
+                yield chunk
+
+        try:
+            readings = iter_json_array(chunks())
+            if batch_size is None:
+                yield from readings
+                return
+
+            batch = []
+            for reading in readings:
+                batch.append(reading)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        except ValueError:
+            logger.error("Failed to parse readings response with status code %s",
+                         response.status_code)
+            raise
+
+        finally:
+            response.close()
+
+    def get_readings_columnar(self, meter_id, start, end, resolution, fieldnames=None):
+        """ Return the measurements for the specified meter in the specified
+        time interval as compact columns, streamed from the response without
+        building a dict per measurement.
+        :param str meter_id: identifier of the meter to get readings for
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp
+        :param str resolution: time distance between returned readings, see
+        get_readings()
+        :param fieldnames: names of the fields to keep, None for the field
+        names of the meter from get_fieldnames_for_meter()
+        :return: 'time' as unix milliseconds timestamps and one array per
+        field in the units of get_readings()
+        :rtype: ColumnarReadings """
+
+        if fieldnames is None:
+            fieldnames = self.get_fieldnames_for_meter(meter_id)
+
+        columns = ColumnarReadings(fieldnames)
+        try:
+            for reading in self.iter_readings(meter_id, start, end, resolution):
+                columns.append(reading)
+
+        except ValueError:
+            return ColumnarReadings(fieldnames)
+
+        return columns
+
+    def get_readings_range(self, meter_id, start, end, resolution, max_workers=4,
+                           timeout=None):
+        """ Return the measurements for the specified meter in the specified
+        time interval, split into windows the API accepts for the resolution
+        and fetched concurrently.
+        :param str meter_id: identifier of the meter to get readings for
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp, None
+        for now
+        :param str resolution: time distance between returned readings, see
+        get_readings()
+        :param int max_workers: maximum number of concurrent requests
+        :param timeout: timeout in seconds, None for the default timeout
+        :return: measurements ordered by 'time', same format as get_readings()
+        :rtype: list """
+
+        if end is None:
+            end = round(time.time() * 1e3)
+        windows = split_interval(start, end, RESOLUTION_WINDOWS[resolution])
+        if len(windows) <= 1:
+            return self.get_readings(meter_id, start, end, resolution, timeout)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                chunks = list(executor.map(in_caller_context(
+                    lambda window: self.fetch_readings(meter_id, window[0],
+                                                       window[1], resolution, timeout)),
+                    windows))
 
         except ValueError:
-            logger.error(response.text)
             return []
 
-    def get_activities(self, meter_id, start, end):
+        return merge_readings(chunks)
+
+    def get_readings_resampled(self, meter_id, start, end, bucket, max_workers=4):
+        """ Return the measurements for the specified meter in the specified
+        time interval aggregated into buckets of arbitrary length, fetched in
+        the coarsest resolution that exactly produces the buckets.
+        :param str meter_id: identifier of the meter to get readings for
+        :param int start: start of interval as unix milliseconds timestamp,
+        rounded down to a multiple of bucket
+        :param int end: end of interval as unix milliseconds timestamp, None
+        for now, buckets ending after it are left out
+        :param int bucket: bucket length in milliseconds
+        :param int max_workers: maximum number of concurrent requests
+        :return: 'energy'/'energyOut' in mWh consumed per bucket, 'power'
+        fields as time-weighted average in mW, see resample.resample()
+        :rtype: ColumnarReadings """
+
+        if end is None:
+            end = round(time.time() * 1e3)
+        resolution = best_resolution(bucket)
+        # The reading after end closes the last bucket
+        readings = self.get_readings_range(meter_id, start - start % bucket,
+                                           end + resolution_step(resolution), resolution,
+                                           max_workers)
+        return resample(readings, bucket, end=end)
+
+    def get_activities(self, meter_id, start, end, timeout=None):
         """ Returns the activities recognised for the given meter during the
         given interval.
         :param str meter_id: identifier of the meter to get readings for
         :param int start: start of interval as unix milliseconds timestamp
         :param int end: end of interval as unix milliseconds timestamp
+        :param timeout: timeout in seconds, None for the default timeout
         :return: each activity with 'startTime' in unix milliseconds timestamp,
         'endTime' as unix milliseconds timestamp, 'deviceName' as str, 'id' as str
         :rtype: list """
 
         try:
-            response = self._discovergy_oauth.get(self._base_url +
-                                                  "/readings?meterId=" +
-                                                  meter_id + "&from=" +
-                                                  str(start) +
-                                                  "&to=" + str(end))
-            activities = json.loads(response.content.decode("utf-8"))
-            return activities
+            return self._fetch_activities(meter_id, start, end, timeout)
 
         except ValueError:
-            logger.error(response.text)
             return []
+
+    def _fetch_activities(self, meter_id, start, end, timeout=None):
+        """ Like get_activities(), but raises on failure.
+        :raises ValueError: if the request failed """
+
+        return self._get_json(self._endpoints.activities(meter_id, start, end), timeout)
+
+    def get_activity_index(self, meter_id, start, end, timeout=None):
+        """ Return the activities recognised for the given meter during the
+        given interval as an interval index, to look up the devices active at
+        a time or during a window without scanning all activities.
+        :param str meter_id: identifier of the meter to get readings for
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp
+        :param timeout: timeout in seconds, None for the default timeout
+        :return: index of the activities, empty if the request failed
+        :rtype: ActivityIndex """
+
+        return ActivityIndex(self.get_activities(meter_id, start, end, timeout))
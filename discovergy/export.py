@@ -0,0 +1,206 @@
+import csv
+import functools
+import importlib.util
+import logging
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .columnar import ColumnarReadings
+from .discovergy import DAY, RESOLUTION_WINDOWS, exception_template
+from .ratelimit import in_caller_context
+
+
+logger = logging.getLogger(__name__)
+FORMATS = ('parquet', 'csv')
+
+
+def default_format():
+    """ Return 'parquet' if pyarrow is installed, 'csv' otherwise.
+    :rtype: str """
+
+    if importlib.util.find_spec('pyarrow') is None:
+        return 'csv'
+    return 'parquet'
+
+
+def partition_path(directory, meter_id, day, file_format):
+    """ Return the file of the readings of a meter on a UTC day, in a Hive
+    style layout:
+    directory/meter_id=<id>/date=<YYYY-MM-DD>/readings.<file_format>
+    :param int day: unix milliseconds timestamp of midnight UTC
+    :rtype: str """
+
+    date = time.strftime('%Y-%m-%d', time.gmtime(day // 1000))
+    return os.path.join(directory, 'meter_id=' + meter_id, 'date=' + date,
+                        'readings.' + file_format)
+
+
+def write_csv(columns, path):
+    """ Write columns to a CSV file with a header row, missing values are
+    written as empty strings.
+    :param ColumnarReadings columns: readings to write
+    :param str path: destination file """
+
+    names = columns.fieldnames
+    values = [column if column.typecode == 'q' else
+              ['' if math.isnan(value) else value for value in column]
+              for column in columns.fields.values()]
+    with open(path, 'w', newline='', encoding='utf-8') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['time'] + names)
+        writer.writerows(zip(columns.time, *values))
+
+
+def write_parquet(columns, path):
+    """ Write columns to a Parquet file without copying the column buffers,
+    with 'time' as UTC millisecond timestamps.
+    :param ColumnarReadings columns: readings to write
+    :param str path: destination file """
+
+    import pyarrow
+    import pyarrow.parquet
+
+    def to_arrow(column, data_type):
+        return pyarrow.Array.from_buffers(data_type, len(column),
+                                          [None, pyarrow.py_buffer(column)])
+
+    arrays = [to_arrow(columns.time, pyarrow.timestamp('ms', tz='UTC'))]
+    arrays += [to_arrow(column, pyarrow.int64() if column.typecode == 'q' else pyarrow.float64())
+               for column in columns.fields.values()]
+    table = pyarrow.Table.from_arrays(arrays, names=['time'] + columns.fieldnames)
+    pyarrow.parquet.write_table(table, path)
+
+
+WRITERS = {'parquet': write_parquet, 'csv': write_csv}
+
+
+def _write_partition(columns, path, file_format):
+    """ Write a partition atomically, so that an existing file is always
+    complete. """
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = path + '.tmp'
+    try:
+        WRITERS[file_format](columns, temporary_path)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+        raise
+
+
+def export_readings(discovergy, meter_ids, start, end, resolution, directory,
+                    file_format=None, max_workers=4):
+    """ Export the readings of many meters into one file per meter and UTC
+    day, fetched in chunks the API accepts and streamed so that each worker
+    only holds one day of readings in memory. Only complete days are
+    exported: start is rounded up and end down to midnight UTC. Existing
+    partitions are skipped, so an interrupted export resumes where it
+    stopped when called again with the same arguments.
+    :param discovergy: logged in Discovergy or DiscovergyPool instance
+    :param meter_ids: identifiers of the meters to export
+    :param int start: start of interval as unix milliseconds timestamp
+    :param int end: end of interval as unix milliseconds timestamp
+    :param str resolution: time distance between readings, see
+    Discovergy.get_readings()
+    :param str directory: root directory of the partitions
+    :param str file_format: 'parquet' or 'csv', default_format() if None
+    :param int max_workers: maximum number of concurrent requests
+    :return: number of 'written' and 'skipped' partitions and the 'failed'
+    (meter_id, day) pairs with day as unix milliseconds timestamp
+    :rtype: dict """
+
+    if file_format is None:
+        file_format = default_format()
+    if file_format not in FORMATS:
+        raise ValueError("Unknown export format %r" % file_format)
+
+    start = -(-start // DAY) * DAY
+    end = end // DAY * DAY
+    window = max(DAY, RESOLUTION_WINDOWS[resolution] // DAY * DAY)
+    result = {'written': 0, 'skipped': 0, 'failed': []}
+
+    tasks, result['skipped'] = _missing_runs(directory, meter_ids, range(start, end, DAY),
+                                             file_format, window)
+    export = functools.partial(_export_run, discovergy, resolution,
+                               functools.partial(_write_day, directory, file_format))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for written, failed in executor.map(in_caller_context(export), tasks):
+            result['written'] += written
+            result['failed'] += failed
+    return result
+
+
+def _missing_runs(directory, meter_ids, days, file_format, window):
+    """ Split the days without partition into runs of consecutive days of a
+    meter, each fetched with one request.
+    :param days: unix milliseconds timestamps of the days
+    :param int window: maximum length of a run in milliseconds
+    :return: list of (meter_id, days) runs and number of days with existing
+    partition
+    :rtype: tuple """
+
+    runs = []
+    skipped = 0
+    for meter_id in meter_ids:
+        run = []
+        for day in days:
+            if os.path.exists(partition_path(directory, meter_id, day, file_format)):
+                skipped += 1
+                if run:
+                    runs.append((meter_id, run))
+                    run = []
+                continue
+            run.append(day)
+            if len(run) * DAY == window:
+                runs.append((meter_id, run))
+                run = []
+        if run:
+            runs.append((meter_id, run))
+    return runs, skipped
+
+
+def _write_day(directory, file_format, columns, meter_id, day):
+    """ Write the partition of a meter and day. """
+
+    _write_partition(columns, partition_path(directory, meter_id, day, file_format),
+                     file_format)
+
+
+def _export_run(discovergy, resolution, write, run):
+    """ Stream the readings of a run of consecutive days and write one
+    partition per day as soon as it is complete.
+    :param write: callable(columns, meter_id, day) writing a partition
+    :param tuple run: meter_id and days as unix milliseconds timestamps
+    :return: number of written partitions and the failed (meter_id, day) pairs
+    :rtype: tuple """
+
+    meter_id, days = run
+    fieldnames = discovergy.get_fieldnames_for_meter(meter_id) or None
+    written = 0
+    try:
+        days_left = iter(days)
+        day = next(days_left)
+        columns = ColumnarReadings(fieldnames)
+        for reading in discovergy.iter_readings(meter_id, days[0], days[-1] + DAY, resolution):
+            if reading['time'] >= days[-1] + DAY:
+                break
+            while reading['time'] >= day + DAY:
+                write(columns, meter_id, day)
+                written += 1
+                day = next(days_left)
+                columns = ColumnarReadings(fieldnames or columns.fieldnames)
+            if reading['time'] >= day:
+                columns.append(reading)
+        for day in [day, *days_left]:
+            write(columns, meter_id, day)
+            written += 1
+            columns = ColumnarReadings(fieldnames or columns.fieldnames)
+
+    except Exception as e:
+        message = exception_template.format(type(e).__name__, e.args)
+        logger.error(message)
+        return written, [(meter_id, day) for day in days[written:]]
+
+    return written, []
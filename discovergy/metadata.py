@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+TTL = 60 * 60
+
+
+class MetadataCache:
+    """ In-memory cache with expiry for the almost static meter list and
+    field names, optionally persisted to a JSON file so that it survives
+    process restarts. """
+
+    def __init__(self, ttl=TTL, path=None):
+        """ Inititalize MetadataCache class.
+        :param float ttl: seconds after which cached values expire
+        :param str path: optional location of a JSON file to persist the
+        cache in
+        """
+
+        self._ttl = ttl
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        if path is not None:
+            try:
+                with open(path, encoding='utf-8') as cache_file:
+                    self._entries = {key: tuple(entry)
+                                     for key, entry in json.load(cache_file).items()}
+            except (OSError, ValueError):
+                pass
+
+    def get(self, key):
+        """ Return the cached value for key.
+        :param str key: cache key
+        :return: cached value, None if missing or expired """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.time():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        """ Cache value for key until the TTL expires.
+        :param str key: cache key
+        :param value: JSON serializable value """
+
+        self.set_many({key: value})
+
+    def set_many(self, values):
+        """ Cache several values at once, writing the file only once.
+        :param dict values: JSON serializable value per cache key """
+
+        expires = time.time() + self._ttl
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (expires, value)
+            self._save()
+
+    def delete(self, key):
+        """ Remove the value for key.
+        :param str key: cache key """
+
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+    def invalidate(self, prefix=''):
+        """ Remove all values whose key starts with prefix.
+        :param str prefix: key prefix, '' for all values """
+
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+            self._save()
+
+    def _save(self):
+        """ Write the cache to its file. Must be called with the lock held. """
+
+        if self._path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self._path))
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as cache_file:
+                json.dump(self._entries, cache_file)
+            os.replace(temporary_path, self._path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
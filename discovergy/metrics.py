@@ -0,0 +1,195 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from urllib.parse import urlsplit, parse_qs
+
+
+logger = logging.getLogger(__name__)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Measurement:
+    """ Measurement of a single request, see Metrics.measure(). """
+
+    def __init__(self, metrics, endpoint, url):
+        self._metrics = metrics
+        self._started = None
+        self.event = {'endpoint': endpoint,
+                      'url': url,
+                      'meter_id': parse_qs(urlsplit(url).query).get('meterId', [None])[0],
+                      'status': None,
+                      'duration': 0.0,
+                      'bytes': 0,
+                      'decode_time': 0.0,
+                      'retries': 0,
+                      'error': None}
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.event['duration'] = time.perf_counter() - self._started
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            self.event['error'] = exc_value
+        self._metrics.record(self.event)
+
+    def response(self, response, count_bytes=True):
+        """ Record status code, retries and, unless the body is streamed,
+        size of a response.
+        :param requests.Response response: the received response
+        :param bool count_bytes: count len(response.content) """
+
+        self.event['status'] = response.status_code
+        retries = getattr(getattr(response, 'raw', None), 'retries', None)
+        if retries is not None:
+            self.event['retries'] += len(retries.history)
+        if count_bytes:
+            self.event['bytes'] += len(response.content)
+
+    def retried(self):
+        """ Record a retry of the request by the client. """
+
+        self.event['retries'] += 1
+
+    def fail(self, error):
+        """ Record a failure that did not raise an exception.
+        :param error: description of the failure """
+
+        self.event['error'] = error
+
+    def add_bytes(self, count):
+        """ Record count bytes of a streamed response body. """
+
+        self.event['bytes'] += count
+
+    def decode(self, decoder, content):
+        """ Decode content with decoder and record the time it took.
+        :return: decoded content """
+
+        started = time.perf_counter()
+        try:
+            return decoder(content)
+        finally:
+            self.event['decode_time'] += time.perf_counter() - started
+
+
+class Metrics:
+    """ Thread-safe registry of per-endpoint request metrics of one or more
+    Discovergy instances, exportable as dict or Prometheus text format.
+    Callbacks added with add_hook() receive the event of every request. """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        """ Inititalize Metrics class.
+        :param buckets: upper bounds in seconds of the duration histograms
+        """
+
+        self._buckets = tuple(buckets)
+        self._endpoints = {}
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, callback):
+        """ Call callback(event) after every request. The event dict holds
+        'endpoint', 'url', 'meter_id', 'status', 'duration' and 'decode_time'
+        in seconds, 'bytes', 'retries' and the raised exception as 'error'.
+        :param callback: callable taking the event dict """
+
+        with self._lock:
+            self._hooks.append(callback)
+
+    def remove_hook(self, callback):
+        """ Stop calling callback after requests. """
+
+        with self._lock:
+            self._hooks.remove(callback)
+
+    def measure(self, endpoint, url):
+        """ Context manager measuring one request to endpoint.
+        :param str endpoint: path of the endpoint, e.g. '/readings'
+        :param str url: full request URL
+        :rtype: Measurement """
+
+        return Measurement(self, endpoint, url)
+
+    def record(self, event):
+        """ Add the event of a finished request to the metrics.
+        :param dict event: see add_hook() """
+
+        failed = event['error'] is not None or event['status'] not in (None, 200)
+        with self._lock:
+            stats = self._endpoints.get(event['endpoint'])
+            if stats is None:
+                stats = self._endpoints[event['endpoint']] = {
+                    'requests': 0, 'failures': 0, 'bytes': 0, 'retries': 0,
+                    'decode_seconds': 0.0, 'duration_seconds': 0.0,
+                    'duration_buckets': [0] * (len(self._buckets) + 1)}
+            stats['requests'] += 1
+            stats['failures'] += failed
+            stats['bytes'] += event['bytes']
+            stats['retries'] += event['retries']
+            stats['decode_seconds'] += event['decode_time']
+            stats['duration_seconds'] += event['duration']
+            stats['duration_buckets'][bisect_left(self._buckets, event['duration'])] += 1
+            hooks = list(self._hooks)
+
+        for hook in hooks:
+            try:
+                hook(event)
+            except Exception:
+                logger.exception("Metrics hook %r failed", hook)
+
+    def reset(self):
+        """ Forget all recorded metrics. """
+
+        with self._lock:
+            self._endpoints = {}
+
+    def to_dict(self):
+        """ Return the metrics per endpoint with cumulative duration
+        histogram counts per upper bound.
+        :rtype: dict """
+
+        with self._lock:
+            result = {}
+            for endpoint, stats in self._endpoints.items():
+                result[endpoint] = dict(stats)
+                counts = stats['duration_buckets']
+                result[endpoint]['duration_buckets'] = {
+                    bound: sum(counts[:i + 1]) for i, bound in enumerate(self._buckets)}
+            return result
+
+    def to_prometheus(self, prefix='discovergy'):
+        """ Return the metrics in the Prometheus text exposition format.
+        :param str prefix: prefix of the metric names
+        :rtype: str """
+
+        metrics = self.to_dict()
+        lines = []
+
+        def counter(name, key, help_text):
+            lines.append("# HELP %s_%s %s" % (prefix, name, help_text))
+            lines.append("# TYPE %s_%s counter" % (prefix, name))
+            for endpoint, stats in metrics.items():
+                lines.append('%s_%s{endpoint="%s"} %s' % (prefix, name, endpoint, stats[key]))
+
+        counter('requests_total', 'requests', "Requests sent to the API.")
+        counter('request_failures_total', 'failures', "Requests that failed.")
+        counter('response_bytes_total', 'bytes', "Bytes received in response bodies.")
+        counter('retries_total', 'retries', "Retries of failed requests.")
+        counter('json_decode_seconds_total', 'decode_seconds', "Time spent decoding JSON.")
+
+        name = prefix + '_request_duration_seconds'
+        lines.append("# HELP %s Duration of requests to the API." % name)
+        lines.append("# TYPE %s histogram" % name)
+        for endpoint, stats in metrics.items():
+            for bound, count in stats['duration_buckets'].items():
+                lines.append('%s_bucket{endpoint="%s",le="%s"} %d' % (name, endpoint, bound,
+                                                                      count))
+            lines.append('%s_bucket{endpoint="%s",le="+Inf"} %d' % (name, endpoint,
+                                                                    stats['requests']))
+            lines.append('%s_sum{endpoint="%s"} %s' % (name, endpoint,
+                                                       stats['duration_seconds']))
+            lines.append('%s_count{endpoint="%s"} %d' % (name, endpoint, stats['requests']))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,201 @@
+import sys
+import threading
+
+
+class Schema:
+    """ Interned, ordered field names shared by all readings of a meter, so
+    that a reading only stores its values. Use Schema.get() to obtain the
+    instance for a set of field names, whatever their order. """
+
+    __slots__ = ('names', 'index')
+    _registry = {}
+    _lock = threading.Lock()
+
+    def __init__(self, names):
+        self.names = tuple(sys.intern(name) for name in names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def get(cls, names):
+        """ Return the shared schema for the field names. Values are looked up
+        by name through Schema.index, so the storage order is the order of
+        the first call for a set of names.
+        :param names: field names
+        :rtype: Schema """
+
+        names = tuple(names)
+        key = frozenset(names)
+        schema = cls._registry.get(key)
+        if schema is None:
+            with cls._lock:
+                schema = cls._registry.setdefault(key, cls(names))
+        return schema
+
+    def __repr__(self):
+        return "Schema(%r)" % (self.names,)
+
+
+class Reading:
+    """ Compact measurement with 'time' as unix milliseconds timestamp and
+    the values of its schema's fields, accessible as attributes, e.g.
+    reading.power in mW. """
+
+    __slots__ = ('time', 'schema', '_values')
+
+    def __init__(self, time, schema, values):
+        """ Inititalize Reading class.
+        :param int time: unix milliseconds timestamp
+        :param Schema schema: field names of values
+        :param tuple values: values in the order of schema.names
+        """
+
+        self.time = time
+        self.schema = schema
+        self._values = values
+
+    @classmethod
+    def from_dict(cls, reading, schema=None):
+        """ Build a reading from a measurement in the format of
+        Discovergy.get_readings().
+        :param dict reading: measurement with 'time' and 'values'
+        :param Schema schema: schema to store the values in, e.g. of a
+        previous reading of the meter, None to derive it from the values
+        :rtype: Reading """
+
+        values = reading['values']
+        if schema is None or len(schema.names) != len(values) or \
+                any(name not in schema.index for name in values):
+            schema = Schema.get(values)
+        return cls(reading['time'], schema, tuple(values[name] for name in schema.names))
+
+    @classmethod
+    def from_dicts(cls, readings):
+        """ Build readings sharing one schema per set of field names.
+        :param readings: measurements in the format of
+        Discovergy.get_readings()
+        :rtype: list """
+
+        result = []
+        schema = None
+        for reading in readings:
+            model = cls.from_dict(reading, schema)
+            schema = model.schema
+            result.append(model)
+        return result
+
+    def __getattr__(self, name):
+        if name in Reading.__slots__:
+            raise AttributeError(name)
+        try:
+            return self._values[self.schema.index[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def get(self, name, default=None):
+        """ Return the value of a field, default if the reading lacks it. """
+
+        index = self.schema.index.get(name)
+        return default if index is None else self._values[index]
+
+    @property
+    def values(self):
+        """ Values by field name.
+        :rtype: dict """
+
+        return dict(zip(self.schema.names, self._values))
+
+    def to_dict(self):
+        """ Convert to the format of Discovergy.get_readings().
+        :rtype: dict """
+
+        return {'time': self.time, 'values': self.values}
+
+    def __eq__(self, other):
+        if not isinstance(other, Reading):
+            return NotImplemented
+        return self.time == other.time and self.values == other.values
+
+    def __repr__(self):
+        return "Reading(time=%r, values=%r)" % (self.time, self.values)
+
+
+class _Model:
+    """ Base class of models mapping API keys to snake case attributes
+    listed in _fields as (attribute, key) pairs, with the attributes
+    declared in __slots__. """
+
+    __slots__ = ()
+    _fields = ()
+
+    def __init__(self, **kwargs):
+        for attribute, _ in self._fields:
+            setattr(self, attribute, kwargs.get(attribute))
+
+    @classmethod
+    def from_dict(cls, data):
+        """ Build a model from a dict returned by the API.
+        :rtype: _Model """
+
+        model = cls.__new__(cls)
+        for attribute, key in cls._fields:
+            setattr(model, attribute, data.get(key))
+        return model
+
+    def to_dict(self):
+        """ Convert to the format returned by the API.
+        :rtype: dict """
+
+        return {key: getattr(self, attribute) for attribute, key in self._fields}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, ", ".join(
+            "%s=%r" % (attribute, getattr(self, attribute)) for attribute, _ in self._fields))
+
+
+class Location(_Model):
+    """ Address of a meter. """
+
+    __slots__ = ('street', 'street_number', 'zip', 'city', 'country')
+    _fields = tuple(zip(__slots__, ('street', 'streetNumber', 'zip', 'city', 'country')))
+
+
+class Meter(_Model):
+    """ Meter of a client account as returned by Discovergy.get_meters(). """
+
+    __slots__ = ('meter_id', 'manufacturer_id', 'serial_number', 'full_serial_number',
+                 'location', 'administration_number', 'type', 'measurement_type',
+                 'load_profile_type', 'scaling_factor', 'current_scaling_factor',
+                 'voltage_scaling_factor', 'internal_meters', 'first_measurement_time',
+                 'last_measurement_time')
+    _fields = tuple(zip(__slots__, (
+        'meterId', 'manufacturerId', 'serialNumber', 'fullSerialNumber', 'location',
+        'administrationNumber', 'type', 'measurementType', 'loadProfileType', 'scalingFactor',
+        'currentScalingFactor', 'voltageScalingFactor', 'internalMeters',
+        'firstMeasurementTime', 'lastMeasurementTime')))
+    location: 'Location'
+
+    @classmethod
+    def from_dict(cls, data):
+        meter = super().from_dict(data)
+        if meter.location is not None:
+            meter.location = Location.from_dict(meter.location)
+        return meter
+
+    def to_dict(self):
+        data = super().to_dict()
+        if self.location is not None:
+            data['location'] = self.location.to_dict()
+        return data
+
+
+class Activity(_Model):
+    """ Activity of a device as returned by Discovergy.get_activities(),
+    with unix milliseconds timestamps. """
+
+    __slots__ = ('start_time', 'end_time', 'device_name', 'id')
+    _fields = tuple(zip(__slots__, ('startTime', 'endTime', 'deviceName', 'id')))
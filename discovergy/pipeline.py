@@ -0,0 +1,132 @@
+import logging
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .columnar import ColumnarReadings
+from .decoders import get_decoder
+from .discovergy import RESOLUTION_WINDOWS, exception_template
+from .ratelimit import in_caller_context
+from .readings import split_interval
+
+
+logger = logging.getLogger(__name__)
+# State of a worker process, set up by _initialize_worker()
+_worker = {}
+
+
+def _initialize_worker():
+    """ Choose the JSON decoder once per worker process. """
+
+    _worker['decoder'] = get_decoder()
+
+
+def _process(function, meter_id, content):
+    """ Decode a readings response into columns and pass them to function.
+    Runs in a worker process. """
+
+    return function(meter_id, ColumnarReadings.from_readings(_worker['decoder'](content)))
+
+
+class Pipeline:
+    """ Fetch readings of many meters with threads and decode and process
+    them in a process pool, so that CPU-bound work is not limited to one core
+    by the GIL. Responses are handed to the workers as undecoded JSON bytes
+    and decoded there straight into ColumnarReadings, whose typed arrays also
+    keep the results compact when they are sent back. At most max_pending
+    responses are fetched but not yet processed and consumed, so fetching
+    cannot outrun processing. """
+
+    def __init__(self, discovergy, function, max_workers=10, processes=None, max_pending=None):
+        """ Inititalize Pipeline class.
+        :param discovergy: logged in Discovergy or DiscovergyPool instance
+        :param function: picklable callable(meter_id, columns) taking
+        ColumnarReadings, e.g. a module level function calling
+        resample.resample() or analytics.consumption()
+        :param int max_workers: maximum number of concurrent requests
+        :param int processes: number of worker processes, os.cpu_count() if
+        None
+        :param int max_pending: maximum number of responses held between the
+        stages, twice the number of processes if None
+        """
+
+        self._discovergy = discovergy
+        self._function = function
+        self._max_workers = max_workers
+        self._processes = processes or os.cpu_count() or 1
+        self._max_pending = max_pending or 2 * self._processes
+        self.errors = {}
+
+    def run(self, meter_ids, start, end, resolution):
+        """ Process the readings of the meters in windows the API accepts for
+        the resolution. Failed windows are logged and their exception is
+        stored in errors under (meter_id, start).
+        :param meter_ids: identifiers of the meters
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp
+        :param str resolution: time distance between readings, see
+        Discovergy.get_readings()
+        :return: generator of (meter_id, start, end, result) per window in
+        order of completion """
+
+        windows = [(meter_id, window_start, window_end) for meter_id in meter_ids
+                   for window_start, window_end in
+                   split_interval(start, end, RESOLUTION_WINDOWS[resolution])]
+        self.errors = {}
+        yield from self._run(windows, resolution)
+
+    def _run(self, windows, resolution):
+        """ Fetch the windows in threads and process them in worker processes.
+        A window is only fetched once the result of an earlier one was taken,
+        so at most max_pending responses are held between the stages. """
+
+        results = queue.Queue()
+        pending = iter(windows)
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as threads, \
+                ProcessPoolExecutor(max_workers=self._processes,
+                                    initializer=_initialize_worker) as workers:
+
+            def fetch(window):
+                meter_id, window_start, window_end = window
+                try:
+                    content = self._discovergy.fetch_readings(meter_id, window_start, window_end,
+                                                              resolution, decode=False)
+                    future = workers.submit(_process, self._function, meter_id, content)
+                except Exception as e:
+                    results.put((window, None, e))
+                    return
+                future.add_done_callback(lambda future: results.put((window, future, None)))
+
+            fetch = in_caller_context(fetch)
+
+            def advance():
+                window = next(pending, None)
+                if window is not None:
+                    threads.submit(fetch, window)
+
+            try:
+                for _ in range(self._max_pending):
+                    advance()
+                yield from self._collect(len(windows), results, advance)
+
+            finally:
+                threads.shutdown(wait=True, cancel_futures=True)
+                workers.shutdown(wait=True, cancel_futures=True)
+
+    def _collect(self, count, results, advance):
+        """ Yield the results of count windows in order of completion, record
+        the failed ones in errors and call advance() to fetch the next window
+        for every result taken. """
+
+        for _ in range(count):
+            window, future, error = results.get()
+            advance()
+            if error is None:
+                error = future.exception()
+            if error is not None:
+                message = exception_template.format(type(error).__name__, error.args)
+                logger.error("Failed to process meter %s from %s: %s", window[0],
+                             window[1], message)
+                self.errors[window[:2]] = error
+                continue
+            yield window + (future.result(),)
@@ -0,0 +1,268 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .discovergy import TIMEOUT, Discovergy, LastReadings, exception_template
+from .metrics import Metrics
+from .pipeline import Pipeline
+from .ratelimit import in_caller_context
+from .subscription import LiveSubscription
+from .transport import Transport
+
+
+logger = logging.getLogger(__name__)
+
+
+class DiscovergyPool:
+    """ Many client accounts in one process. All accounts share one
+    connection pool, rate limiter, metrics registry and token store, and
+    requests for a meter are routed to the account owning it. """
+
+    def __init__(self, client_name, accounts, token_store=None, transport=None, timeout=TIMEOUT,
+                 metrics=None, rate_limiter=None, metadata_cache=None, **kwargs):
+        """ Inititalize DiscovergyPool class.
+        :param client_name: client name for OAuth process
+        :param accounts: (email, password) pairs of the client accounts
+        :param token_store: optional store to reuse OAuth tokens across
+        logins, shared by all accounts
+        :param transport: connection pool for all accounts, a new Transport if
+        None
+        :param timeout: default timeout of requests in seconds
+        :param metrics: registry recording the requests of all accounts, a new
+        Metrics if None
+        :param rate_limiter: optional RateLimiter shared by all accounts
+        :param metadata_cache: optional MetadataCache shared by all accounts
+        :param kwargs: further arguments of Discovergy, e.g. base_url
+        """
+
+        self._transport = transport if transport is not None else Transport()
+        self._metrics = metrics if metrics is not None else Metrics()
+        self._passwords = dict(accounts)
+        self._clients = {email: Discovergy(client_name, token_store=token_store,
+                                           transport=self._transport, timeout=timeout,
+                                           metrics=self._metrics, rate_limiter=rate_limiter,
+                                           metadata_cache=metadata_cache, **kwargs)
+                         for email in self._passwords}
+        self._logged_in = []
+        self._routes = {}
+        self._meters = {}
+
+    @property
+    def metrics(self):
+        """ Registry of the request metrics of all accounts.
+        :rtype: Metrics """
+
+        return self._metrics
+
+    @property
+    def clients(self):
+        """ Discovergy instance per account email.
+        :rtype: dict """
+
+        return dict(self._clients)
+
+    @property
+    def meter_ids(self):
+        """ Identifiers of the meters of all logged in accounts.
+        :rtype: list """
+
+        return list(self._routes)
+
+    def login(self, max_workers=10):
+        """ Log in all accounts concurrently and discover their meters.
+        Accounts that fail to log in are logged and own no meters.
+        :param int max_workers: maximum number of concurrent logins
+        :return: True if all accounts logged in, False otherwise
+        :rtype: bool """
+
+        def login(email):
+            try:
+                return email, self._clients[email].login(email, self._passwords[email])
+            except Exception as e:
+                message = exception_template.format(type(e).__name__, e.args)
+                logger.error(message)
+                return email, False
+
+        self._ensure_pool_size(max_workers)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(executor.map(in_caller_context(login), self._clients))
+        for email, success in results.items():
+            if not success:
+                logger.error("Failed to login account %s.", email)
+
+        self._logged_in = [email for email in self._clients if results[email]]
+        self._discover_meters(max_workers)
+        return all(results.values())
+
+    def refresh_meters(self, max_workers=10):
+        """ Discover the meters of the logged in accounts again, e.g. after
+        meters were added. A meter visible to several accounts is routed to
+        the first of them.
+        :param int max_workers: maximum number of concurrent requests """
+
+        for email in self._logged_in:
+            self._clients[email].invalidate_metadata()
+        self._discover_meters(max_workers)
+
+    def _discover_meters(self, max_workers):
+        """ Route the meters of the logged in accounts, using cached meter
+        lists if available. """
+
+        def fetch(email):
+            return email, self._clients[email].get_meters()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetched = dict(executor.map(in_caller_context(fetch), self._logged_in))
+
+        routes = {}
+        meters = {}
+        for email in self._clients:
+            for meter in fetched.get(email, []):
+                if meter['meterId'] not in routes:
+                    routes[meter['meterId']] = email
+                    meters[meter['meterId']] = meter
+        self._routes = routes
+        self._meters = meters
+
+    def account(self, meter_id):
+        """ Return the instance of the account owning a meter.
+        :param str meter_id: identifier of the meter
+        :rtype: Discovergy
+        :raises KeyError: if no logged in account owns the meter """
+
+        return self._clients[self._routes[meter_id]]
+
+    def _ensure_pool_size(self, size):
+        """ Grow the connection pool shared by all accounts. """
+
+        if size > self._transport.pool_maxsize:
+            self._transport.resize(size)
+
+    def get_meters(self):
+        """ Return the meters of all logged in accounts.
+        :rtype: list """
+
+        return list(self._meters.values())
+
+    def get_fieldnames_for_meter(self, meter_id, timeout=None):
+        """ See Discovergy.get_fieldnames_for_meter(). """
+
+        return self.account(meter_id).get_fieldnames_for_meter(meter_id, timeout)
+
+    def get_last_reading(self, meter_id, timeout=None):
+        """ See Discovergy.get_last_reading(). """
+
+        return self.account(meter_id).get_last_reading(meter_id, timeout)
+
+    def get_readings(self, meter_id, start, end, resolution, timeout=None):
+        """ See Discovergy.get_readings(). """
+
+        return self.account(meter_id).get_readings(meter_id, start, end, resolution, timeout)
+
+    def fetch_readings(self, meter_id, start, end, resolution, timeout=None, decode=True):
+        """ See Discovergy.fetch_readings(). """
+
+        return self.account(meter_id).fetch_readings(meter_id, start, end, resolution, timeout,
+                                                     decode)
+
+    def get_readings_range(self, meter_id, start, end, resolution, max_workers=4,
+                           timeout=None):
+        """ See Discovergy.get_readings_range(). """
+
+        return self.account(meter_id).get_readings_range(meter_id, start, end, resolution,
+                                                         max_workers, timeout)
+
+    def iter_readings(self, meter_id, start, end, resolution, **kwargs):
+        """ See Discovergy.iter_readings(). """
+
+        return self.account(meter_id).iter_readings(meter_id, start, end, resolution, **kwargs)
+
+    def get_disaggregation(self, meter_id, start, end, timeout=None):
+        """ See Discovergy.get_disaggregation(). """
+
+        return self.account(meter_id).get_disaggregation(meter_id, start, end, timeout)
+
+    def get_disaggregation_matrix(self, meter_id, start, end, max_workers=4, timeout=None):
+        """ See Discovergy.get_disaggregation_matrix(). """
+
+        return self.account(meter_id).get_disaggregation_matrix(meter_id, start, end,
+                                                                max_workers, timeout)
+
+    def get_activities(self, meter_id, start, end, timeout=None):
+        """ See Discovergy.get_activities(). """
+
+        return self.account(meter_id).get_activities(meter_id, start, end, timeout)
+
+    def get_activity_index(self, meter_id, start, end, timeout=None):
+        """ See Discovergy.get_activity_index(). """
+
+        return self.account(meter_id).get_activity_index(meter_id, start, end, timeout)
+
+    def get_last_readings(self, meter_ids=None, max_workers=10, timeout=None):
+        """ Return the last measurement of many meters of any accounts,
+        fetched concurrently from one thread pool.
+        :param meter_ids: identifiers of the meters, None for all meters
+        :param int max_workers: maximum number of concurrent requests
+        :param timeout: timeout in seconds, None for the default timeout
+        :return: see Discovergy.get_last_readings(), meters no account owns
+        fail with KeyError
+        :rtype: LastReadings """
+
+        meter_ids = self.meter_ids if meter_ids is None else list(meter_ids)
+        self._ensure_pool_size(max_workers)
+        result = LastReadings()
+        started = time.monotonic()
+
+        def fetch(meter_id):
+            try:
+                return meter_id, self.account(meter_id)._fetch_last_reading(meter_id,
+                                                                            timeout), None
+            except Exception as e:
+                return meter_id, None, e
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for meter_id, reading, error in executor.map(in_caller_context(fetch), meter_ids):
+                if error is None:
+                    result[meter_id] = reading
+                else:
+                    result.errors[meter_id] = error
+
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def subscribe(self, callback=None, meter_ids=None, **kwargs):
+        """ Poll the last readings of the meters of all accounts from one
+        scheduler, see LiveSubscription.
+        :param callback: see LiveSubscription
+        :param meter_ids: identifiers of the meters, None for all meters
+        :param kwargs: further arguments of LiveSubscription
+        :rtype: LiveSubscription """
+
+        return LiveSubscription(self, self.meter_ids if meter_ids is None else meter_ids,
+                                callback, **kwargs)
+
+    def map_readings(self, function, start, end, resolution, meter_ids=None, max_workers=10,
+                     processes=None, max_pending=None):
+        """ Fetch the readings of many meters concurrently and post-process
+        them in a process pool with bounded pending work, see
+        pipeline.Pipeline. Requests stay in this process to share the
+        connection pool and rate limiter.
+        :param function: picklable callable(meter_id, columns) taking the
+        ColumnarReadings of one window, e.g. a module level function, whose
+        return value is yielded
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp
+        :param str resolution: see Discovergy.get_readings()
+        :param meter_ids: identifiers of the meters, None for all meters
+        :param int max_workers: maximum number of concurrent requests
+        :param int processes: number of worker processes, os.cpu_count() if
+        None
+        :param int max_pending: maximum number of responses held between
+        fetching and processing, see Pipeline
+        :return: generator of (meter_id, start, end, result) per window in
+        order of completion, windows that could not be fetched or processed
+        are logged and skipped """
+
+        meter_ids = self.meter_ids if meter_ids is None else list(meter_ids)
+        self._ensure_pool_size(max_workers)
+        pipeline = Pipeline(self, function, max_workers, processes, max_pending)
+        return pipeline.run(meter_ids, start, end, resolution)
@@ -0,0 +1,131 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+
+LIVE = 0
+BACKFILL = 10
+
+
+def in_caller_context(function):
+    """ Wrap function to run in a copy of the context of the caller, e.g. as
+    the task of a ThreadPoolExecutor. Worker threads otherwise do not see
+    the priority set with RateLimiter.priority().
+    :rtype: callable """
+
+    context = contextvars.copy_context()
+    return lambda *args: context.copy().run(function, *args)
+
+
+class RateLimiter:
+    """ Thread-safe token bucket shared by all requests of one or more
+    Discovergy instances. The rate adapts to throttling: it is halved on every
+    429 response and recovers additively on successful requests. Waiting
+    requests of a lower priority number are served first, so live polling
+    can overtake background backfill jobs. """
+
+    def __init__(self, rate, burst=None, min_rate=None):
+        """ Inititalize RateLimiter class.
+        :param float rate: maximum number of requests per second
+        :param int burst: number of requests that may be sent at once after
+        idling, rate if None
+        :param float min_rate: lowest rate after throttling, rate / 16 if None
+        """
+
+        self.max_rate = rate
+        self.rate = rate
+        self._min_rate = min_rate if min_rate is not None else rate / 16
+        self._capacity = burst if burst is not None else max(1, rate)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = {}
+        self._condition = threading.Condition()
+        self._priority = contextvars.ContextVar('priority', default=LIVE)
+
+    @contextmanager
+    def priority(self, priority):
+        """ Context manager setting the priority of requests acquired in
+        the current context, e.g. with limiter.priority(BACKFILL). The
+        package's own thread pools pass it on to their workers.
+        :param int priority: lower numbers are served first """
+
+        token = self._priority.set(priority)
+        try:
+            yield
+        finally:
+            self._priority.reset(token)
+
+    def current_priority(self):
+        """ Return the priority of requests acquired in the current context.
+        :rtype: int """
+
+        return self._priority.get()
+
+    def _refill(self, now):
+        self._tokens = min(self._capacity,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority=None, timeout=None):
+        """ Wait until a request may be sent.
+        :param int priority: lower numbers are served first, the priority of
+        the current context if None
+        :param float timeout: maximum seconds to wait, None to wait forever
+        :return: True if the request may be sent, False on timeout
+        :rtype: bool """
+
+        if priority is None:
+            priority = self._priority.get()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            self._waiting[priority] = self._waiting.get(priority, 0) + 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    preferred = any(count for waiting_priority, count in self._waiting.items()
+                                    if waiting_priority < priority)
+                    if now >= self._paused_until and self._tokens >= 1 and not preferred:
+                        self._tokens -= 1
+                        return True
+
+                    if now < self._paused_until:
+                        wait = self._paused_until - now
+                    elif self._tokens < 1:
+                        wait = (1 - self._tokens) / self.rate
+                    else:
+                        wait = None
+                    if deadline is not None:
+                        if now >= deadline:
+                            return False
+                        wait = deadline - now if wait is None else min(wait, deadline - now)
+                    self._condition.wait(wait)
+            finally:
+                self._waiting[priority] -= 1
+                if not self._waiting[priority]:
+                    del self._waiting[priority]
+                self._condition.notify_all()
+
+    def throttled(self, retry_after):
+        """ Pause all requests for retry_after seconds and halve the rate
+        after the API answered with 429 Too Many Requests.
+        :param float retry_after: seconds to pause """
+
+        with self._condition:
+            now = time.monotonic()
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + retry_after)
+            self._tokens = min(self._tokens, 0)
+            self.rate = max(self._min_rate, self.rate / 2)
+            self._condition.notify_all()
+
+    def succeeded(self):
+        """ Recover the rate after a request that was not throttled. """
+
+        with self._condition:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
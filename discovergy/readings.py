@@ -0,0 +1,95 @@
+import codecs
+import json
+import re
+
+
+def split_interval(start, end, window):
+    """ Split the interval [start, end) into consecutive windows.
+    :param int start: start of interval as unix milliseconds timestamp
+    :param int end: end of interval as unix milliseconds timestamp
+    :param int window: maximum window length in milliseconds
+    :return: (start, end) pairs covering the interval
+    :rtype: list """
+
+    windows = []
+    while start < end:
+        windows.append((start, min(start + window, end)))
+        start += window
+    return windows
+
+
+def merge_readings(chunks):
+    """ Stitch chunks of readings into one time-ordered series without
+    duplicates. Later chunks win for readings with the same timestamp.
+    :param chunks: iterable of lists of readings
+    :return: readings ordered by 'time'
+    :rtype: list """
+
+    merged = {}
+    for chunk in chunks:
+        for reading in chunk:
+            merged[reading['time']] = reading
+    return [merged[key] for key in sorted(merged)]
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _decode_chunks(chunks):
+    """ Decode UTF-8 byte chunks that may split characters.
+    :return: generator of (text, final) with final True for the last text """
+
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in chunks:
+        yield text_decoder.decode(chunk), False
+    yield text_decoder.decode(b'', final=True), True
+
+
+def iter_json_array(chunks):
+    """ Incrementally parse a JSON array from byte chunks, keeping only the
+    element currently being parsed in memory.
+    :param chunks: iterable of bytes, e.g. response.iter_content()
+    :return: generator yielding the array elements one at a time
+    :raises ValueError: if the chunks do not form a JSON array """
+
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+
+    for text, final in _decode_chunks(chunks):
+        buffer = buffer[position:] + text
+        position = 0
+
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError("Expected JSON array")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            if buffer[position] == ',':
+                position += 1
+                continue
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if final:
+                    raise
+                break
+            # Numbers are only complete once the following delimiter arrived,
+            # e.g. "-0" may still continue as "-0.5" in the next chunk
+            end = _WHITESPACE.match(buffer, end).end()
+            if end == len(buffer) or buffer[end] not in ',]':
+                if final:
+                    raise ValueError("Expected ',' or ']' in JSON array")
+                break
+            position = end
+            yield element
+
+    raise ValueError("Unexpected end of JSON array")
@@ -0,0 +1,143 @@
+import math
+import operator
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, compress, repeat
+from .columnar import ColumnarReadings
+
+
+MINUTE = 60 * 1000
+# Fixed-length server resolutions that can be summed up into larger buckets,
+# coarsest first. 'one_week', 'one_month' and 'one_year' are not aligned to
+# multiples of their length since the epoch.
+RESOLUTION_STEPS = [('one_day', 24 * 60 * MINUTE),
+                    ('one_hour', 60 * MINUTE),
+                    ('fifteen_minutes', 15 * MINUTE),
+                    ('three_minutes', 3 * MINUTE)]
+# Longest expected time between raw readings
+RAW_STEP = MINUTE
+
+
+def best_resolution(bucket):
+    """ Return the coarsest server resolution whose readings exactly
+    produce buckets of the given length.
+    :param int bucket: bucket length in milliseconds
+    :return: resolution for Discovergy.get_readings()
+    :rtype: str """
+
+    for resolution, step in RESOLUTION_STEPS:
+        if bucket % step == 0:
+            return resolution
+    return 'raw'
+
+
+def resolution_step(resolution):
+    """ Return the time between readings of a server resolution returned
+    by best_resolution().
+    :return: milliseconds, RAW_STEP for 'raw'
+    :rtype: int """
+
+    return dict(RESOLUTION_STEPS).get(resolution, RAW_STEP)
+
+
+def is_counter(fieldname):
+    """ Return whether a field is a cumulative counter like 'energy' or
+    'energyOut' rather than an instantaneous value like 'power'.
+    :rtype: bool """
+
+    return fieldname.startswith('energy')
+
+
+def _increase(current, previous):
+    """ Return the increase of a counter, the current value after a reset
+    and NaN if either value is NaN. """
+
+    delta = current - previous
+    return current if delta < 0 else delta
+
+
+def _integrals(starts, lengths, amounts, edges):
+    """ Return the sum of amounts up to each edge, every amount spread
+    evenly over [start, start + length) of ascending, disjoint intervals. """
+
+    totals = list(accumulate(amounts, initial=0))
+    result = []
+    for edge in edges:
+        i = bisect_right(starts, edge) - 1
+        if i < 0:
+            result.append(0)
+        else:
+            result.append(totals[i] + amounts[i] * min(edge - starts[i], lengths[i]) / lengths[i])
+    return result
+
+
+def _average(total, weight):
+    return total / weight if weight else float('nan')
+
+
+def resample(readings, bucket, origin=0, max_gap=None, end=None):
+    """ Aggregate measurements into buckets of arbitrary length.
+    Counters ('energy', 'energyOut', ...) become the increase within each
+    bucket, interpolated linearly between measurements, with a decreasing
+    counter treated as reset to zero. All other fields ('power', ...) become
+    the time-weighted average of each bucket, every value holding until the
+    next measurement but at most max_gap milliseconds.
+    :param readings: ColumnarReadings or measurements in the format of
+    Discovergy.get_readings()
+    :param int bucket: bucket length in milliseconds
+    :param int origin: unix milliseconds timestamp buckets are aligned to
+    :param int max_gap: longest time in milliseconds a value holds, None for
+    no limit
+    :param int end: unix milliseconds timestamp after which buckets are
+    left out, None to end with the bucket of the last measurement
+    :return: one row per bucket with 'time' as start of the bucket, float
+    columns and NaN for averages of buckets without measurements
+    :rtype: ColumnarReadings """
+
+    if not isinstance(readings, ColumnarReadings):
+        readings = ColumnarReadings.from_readings(readings)
+
+    times = readings.time
+    result = ColumnarReadings(readings.fieldnames)
+    if not times:
+        return result
+
+    first = (times[0] - origin) // bucket
+    count = (times[-1] - origin) // bucket - first + 1
+    if end is not None:
+        count = min(count, (end - origin) // bucket - first)
+    if count <= 0:
+        return result
+    edges = range(origin + first * bucket, origin + (first + count + 1) * bucket, bucket)
+    result.time = array('q', edges[:-1])
+
+    durations = list(map(operator.sub, times[1:], times[:-1]))
+    held = durations + [times[-1] - times[-2] if len(times) > 1 else 1]
+    if max_gap is not None:
+        held = list(map(min, held, repeat(max_gap)))
+
+    for name, column in readings.fields.items():
+        if is_counter(name):
+            # Increases between consecutive measurements
+            amounts = list(map(_increase, column[1:], column[:-1]))
+            keep = list(map(operator.and_, map(operator.gt, durations, repeat(0)),
+                            map(operator.not_, map(math.isnan, amounts))))
+            lengths = list(compress(durations, keep))
+            totals = _integrals(array('q', compress(times, keep)), lengths,
+                                list(compress(amounts, keep)), edges)
+            result.fields[name] = array('d', map(operator.sub, totals[1:], totals[:-1]))
+            continue
+
+        # Values held until the next measurement, NaN values not at all
+        keep = list(map(operator.gt, held, repeat(0)))
+        if column.typecode == 'd':
+            keep = list(map(operator.and_, keep, map(operator.not_, map(math.isnan, column))))
+        starts = array('q', compress(times, keep))
+        lengths = list(compress(held, keep))
+        sums = _integrals(starts, lengths,
+                          list(map(operator.mul, compress(column, keep), lengths)), edges)
+        weights = _integrals(starts, lengths, lengths, edges)
+        result.fields[name] = array('d', map(_average, map(operator.sub, sums[1:], sums[:-1]),
+                                             map(operator.sub, weights[1:], weights[:-1])))
+
+    return result
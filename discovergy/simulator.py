@@ -0,0 +1,381 @@
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+
+DAY = 24 * 60 * 60 * 1000
+RAW_INTERVAL = 2000
+# Spacing of readings per aggregated resolution, calendar based resolutions
+# are approximated by fixed lengths
+RESOLUTION_INTERVALS = {'three_minutes': 3 * 60 * 1000,
+                        'fifteen_minutes': 15 * 60 * 1000,
+                        'one_hour': 60 * 60 * 1000,
+                        'one_day': DAY,
+                        'one_week': 7 * DAY,
+                        'one_month': 30 * DAY,
+                        'one_year': 365 * DAY}
+FIELDNAMES = ['energy', 'energyOut', 'power', 'power1', 'power2', 'power3',
+              'voltage1', 'voltage2', 'voltage3']
+DEVICES = ['Grundlast-1', 'Waschmaschine-1', 'Spülmaschine-1', 'Durchlauferhitzer-1']
+DISAGGREGATION_INTERVAL = 15 * 60 * 1000
+# One mW over one ms in mWh, the energy unit of the readings
+ENERGY_PER_MILLIWATT_MILLISECOND = 1 / 3600000
+
+
+class Simulator:
+    """ Local HTTP server imitating the Discovergy API for benchmarks and
+    integration tests. It implements the OAuth 1.0 flow without checking
+    signatures, serves deterministic synthetic meters and time series and can
+    add latency and throttle clients with 429 responses. """
+
+    def __init__(self, meters=10, interval=RAW_INTERVAL, latency=0.0, jitter=0.0,
+                 rate=None, burst=None, host='127.0.0.1', port=0, accounts=None):
+        """ Inititalize Simulator class.
+        :param int meters: number of meters visible to every account
+        :param int interval: milliseconds between raw readings, which
+        determines the size of /readings responses
+        :param float latency: seconds to wait before answering a request
+        :param float jitter: maximum random seconds added to latency
+        :param float rate: requests per second to serve before answering with
+        429 Too Many Requests, None for no limit
+        :param int burst: requests that may be sent at once, rate if None
+        :param str host: address to listen on
+        :param int port: port to listen on, 0 for any free port
+        :param dict accounts: number of additional meters owned by each
+        account email, only these accounts can log in if given
+        """
+
+        self.interval = interval
+        self.latency = latency
+        self.jitter = jitter
+        self.meter_ids = [hashlib.md5(str(i).encode()).hexdigest() for i in range(meters)]
+        self.owners = dict.fromkeys(self.meter_ids)
+        self._accounts = accounts
+        for email, count in (accounts or {}).items():
+            for i in range(count):
+                meter_id = hashlib.md5(("%s/%d" % (email, i)).encode()).hexdigest()
+                self.meter_ids.append(meter_id)
+                self.owners[meter_id] = email
+        self.requests = {}
+        self._meters = {meter_id: i for i, meter_id in enumerate(self.meter_ids)}
+        self._rate = rate
+        self._capacity = burst if burst is not None else max(1, rate or 1)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._consumers = {}
+        self._request_tokens = {}
+        self._verifiers = {}
+        self._access_tokens = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.simulator = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """ Root URL to pass to Discovergy(base_url=...).
+        :rtype: str """
+
+        host, port = self._server.server_address[:2]
+        return "http://%s:%d/public/v1" % (host, port)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """ Serve requests from a background thread. """
+
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name='discovergy-simulator', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stop serving and close the listening socket. """
+
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def expire_tokens(self):
+        """ Revoke all access tokens, so that clients have to log in again. """
+
+        with self._lock:
+            self._access_tokens.clear()
+
+    def _count(self, endpoint):
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def _throttle(self):
+        """ Take a token from the bucket.
+        :return: seconds until a token is available, 0 if one was taken
+        :rtype: float """
+
+        if self._rate is None:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self._rate
+
+    def _issue(self, tokens, value=None):
+        token = uuid.uuid4().hex
+        with self._lock:
+            tokens[token] = value
+        return token
+
+    def handle(self, method, path, query, headers, body):
+        """ Answer one request.
+        :return: status code, headers and body
+        :rtype: tuple """
+
+        endpoint = path[len('/public/v1'):] if path.startswith('/public/v1/') else path
+        self._count(endpoint)
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if endpoint.startswith('/oauth1/'):
+            route = _OAUTH_ROUTES.get((method, endpoint), Simulator._not_found)
+            return route(self, query, headers, body)
+        error, email = self._authenticate(headers)
+        return error or self._respond(method, endpoint, query, email)
+
+    def _authenticate(self, headers):
+        """ Throttle a data request and look up the account of its access token.
+        :return: error response or None, and the email of the account
+        :rtype: tuple """
+
+        wait = self._throttle()
+        if wait:
+            return (429, {'Retry-After': str(math.ceil(wait))}, b'Too Many Requests'), None
+        token = _oauth_parameters(headers.get('Authorization', '')).get('oauth_token')
+        with self._lock:
+            email = self._access_tokens.get(token)
+        if email is None:
+            return (401, {}, b'Unauthorized'), None
+        return None, email
+
+    def _respond(self, method, endpoint, query, email):
+        """ Answer an authenticated data request from the route table _ENDPOINTS. """
+
+        handler = _ENDPOINTS.get((method, endpoint))
+        if handler is None:
+            return 404, {}, b'Not Found'
+        meter_id = query.get('meterId')
+        if endpoint != '/meters' and (meter_id not in self.owners or
+                                      self.owners[meter_id] not in (None, email)):
+            return 400, {}, b'Unknown meter'
+        try:
+            result = handler(self, query, email)
+        except (KeyError, ValueError):
+            return 400, {}, b'Invalid parameters'
+        return 200, {'Content-Type': 'application/json'}, json.dumps(result).encode('utf-8')
+
+    def _not_found(self, query, headers, body):
+        return 404, {}, b'Not Found'
+
+    def _consumer_token(self, query, headers, body):
+        form = {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+        key = self._issue(self._consumers, uuid.uuid4().hex)
+        return 200, {'Content-Type': 'application/json'}, json.dumps(
+            {'key': key, 'secret': self._consumers[key], 'owner': form.get('client'),
+             'attributes': {}, 'principal': None}).encode('utf-8')
+
+    def _request_token(self, query, headers, body):
+        token = self._issue(self._request_tokens, uuid.uuid4().hex)
+        return 200, {}, urlencode({'oauth_token': token,
+                                   'oauth_token_secret': self._request_tokens[token],
+                                   'oauth_callback_confirmed': 'true'}).encode()
+
+    def _authorize(self, query, headers, body):
+        email = query.get('email')
+        if query.get('oauth_token') not in self._request_tokens or not email or \
+                (self._accounts is not None and email not in self._accounts):
+            return 401, {}, b'Unauthorized'
+        verifier = self._issue(self._verifiers, email)
+        return 200, {}, urlencode({'oauth_verifier': verifier}).encode()
+
+    def _access_token(self, query, headers, body):
+        verifier = _oauth_parameters(headers.get('Authorization', '')).get('oauth_verifier')
+        with self._lock:
+            email = self._verifiers.pop(verifier, None)
+        if email is None:
+            return 401, {}, b'Unauthorized'
+        token = self._issue(self._access_tokens, email)
+        return 200, {}, urlencode({'oauth_token': token,
+                                   'oauth_token_secret': uuid.uuid4().hex}).encode()
+
+    def reading(self, meter_id, timestamp):
+        """ Return the synthetic reading of a meter at a point in time: a
+        daily sine of the power and its integral as energy.
+        :param str meter_id: identifier of the meter
+        :param int timestamp: unix milliseconds timestamp
+        :rtype: dict """
+
+        index = self._meters[meter_id]
+        base = 500000 + 100000 * (index % 10)
+        amplitude = base // 2
+        omega = 2 * math.pi / DAY
+        phase = omega * timestamp
+        power = int(base + amplitude * math.sin(phase))
+        energy = int((base * timestamp + amplitude / omega * (1 - math.cos(phase))) *
+                     ENERGY_PER_MILLIWATT_MILLISECOND)
+        return {'time': timestamp,
+                'values': {'energy': energy, 'energyOut': 0, 'power': power,
+                           'power1': power // 3, 'power2': power // 3,
+                           'power3': power - 2 * (power // 3),
+                           'voltage1': 230000, 'voltage2': 230000, 'voltage3': 230000}}
+
+    def _meters_response(self, query, email):
+        return [{'meterId': meter_id, 'manufacturerId': 'ESY',
+                 'serialNumber': str(60000000 + index), 'fullSerialNumber': '',
+                 'location': {'street': 'Simulated', 'streetNumber': str(index), 'zip': '',
+                              'city': '', 'country': 'DE'},
+                 'administrationNumber': '', 'type': 'EASYMETER',
+                 'measurementType': 'ELECTRICITY', 'loadProfileType': 'SLP',
+                 'scalingFactor': 1, 'currentScalingFactor': 1, 'voltageScalingFactor': 1,
+                 'internalMeters': 1, 'firstMeasurementTime': -1, 'lastMeasurementTime': -1}
+                for meter_id, index in self._meters.items()
+                if self.owners[meter_id] in (None, email)]
+
+    def _field_names(self, query, email):
+        return FIELDNAMES
+
+    def _last_reading(self, query, email):
+        now = int(time.time() * 1000)
+        return self.reading(query['meterId'], now - now % self.interval)
+
+    def _readings(self, query, email):
+        resolution = query.get('resolution', 'raw')
+        step = self.interval if resolution == 'raw' else RESOLUTION_INTERVALS[resolution]
+        start, end = int(query['from']), int(query.get('to', time.time() * 1000))
+        first = start + (-start) % step
+        return [self.reading(query['meterId'], timestamp)
+                for timestamp in range(first, end, step)]
+
+    def _disaggregation(self, query, email):
+        start, end = int(query['from']), int(query.get('to', time.time() * 1000))
+        first = start + (-start) % DISAGGREGATION_INTERVAL
+        result = {}
+        for timestamp in range(first, end, DISAGGREGATION_INTERVAL):
+            slot = timestamp // DISAGGREGATION_INTERVAL
+            result[str(timestamp)] = {device: 2500000 if i == 0 else
+                                      (1000000 if (slot + i) % 16 == 0 else 0)
+                                      for i, device in enumerate(DEVICES)}
+        return result
+
+    def _activities(self, query, email):
+        start, end = int(query['from']), int(query['to'])
+        hour = 60 * 60 * 1000
+        first = start + (-start) % hour
+        return [{'startTime': timestamp, 'endTime': timestamp + hour // 4,
+                 'deviceName': DEVICES[1 + (timestamp // hour) % (len(DEVICES) - 1)],
+                 'id': hashlib.md5(str(timestamp).encode()).hexdigest()}
+                for timestamp in range(first, end, 4 * hour)]
+
+
+_ENDPOINTS = {('GET', '/meters'): Simulator._meters_response,
+              ('GET', '/field_names'): Simulator._field_names,
+              ('GET', '/last_reading'): Simulator._last_reading,
+              ('GET', '/readings'): Simulator._readings,
+              ('GET', '/disaggregation'): Simulator._disaggregation,
+              ('GET', '/activities'): Simulator._activities}
+
+# Requests of the login flow, answered without an access token
+_OAUTH_ROUTES = {('POST', '/oauth1/consumer_token'): Simulator._consumer_token,
+                 ('POST', '/oauth1/request_token'): Simulator._request_token,
+                 ('GET', '/oauth1/authorize'): Simulator._authorize,
+                 ('POST', '/oauth1/access_token'): Simulator._access_token}
+
+
+def _oauth_parameters(header):
+    """ Parse the parameters of an OAuth Authorization header.
+    :rtype: dict """
+
+    parameters = {}
+    if header.startswith('OAuth '):
+        for item in header[len('OAuth '):].split(','):
+            key, _, value = item.strip().partition('=')
+            parameters[key] = value.strip('"')
+    return parameters
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _respond(self, method):
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status, headers, content = self.server.simulator.handle(method, url.path, query,
+                                                                self.headers, body)
+        try:
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the connection, e.g. to shrink its pool
+            self.close_connection = True
+
+    def do_GET(self):
+        self._respond('GET')
+
+    def do_POST(self):
+        self._respond('POST')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(argv=None):
+    """ Run a simulator in the foreground, e.g. in another process than the
+    benchmarked client: python -m discovergy.simulator --port 8080 """
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--meters', type=int, default=10)
+    parser.add_argument('--interval', type=int, default=RAW_INTERVAL,
+                        help="milliseconds between raw readings")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds per request")
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--rate', type=float, default=None, help="requests per second")
+    arguments = parser.parse_args(argv)
+
+    simulator = Simulator(meters=arguments.meters, interval=arguments.interval,
+                          latency=arguments.latency, jitter=arguments.jitter,
+                          rate=arguments.rate, host=arguments.host, port=arguments.port)
+    print("Serving %s" % simulator.base_url)
+    try:
+        simulator._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """ Coalesce identical calls made by several threads at the same time:
+    only the first thread runs the call, the others wait for it and receive
+    the same result object or exception. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function, *args, **kwargs):
+        """ Run function(*args, **kwargs) unless a call with the same key is
+        in flight, in which case wait for its outcome.
+        :param key: hashable identity of the call, e.g. the request URL
+        :return: result of the call
+        :raises: exception of the call """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        """ Return the number of calls currently running.
+        :rtype: int """
+
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,216 @@
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+MIN_INTERVAL = 1.0
+MAX_INTERVAL = 300.0
+INITIAL_INTERVAL = 5.0
+# Weight of the latest update interval in the cadence estimate of a meter
+CADENCE_WEIGHT = 0.3
+
+
+class LiveSubscription:
+    """ Poll the last reading of many meters from one scheduler thread and
+    emit only readings with a new 'time'. Each meter is polled shortly after
+    its next reading is expected, based on the observed update cadence, and
+    polled less often while its reading does not change. """
+
+    def __init__(self, discovergy, meter_ids, callback=None, max_workers=10,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 initial_interval=INITIAL_INTERVAL):
+        """ Inititalize LiveSubscription class.
+        :param discovergy: logged in Discovergy instance
+        :param meter_ids: identifiers of the meters to poll
+        :param callback: callable(meter_id, reading) receiving new readings,
+        if None they are put into a queue and available by iterating over the
+        subscription
+        :param int max_workers: maximum number of concurrent requests
+        :param float min_interval: minimum seconds between polls of a meter
+        :param float max_interval: maximum seconds between polls of a meter
+        :param float initial_interval: assumed seconds between readings of a
+        meter until its cadence has been observed
+        """
+
+        self._discovergy = discovergy
+        self._callback = callback
+        self._queue = queue.Queue() if callback is None else None
+        self._max_workers = max_workers
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._initial_interval = initial_interval
+        self._meters = {}
+        self._schedule = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._stopped = True
+        self._thread = None
+        self._executor = None
+        for meter_id in meter_ids:
+            self.add(meter_id)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def __iter__(self):
+        """ Yield (meter_id, reading) for every new reading until the
+        subscription is stopped. Only available without callback. """
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            yield item
+
+    def add(self, meter_id):
+        """ Start polling a meter.
+        :param str meter_id: identifier of the meter """
+
+        with self._condition:
+            if meter_id in self._meters:
+                return
+            self._meters[meter_id] = {'time': None, 'cadence': None, 'misses': 0}
+            self._push(meter_id, 0)
+
+    def remove(self, meter_id):
+        """ Stop polling a meter.
+        :param str meter_id: identifier of the meter """
+
+        with self._condition:
+            self._meters.pop(meter_id, None)
+
+    def start(self):
+        """ Start the scheduler thread. """
+
+        with self._condition:
+            if not self._stopped:
+                return
+            self._stopped = False
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+        self._thread = threading.Thread(target=self._run, name='discovergy-subscription',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Stop polling and wait for requests in flight. """
+
+        with self._condition:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+        if self._queue is not None:
+            self._queue.put(None)
+
+    def _push(self, meter_id, delay):
+        """ Schedule the next poll of a meter. Must be called with the
+        condition held. """
+
+        heapq.heappush(self._schedule, (time.monotonic() + delay, next(self._sequence), meter_id))
+        self._condition.notify()
+
+    def _run(self):
+        """ Submit polls of meters as they become due, at most max_workers
+        at a time. """
+
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    now = time.monotonic()
+                    timeout = None
+                    if self._schedule and self._in_flight < self._max_workers:
+                        if self._schedule[0][0] <= now:
+                            break
+                        timeout = self._schedule[0][0] - now
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    return
+                _, _, meter_id = heapq.heappop(self._schedule)
+                if meter_id not in self._meters:
+                    continue
+                self._in_flight += 1
+
+            try:
+                self._executor.submit(self._poll, meter_id)
+            except RuntimeError:
+                self._done()
+                return
+
+    def _done(self):
+        """ Free the slot of a finished poll and wake the scheduler. """
+
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def _poll(self, meter_id):
+        """ Fetch the last reading of a meter, emit it if it is new and
+        schedule the next poll. """
+
+        try:
+            reading = self._discovergy.get_last_reading(meter_id)
+        except Exception as e:
+            logger.error("Failed to poll meter %s: %r", meter_id, e)
+            reading = {}
+        finally:
+            self._done()
+
+        with self._condition:
+            state = self._meters.get(meter_id)
+            if state is None:
+                return
+            new = bool(reading) and reading.get('time') != state['time']
+            delay = self._update(state, reading if new else None)
+            if not self._stopped:
+                self._push(meter_id, delay)
+
+        if new:
+            self._emit(meter_id, reading)
+
+    def _update(self, state, reading):
+        """ Update the cadence estimate of a meter.
+        :param dict state: polling state of the meter
+        :param dict reading: the new reading, None if there was none
+        :return: seconds until the next poll
+        :rtype: float """
+
+        if reading is None:
+            state['misses'] += 1
+            cadence = state['cadence'] or self._initial_interval
+            delay = cadence / 4 * 2 ** min(state['misses'] - 1, 16)
+        else:
+            if state['time'] is not None:
+                interval = (reading['time'] - state['time']) / 1000
+                if state['cadence'] is None:
+                    state['cadence'] = interval
+                else:
+                    state['cadence'] += CADENCE_WEIGHT * (interval - state['cadence'])
+            state['time'] = reading['time']
+            state['misses'] = 0
+            cadence = state['cadence'] or self._initial_interval
+            delay = reading['time'] / 1000 + cadence - time.time()
+
+        return min(self._max_interval, max(self._min_interval, delay))
+
+    def _emit(self, meter_id, reading):
+        """ Pass a new reading to the callback or the queue. """
+
+        if self._queue is not None:
+            self._queue.put((meter_id, reading))
+            return
+        try:
+            self._callback(meter_id, reading)
+        except Exception:
+            logger.exception("Subscription callback failed for meter %s", meter_id)
@@ -0,0 +1,237 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .discovergy import DAY, RESOLUTION_WINDOWS, exception_template
+from .ratelimit import in_caller_context
+from .readings import split_interval
+from .resample import RESOLUTION_STEPS
+
+
+logger = logging.getLogger(__name__)
+# Milliseconds readings may arrive late, newer readings are synced next time
+LAG = 5 * 60 * 1000
+RAW_MAX_GAP = 60 * 1000
+# Longest regular distance between readings of the calendar resolutions
+CALENDAR_STEPS = {'one_week': 7 * DAY, 'one_month': 31 * DAY, 'one_year': 366 * DAY}
+MAX_ATTEMPTS = 3
+
+
+class SyncEngine:
+    """ Keep a local SQLite store of the readings of many meters current.
+    Every meter has a durable high-water mark up to which its readings are
+    stored. A sync only fetches readings after the mark and commits each
+    window of readings together with the advanced mark in one transaction, so
+    a restarted sync resumes exactly after the last committed window. Gaps
+    between consecutive readings longer than max_gap are recorded and fetched
+    again by later syncs. """
+
+    def __init__(self, discovergy, path, start, resolution='raw', lag=LAG, max_gap=None,
+                 max_attempts=MAX_ATTEMPTS, callback=None):
+        """ Inititalize SyncEngine class.
+        :param discovergy: logged in Discovergy or DiscovergyPool instance
+        :param str path: location of the SQLite database
+        :param int start: unix milliseconds timestamp to sync meters without
+        high-water mark from
+        :param str resolution: time distance between readings, see
+        Discovergy.get_readings()
+        :param int lag: milliseconds before now that are not synced yet
+        because readings may still arrive
+        :param int max_gap: longest expected milliseconds between readings,
+        twice the resolution or one minute for 'raw' if None
+        :param int max_attempts: number of times a gap is fetched again
+        :param callback: optional callable(meter_id, readings) called before
+        each commit without holding the engine lock, e.g. to write to another
+        store, an exception skips the commit so that the readings are fetched
+        and passed again
+        """
+
+        steps = dict(RESOLUTION_STEPS)
+        self._discovergy = discovergy
+        self._start = start
+        self._resolution = resolution
+        self._lag = lag
+        self._step = steps.get(resolution, 1)
+        if max_gap is None:
+            step = steps.get(resolution, CALENDAR_STEPS.get(resolution))
+            max_gap = RAW_MAX_GAP if step is None else 2 * step
+        self._max_gap = max_gap
+        self._max_attempts = max_attempts
+        self._callback = callback
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS marks ("
+                "meter_id TEXT, resolution TEXT, high_water INTEGER, last_time INTEGER, "
+                "PRIMARY KEY (meter_id, resolution))")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS readings ("
+                "meter_id TEXT, resolution TEXT, time INTEGER, data TEXT, "
+                "PRIMARY KEY (meter_id, resolution, time)) WITHOUT ROWID")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS gaps ("
+                "meter_id TEXT, resolution TEXT, start INTEGER, end INTEGER, attempts INTEGER, "
+                "PRIMARY KEY (meter_id, resolution, start))")
+
+    def close(self):
+        """ Close the database connection. """
+
+        with self._lock:
+            self._connection.close()
+
+    def high_water_mark(self, meter_id):
+        """ Return the timestamp up to which the readings of a meter are
+        stored.
+        :param str meter_id: identifier of the meter
+        :return: unix milliseconds timestamp, None if never synced
+        :rtype: int """
+
+        return self._mark(meter_id)[0]
+
+    def _mark(self, meter_id):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT high_water, last_time FROM marks WHERE meter_id = ? AND resolution = ?",
+                (meter_id, self._resolution)).fetchone()
+        return row if row is not None else (None, None)
+
+    def get_readings(self, meter_id, start, end):
+        """ Return the stored measurements of a meter.
+        :param str meter_id: identifier of the meter
+        :param int start: start of interval as unix milliseconds timestamp
+        :param int end: end of interval as unix milliseconds timestamp
+        :return: measurements ordered by 'time', same format as
+        Discovergy.get_readings()
+        :rtype: list """
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT time, data FROM readings WHERE meter_id = ? AND resolution = ? "
+                "AND time >= ? AND time < ? ORDER BY time",
+                (meter_id, self._resolution, start, end)).fetchall()
+        return [{'time': timestamp, 'values': json.loads(data)} for timestamp, data in rows]
+
+    def gaps(self, meter_id=None):
+        """ Return the recorded gaps, including those given up on after
+        max_attempts.
+        :param str meter_id: only return the gaps of this meter
+        :return: (meter_id, start, end, attempts) with the timestamps of the
+        readings around each gap
+        :rtype: list """
+
+        query = "SELECT meter_id, start, end, attempts FROM gaps WHERE resolution = ?"
+        parameters = [self._resolution]
+        if meter_id is not None:
+            query += " AND meter_id = ?"
+            parameters.append(meter_id)
+        with self._lock:
+            return self._connection.execute(query + " ORDER BY meter_id, start",
+                                            parameters).fetchall()
+
+    def sync(self, meter_ids=None, max_workers=4, end=None):
+        """ Fetch the readings of the meters since their high-water marks and
+        fetch recorded gaps again, in parallel across meters.
+        :param meter_ids: identifiers of the meters, None for all meters of
+        the client account
+        :param int max_workers: maximum number of meters synced concurrently
+        :param int end: unix milliseconds timestamp to sync up to, now minus
+        lag if None
+        :return: number of new 'readings' per meter id and the exception per
+        failed meter id in 'errors'
+        :rtype: dict """
+
+        if meter_ids is None:
+            meter_ids = [meter['meterId'] for meter in self._discovergy.get_meters()]
+        if end is None:
+            end = round(time.time() * 1e3) - self._lag
+        end -= end % self._step
+
+        def sync(meter_id):
+            try:
+                return meter_id, self._sync_meter(meter_id, end), None
+            except Exception as e:
+                message = exception_template.format(type(e).__name__, e.args)
+                logger.error("Failed to sync meter %s: %s", meter_id, message)
+                return meter_id, None, e
+
+        result = {'readings': {}, 'errors': {}}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for meter_id, count, error in executor.map(in_caller_context(sync), meter_ids):
+                if error is None:
+                    result['readings'][meter_id] = count
+                else:
+                    result['errors'][meter_id] = error
+        return result
+
+    def _fetch(self, meter_id, start, end):
+        """ Fetch the readings in [start, end), raising on failure. """
+
+        readings = self._discovergy.fetch_readings(meter_id, start, end, self._resolution)
+        return sorted((reading for reading in readings if start <= reading['time'] < end),
+                      key=lambda reading: reading['time'])
+
+    def _find_gaps(self, times):
+        """ Return (start, end) of each gap between consecutive timestamps. """
+
+        return [(previous, current) for previous, current in zip(times, times[1:])
+                if previous is not None and current - previous > self._max_gap]
+
+    def _sync_meter(self, meter_id, end):
+        """ Sync a meter window by window, then fetch its gaps again.
+        :return: number of new readings
+        :rtype: int """
+
+        mark, last_time = self._mark(meter_id)
+        count = 0
+        for window_start, window_end in split_interval(
+                self._start if mark is None else mark, end, RESOLUTION_WINDOWS[self._resolution]):
+            readings = self._fetch(meter_id, window_start, window_end)
+            times = [last_time] + [reading['time'] for reading in readings]
+            if readings:
+                last_time = readings[-1]['time']
+            self._commit(meter_id, readings, self._find_gaps(times), mark=(window_end, last_time))
+            count += len(readings)
+
+        for start, gap_end, attempts in self._open_gaps(meter_id):
+            readings = self._fetch(meter_id, start + 1, gap_end)
+            gaps = self._find_gaps([start] + [reading['time'] for reading in readings] +
+                                   [gap_end])
+            self._commit(meter_id, readings, gaps, attempts=attempts + 1, replaced_gap=start)
+            count += len(readings)
+        return count
+
+    def _open_gaps(self, meter_id):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT start, end, attempts FROM gaps WHERE meter_id = ? AND resolution = ? "
+                "AND attempts < ? ORDER BY start",
+                (meter_id, self._resolution, self._max_attempts)).fetchall()
+
+    def _commit(self, meter_id, readings, gaps, mark=None, attempts=0, replaced_gap=None):
+        """ Pass readings to the callback, then store them with the gaps and
+        the new high-water mark in one transaction.
+        :param mark: (high_water, last_time) to save, None to keep the mark
+        :param int attempts: number of fetches of the gaps
+        :param int replaced_gap: start of a gap that was fetched again """
+
+        if self._callback is not None and readings:
+            self._callback(meter_id, readings)
+
+        rows = [(meter_id, self._resolution, reading['time'],
+                 json.dumps(reading['values'], separators=(',', ':'))) for reading in readings]
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO readings VALUES (?, ?, ?, ?)",
+                                         rows)
+            if replaced_gap is not None:
+                self._connection.execute(
+                    "DELETE FROM gaps WHERE meter_id = ? AND resolution = ? AND start = ?",
+                    (meter_id, self._resolution, replaced_gap))
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO gaps VALUES (?, ?, ?, ?, ?)",
+                [(meter_id, self._resolution, start, end, attempts) for start, end in gaps])
+            if mark is not None:
+                self._connection.execute("INSERT OR REPLACE INTO marks VALUES (?, ?, ?, ?)",
+                                         (meter_id, self._resolution) + mark)
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import threading
+
+
+class MemoryTokenStore:
+    """ Token store keeping OAuth tokens in memory for the lifetime of the
+    process, e.g. to share them between Discovergy instances. """
+
+    def __init__(self):
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        """ Return the tokens saved for key.
+        :param str key: identifier of the client account
+        :return: tokens on success, None otherwise
+        :rtype: dict """
+
+        with self._lock:
+            tokens = self._tokens.get(key)
+            return dict(tokens) if tokens is not None else None
+
+    def save(self, key, tokens):
+        """ Save tokens for key.
+        :param str key: identifier of the client account
+        :param dict tokens: consumer_key, consumer_secret, token and
+        token_secret """
+
+        with self._lock:
+            self._tokens[key] = dict(tokens)
+
+    def delete(self, key):
+        """ Forget the tokens saved for key.
+        :param str key: identifier of the client account """
+
+        with self._lock:
+            self._tokens.pop(key, None)
+
+
+class FileTokenStore:
+    """ Token store keeping OAuth tokens in a JSON file readable only by the
+    current user, so that they survive process restarts. """
+
+    def __init__(self, path):
+        """ Inititalize FileTokenStore class.
+        :param str path: location of the JSON file
+        """
+
+        self._path = path
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self._path, encoding='utf-8') as token_file:
+                return json.load(token_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, content):
+        directory = os.path.dirname(os.path.abspath(self._path))
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as token_file:
+                json.dump(content, token_file)
+            os.chmod(temporary_path, 0o600)
+            os.replace(temporary_path, self._path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    def load(self, key):
+        """ Return the tokens saved for key.
+        :param str key: identifier of the client account
+        :return: tokens on success, None otherwise
+        :rtype: dict """
+
+        with self._lock:
+            return self._read().get(key)
+
+    def save(self, key, tokens):
+        """ Save tokens for key.
+        :param str key: identifier of the client account
+        :param dict tokens: consumer_key, consumer_secret, token and
+        token_secret """
+
+        with self._lock:
+            content = self._read()
+            content[key] = dict(tokens)
+            self._write(content)
+
+    def delete(self, key):
+        """ Forget the tokens saved for key.
+        :param str key: identifier of the client account """
+
+        with self._lock:
+            content = self._read()
+            if content.pop(key, None) is not None:
+                self._write(content)
@@ -0,0 +1,105 @@
+import threading
+
+
+POOL_SIZE = 10
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+class Transport:
+    """ HTTP connection pool shared by the authentication and data requests
+    of one or more Discovergy instances. The underlying urllib3 pools are
+    thread-safe, so one transport can serve many threads. requests is only
+    imported when the session is first used. """
+
+    def __init__(self, pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE,
+                 max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR, keep_alive=True):
+        """ Inititalize Transport class.
+        :param int pool_connections: number of hosts to keep pools for
+        :param int pool_maxsize: number of connections to keep per host, which
+        should be at least the number of threads sending requests
+        :param int max_retries: retries of failed connections and of
+        responses with status 500, 502, 503 or 504
+        :param float backoff_factor: retry after backoff_factor * 2 ** (retry - 1)
+        seconds
+        :param bool keep_alive: reuse connections between requests
+        """
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._max_retries = max_retries
+        self._backoff_factor = backoff_factor
+        self._keep_alive = keep_alive
+        self._adapter = None
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def adapter(self):
+        """ Adapter holding the connection pools, created on first use.
+        :rtype: requests.adapters.HTTPAdapter """
+
+        with self._lock:
+            if self._adapter is None:
+                self._adapter = self._create_adapter()
+            return self._adapter
+
+    @property
+    def session(self):
+        """ Session for requests without OAuth, created on first use.
+        :rtype: requests.Session """
+
+        if self._session is None:
+            import requests
+
+            session = requests.Session()
+            self.mount(session)
+            with self._lock:
+                if self._session is None:
+                    self._session = session
+        return self._session
+
+    def _create_adapter(self):
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(total=self._max_retries, backoff_factor=self._backoff_factor,
+                      status_forcelist=RETRY_STATUS_CODES, raise_on_status=False)
+        return HTTPAdapter(pool_connections=self.pool_connections,
+                           pool_maxsize=self.pool_maxsize, max_retries=retry)
+
+    def mount(self, session):
+        """ Route the requests of session, e.g. an OAuth1Session, through
+        the shared connection pool.
+        :param requests.Session session: session to configure """
+
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        if not self._keep_alive:
+            session.headers['Connection'] = 'close'
+
+    def resize(self, pool_maxsize):
+        """ Replace the connection pools of the adapter with ones keeping
+        pool_maxsize connections per host. All mounted sessions keep the
+        adapter, so they use the new pools right away. Idle connections of
+        the old pools are closed, requests in flight finish on theirs.
+        :param int pool_maxsize: number of connections to keep per host """
+
+        with self._lock:
+            if pool_maxsize == self.pool_maxsize:
+                return
+            self.pool_maxsize = pool_maxsize
+            if self._adapter is None:
+                return
+            pool_manager = self._adapter.poolmanager
+            self._adapter.init_poolmanager(self.pool_connections, pool_maxsize)
+        pool_manager.clear()
+
+    def close(self):
+        """ Close all pooled connections. """
+
+        if self._session is not None:
+            self._session.close()
+        if self._adapter is not None:
+            self._adapter.close()
@@ -1,3 +1,5 @@
 from setuptools import setup, find_packages
 
-setup(name='discovergy', version='1.0', packages=find_packages())
+setup(name='discovergy', version='1.0', packages=find_packages(),
+      extras_require={'async': ['aiohttp'], 'fast': ['orjson']},
+      entry_points={'console_scripts': ['discovergy = discovergy.cli:main']})
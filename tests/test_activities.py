@@ -0,0 +1,71 @@
+import random
+import unittest
+from discovergy.activities import ActivityIndex
+from discovergy.discovergy import DAY, Discovergy
+from discovergy.simulator import Simulator
+
+
+ACTIVITIES = [{'startTime': 1574100000000, 'endTime': 1574100900000,
+               'deviceName': 'Waschmaschine-1', 'id': 'a'},
+              {'startTime': 1574100600000, 'endTime': 1574102400000,
+               'deviceName': 'Spülmaschine-1', 'id': 'b'},
+              {'startTime': 1574102400000, 'endTime': 1574103000000,
+               'deviceName': 'Waschmaschine-1', 'id': 'c'},
+              {'startTime': 1574101000000, 'endTime': 1574101000000,
+               'deviceName': 'Herd-1', 'id': 'd'}]
+
+
+class ActivityIndexTestCase(unittest.TestCase):
+    """ Unit tests for class ActivityIndex. """
+
+    def test_queries(self):
+        """ Test the queries of class ActivityIndex. """
+
+        index = ActivityIndex(ACTIVITIES)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.devices_at(1574100700000), {'Waschmaschine-1', 'Spülmaschine-1'})
+        self.assertEqual(index.devices_at(1574100900000), {'Spülmaschine-1'})
+        self.assertEqual(index.devices_at(1574102400000), {'Waschmaschine-1'})
+        self.assertEqual(index.devices_at(1574103000000), set())
+        self.assertEqual([activity['id'] for activity in
+                          index.overlapping(1574100800000, 1574102500000)], ['a', 'b', 'c'])
+        self.assertEqual(index.overlapping(1574102400000, 1574102400000), [])
+        self.assertEqual(index.overlap(1574100800000, 1574102500000),
+                         {'Waschmaschine-1': 200000, 'Spülmaschine-1': 1600000})
+        self.assertEqual(ActivityIndex().at(0), [])
+
+    def test_matches_scan(self):
+        """ Test that ActivityIndex finds the same activities as a scan. """
+
+        generator = random.Random(0)
+        activities = []
+        for i in range(500):
+            start = generator.randrange(100000)
+            activities.append({'startTime': start, 'endTime': start + generator.randrange(1, 5000),
+                               'deviceName': 'device-%d' % (i % 7), 'id': str(i)})
+        index = ActivityIndex(activities)
+
+        for _ in range(200):
+            start = generator.randrange(-1000, 110000)
+            end = start + generator.randrange(1, 3000)
+            expected = sorted((activity for activity in activities
+                               if activity['startTime'] < end and activity['endTime'] > start),
+                              key=lambda activity: (activity['startTime'], activity['endTime']))
+            self.assertEqual([a['id'] for a in index.overlapping(start, end)],
+                             [a['id'] for a in expected])
+
+    def test_get_activity_index(self):
+        """ Test function get_activity_index() of class Discovergy. """
+
+        with Simulator(meters=1) as simulator:
+            discovergy = Discovergy('TestClient', base_url=simulator.base_url)
+            discovergy.login('test@test.com', '123test')
+            meter_id = simulator.meter_ids[0]
+            activities = discovergy.get_activities(meter_id, DAY, 2 * DAY)
+            index = discovergy.get_activity_index(meter_id, DAY, 2 * DAY)
+
+            self.assertEqual(simulator.requests['/activities'], 2)
+            self.assertNotIn('/readings', simulator.requests)
+            self.assertEqual(len(activities), 6)
+            self.assertEqual(len(index), 6)
+            self.assertEqual(index.devices_at(DAY + 60000), {activities[0]['deviceName']})
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import unittest
+from tests.test_discovergy import MOCK_RESPONSE_POST, MOCK_RESPONSE_GET, \
+    MOCK_REQUEST_TOKEN, MOCK_ACCESS_TOKEN, MOCK_RESPONSE_METERS, \
+    MOCK_RESPONSE_FIELDNAMES, MOCK_RESPONSE_READING, MOCK_RESPONSE_DISAGGREGATION, \
+    MOCK_RESPONSE_READINGS, METER_ID, FIELDNAMES, READING, DISAGGREGATION, READINGS
+
+try:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+    from discovergy.aio import AsyncDiscovergy
+except ImportError:
+    web = None
+
+
+def stub_application(state):
+    """ Local stub of the Discovergy API for AsyncDiscovergy. """
+
+    def authorized(request, token):
+        header = request.headers.get('Authorization', '')
+        return header.startswith('OAuth ') and \
+            'oauth_token="%s"' % token in header and 'oauth_signature=' in header
+
+    async def consumer_token(request):
+        data = await request.post()
+        if data.get('client') != 'TestClient':
+            return web.Response(status=400)
+        return web.Response(text=MOCK_RESPONSE_POST)
+
+    async def request_token(request):
+        if 'oauth_callback="oob"' not in request.headers.get('Authorization', ''):
+            return web.Response(status=401)
+        return web.Response(text='oauth_token=%s&oauth_token_secret=%s' % (
+            MOCK_REQUEST_TOKEN['oauth_token'], MOCK_REQUEST_TOKEN['oauth_token_secret']))
+
+    async def authorize(request):
+        if request.query.get('oauth_token') != MOCK_REQUEST_TOKEN['oauth_token']:
+            return web.Response(status=401)
+        return web.Response(text=MOCK_RESPONSE_GET)
+
+    async def access_token(request):
+        if not authorized(request, MOCK_REQUEST_TOKEN['oauth_token']):
+            return web.Response(status=401)
+        return web.Response(text='oauth_token=%s&oauth_token_secret=%s' % (
+            MOCK_ACCESS_TOKEN['oauth_token'], MOCK_ACCESS_TOKEN['oauth_token_secret']))
+
+    def data(content):
+        async def handler(request):
+            if not authorized(request, MOCK_ACCESS_TOKEN['oauth_token']):
+                return web.Response(status=401, text='Unauthorized')
+            if request.query.get('meterId') == 'unknown':
+                return web.json_response({'reason': 'Meter not found'}, status=404)
+            state['in_flight'] += 1
+            state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+            await asyncio.sleep(0.01)
+            state['in_flight'] -= 1
+            return web.Response(text=content, content_type='application/json')
+        return handler
+
+    app = web.Application()
+    app.router.add_post('/oauth1/consumer_token', consumer_token)
+    app.router.add_post('/oauth1/request_token', request_token)
+    app.router.add_get('/oauth1/authorize', authorize)
+    app.router.add_post('/oauth1/access_token', access_token)
+    app.router.add_get('/meters', data(MOCK_RESPONSE_METERS))
+    app.router.add_get('/field_names', data(MOCK_RESPONSE_FIELDNAMES))
+    app.router.add_get('/last_reading', data(MOCK_RESPONSE_READING))
+    app.router.add_get('/disaggregation', data(MOCK_RESPONSE_DISAGGREGATION))
+    app.router.add_get('/readings', data(MOCK_RESPONSE_READINGS))
+    return app
+
+
+@unittest.skipIf(web is None, "aiohttp is not installed")
+class AsyncDiscovergyTestCase(unittest.IsolatedAsyncioTestCase):
+    """ Unit tests for class AsyncDiscovergy against a local stub server. """
+
+    async def asyncSetUp(self):
+        self.state = {'in_flight': 0, 'max_in_flight': 0}
+        self.server = TestServer(stub_application(self.state))
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url('')).rstrip('/')
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_login(self):
+        """ Test function login() of class AsyncDiscovergy. """
+
+        async with AsyncDiscovergy('TestClient', base_url=self.base_url) as d:
+            self.assertTrue(await d.login('test@test.com', '123test'))
+            self.assertEqual(d._resource_owner_key, MOCK_ACCESS_TOKEN['oauth_token'])
+
+        async with AsyncDiscovergy('OtherClient', base_url=self.base_url) as d:
+            self.assertFalse(await d.login('test@test.com', '123test'))
+
+    async def test_endpoints(self):
+        """ Test the data functions of class AsyncDiscovergy. """
+
+        async with AsyncDiscovergy('TestClient', base_url=self.base_url) as d:
+            await d.login('test@test.com', '123test')
+
+            meters = await d.get_meters()
+            self.assertEqual(meters, json.loads(MOCK_RESPONSE_METERS))
+            self.assertEqual(await d.get_fieldnames_for_meter(METER_ID), FIELDNAMES)
+            self.assertEqual(await d.get_last_reading(METER_ID), READING)
+            self.assertEqual(await d.get_disaggregation(METER_ID, 0, 1), DISAGGREGATION)
+            self.assertEqual(await d.get_readings(METER_ID, 0, None, 'one_hour'),
+                             READINGS)
+
+    async def test_concurrency_limit(self):
+        """ Test that AsyncDiscovergy never exceeds max_concurrency. """
+
+        async with AsyncDiscovergy('TestClient', base_url=self.base_url,
+                                   max_concurrency=5) as d:
+            await d.login('test@test.com', '123test')
+            readings = await asyncio.gather(*[d.get_last_reading(METER_ID)
+                                              for _ in range(20)])
+
+        self.assertEqual(readings, [READING] * 20)
+        self.assertEqual(self.state['max_in_flight'], 5)
+
+    async def test_unauthorized(self):
+        """ Test that failed requests return empty results. """
+
+        async with AsyncDiscovergy('TestClient', base_url=self.base_url) as d:
+            self.assertEqual(await d.get_last_reading(METER_ID), {})
+            self.assertEqual(await d.get_readings(METER_ID, 0, None, 'raw'), [])
+
+        async with AsyncDiscovergy('TestClient', base_url=self.base_url) as d:
+            await d.login('test@test.com', '123test')
+            self.assertEqual(await d.get_last_reading('unknown'), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
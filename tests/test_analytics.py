@@ -0,0 +1,106 @@
+import math
+import time
+import unittest
+from array import array
+from discovergy import analytics
+from discovergy.columnar import ColumnarReadings
+from discovergy.resample import resample
+from discovergy.simulator import Simulator
+
+
+HOUR = 60 * 60 * 1000
+READINGS = [{'time': 0, 'values': {'energy': 1000, 'energyOut': 0, 'power': 1000000,
+                                   'power1': 300000, 'power2': 300000, 'power3': 400000}},
+            {'time': HOUR, 'values': {'energy': 2000, 'energyOut': 0, 'power': 3000000,
+                                      'power1': 900000, 'power2': 1000000,
+                                      'power3': 1100000}},
+            {'time': 2 * HOUR, 'values': {'energy': 500, 'energyOut': 100, 'power': 500000,
+                                          'power1': 100000, 'power2': 200000,
+                                          'power3': 200000}},
+            {'time': 3 * HOUR, 'values': {'energy': 1500, 'energyOut': 300,
+                                          'power': 2500000, 'power1': 800000,
+                                          'power2': 800000, 'power3': 900000}}]
+
+
+class AnalyticsTestCase(unittest.TestCase):
+    """ Unit tests for module analytics. """
+
+    def test_units(self):
+        """ Test the unit conversions. """
+
+        self.assertEqual(analytics.to_kilowatts(2500000), 2.5)
+        self.assertEqual(list(analytics.to_kilowatt_hours(array('q', [1000000, 0]))),
+                         [1.0, 0.0])
+
+    def test_month_boundaries(self):
+        """ Test function month_boundaries(). """
+
+        start = 1546300800000  # 2019-01-01
+        boundaries = analytics.month_boundaries(start + HOUR, start + 60 * 24 * HOUR)
+        self.assertEqual([time.strftime('%Y-%m-%d', time.gmtime(boundary / 1000))
+                          for boundary in boundaries],
+                         ['2019-01-01', '2019-02-01', '2019-03-01', '2019-04-01'])
+
+    def test_consumption(self):
+        """ Test functions consumption() and feed_in() with a counter
+        reset. """
+
+        # 1000 mWh in the first hour, reset to 0 and 500 mWh in the second
+        self.assertEqual(list(analytics.consumption(READINGS, [0, HOUR, 2 * HOUR, 3 * HOUR])),
+                         [1000, 500, 1000])
+        self.assertEqual(list(analytics.consumption(READINGS, [-HOUR, HOUR // 2, 4 * HOUR])),
+                         [500, 2000])
+        self.assertEqual(list(analytics.feed_in(READINGS, [0, 3 * HOUR])), [300])
+        self.assertEqual(list(analytics.consumption([], [0, HOUR])), [0.0])
+
+        # Resampling counts the same energy across the reset
+        self.assertEqual(list(analytics.consumption(READINGS, [0, HOUR, 2 * HOUR, 3 * HOUR])),
+                         list(resample(READINGS, HOUR, end=3 * HOUR)['energy']))
+
+    def test_power(self):
+        """ Test functions peak_load(), peak_intervals(),
+        load_duration_curve() and phase_balance(). """
+
+        self.assertEqual(analytics.peak_load(READINGS), (HOUR, 3000000))
+        self.assertEqual(analytics.peak_intervals(READINGS, 2000000),
+                         [(HOUR, HOUR, 3000000), (3 * HOUR, 3 * HOUR, 2500000)])
+        self.assertEqual(analytics.peak_intervals(READINGS, 5000000), [])
+        self.assertEqual(list(analytics.load_duration_curve(READINGS)),
+                         [3000000, 2500000, 1000000, 500000])
+        self.assertEqual(list(analytics.load_duration_curve(READINGS, points=2)),
+                         [3000000, 500000])
+
+        balance = analytics.phase_balance(READINGS)
+        self.assertEqual(balance['power1'], 525000)
+        self.assertAlmostEqual(balance['imbalance'], (650000 - 583333.33) / 583333.33, places=4)
+
+    def test_missing_values(self):
+        """ Test that missing values are ignored. """
+
+        readings = [dict(reading, values=dict(reading['values'])) for reading in READINGS]
+        del readings[1]['values']['power']
+        columns = ColumnarReadings.from_readings(readings, analytics.PHASES + ('power',))
+        self.assertTrue(math.isnan(columns['power'][1]))
+        self.assertEqual(analytics.peak_load(columns), (3 * HOUR, 2500000))
+
+    def test_fleet_report(self):
+        """ Test function fleet_report() with readings of the simulator. """
+
+        simulator = Simulator(meters=3)
+        start = 1546300800000
+        readings = {meter_id: [simulator.reading(meter_id, timestamp)
+                               for timestamp in range(start, start + 48 * HOUR, HOUR // 4)]
+                    for meter_id in simulator.meter_ids}
+        simulator.stop()
+        boundaries = [start, start + 24 * HOUR, start + 48 * HOUR]
+        report = analytics.fleet_report(readings, boundaries)
+
+        for meter_id, summary in report.items():
+            # The simulated power is a daily sine around its base load
+            power = [reading['values']['power'] for reading in readings[meter_id]]
+            base = (max(power) + min(power)) / 2
+            for day in summary['consumption_kwh'][:1]:
+                self.assertAlmostEqual(day, base * 24 / 1e6, delta=base * 24 / 1e6 * 0.01)
+            self.assertAlmostEqual(summary['peak_kw'], max(power) / 1e6)
+            self.assertAlmostEqual(summary['imbalance'], 0.0, places=3)
+            self.assertEqual(list(summary['feed_in_kwh']), [0.0, 0.0])
@@ -0,0 +1,62 @@
+import json
+import unittest
+from discovergy.api import (Endpoints, check_response, parse_consumer_tokens, parse_tokens,
+                            parse_verifier, sign)
+
+
+BASE_URL = 'https://api.discovergy.com/public/v1'
+
+
+class ApiTestCase(unittest.TestCase):
+    """ Unit tests for module api. """
+
+    def test_endpoints(self):
+        """ Test the URLs of class Endpoints. """
+
+        endpoints = Endpoints(BASE_URL)
+
+        self.assertEqual(endpoints.access_token, BASE_URL + '/oauth1/access_token')
+        self.assertEqual(endpoints.readings('1', 0, None, 'raw'),
+                         BASE_URL + '/readings?meterId=1&from=0&resolution=raw')
+        self.assertEqual(endpoints.disaggregation('1', 0, 10),
+                         BASE_URL + '/disaggregation?meterId=1&from=0&to=10')
+        self.assertEqual(endpoints.path(endpoints.last_reading('1')), '/last_reading')
+
+    def test_sign(self):
+        """ Test function sign(). """
+
+        uri, headers = sign(BASE_URL + '/meters', 'GET', 'key', 'secret',
+                            resource_owner_key='token', resource_owner_secret='token_secret')
+
+        self.assertEqual(uri, BASE_URL + '/meters')
+        self.assertIn('oauth_consumer_key="key"', headers['Authorization'])
+        self.assertIn('oauth_token="token"', headers['Authorization'])
+
+    def test_parse(self):
+        """ Test parsing of the responses of the OAuth workflow. """
+
+        self.assertEqual(parse_consumer_tokens(200, json.dumps({'key': 'k', 'secret': 's'})),
+                         ('k', 's'))
+        self.assertEqual(parse_tokens(200, b'oauth_token=t&oauth_token_secret=s'),
+                         {'token': 't', 'token_secret': 's'})
+        self.assertEqual(parse_verifier(200, b'oauth_verifier=v'), 'v')
+        with self.assertRaisesRegex(ValueError, "Failed to login"):
+            parse_verifier(403, b'')
+        with self.assertRaises(KeyError):
+            parse_tokens(200, b'oauth_token=t')
+
+    def test_check_response(self):
+        """ Test function check_response(). """
+
+        self.assertEqual(check_response(200, b'[1]', json.loads), [1])
+        self.assertEqual(check_response(200, b'[1]'), b'[1]')
+        with self.assertLogs('discovergy.api', 'ERROR'):
+            with self.assertRaisesRegex(ValueError, "status code 404"):
+                check_response(404, b'{"reason": "Not found"}', json.loads)
+        with self.assertLogs('discovergy.api', 'ERROR'):
+            with self.assertRaises(ValueError):
+                check_response(200, b'[1', json.loads)
+
+
+if __name__ == "__main__":
+    unittest.main()
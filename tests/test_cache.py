@@ -0,0 +1,171 @@
+import time
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+from discovergy.cache import ReadingsCache
+from discovergy.discovergy import Discovergy, DAY
+from discovergy.simulator import Simulator
+
+
+HOUR = 60 * 60 * 1000
+METER_ID = '8fa37290c019170f35ae3e4d88abf2b8'
+
+
+def mock_fetch_readings(meter_id, start, end, resolution):
+    """ Mock function Discovergy.fetch_readings() returning one reading per
+    hour of the requested interval including both bounds. """
+
+    return [{'time': t, 'values': {'power': t // HOUR}}
+            for t in range(start - start % HOUR, end + 1, HOUR) if t >= start]
+
+
+class ReadingsCacheTestCase(unittest.TestCase):
+    """ Unit tests for class ReadingsCache. """
+
+    def setUp(self):
+        self.cache = ReadingsCache(':memory:')
+        self.discovergy = Discovergy('TestClient')
+        patcher = mock.patch.object(self.discovergy, 'fetch_readings',
+                                    side_effect=mock_fetch_readings)
+        self.fetch_readings = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.cache.close)
+
+    def test_get_readings(self):
+        """ Test function get_readings() of class ReadingsCache. """
+
+        start = 10 * DAY + 5 * HOUR
+        end = 13 * DAY
+        readings = self.cache.get_readings(self.discovergy, METER_ID, start, end, 'raw')
+
+        # Check one request per day bucket and the requested interval
+        self.assertEqual(self.fetch_readings.call_count, 3)
+        self.assertEqual([reading['time'] for reading in readings],
+                         list(range(start, end, HOUR)))
+
+        # Check covered ranges are served locally
+        self.assertEqual(self.cache.get_readings(self.discovergy, METER_ID, start, end, 'raw'),
+                         readings)
+        self.assertEqual(self.fetch_readings.call_count, 3)
+
+        # Check only missing buckets are fetched
+        self.cache.get_readings(self.discovergy, METER_ID, start, end + 2 * DAY, 'raw')
+        self.assertEqual(self.fetch_readings.call_count, 5)
+        self.assertEqual(self.fetch_readings.call_args[0][1], 14 * DAY)
+
+    def test_open_interval(self):
+        """ Test that buckets near now are always fetched again. """
+
+        start = round(time.time() * 1e3) - 2 * HOUR
+        self.cache.get_readings(self.discovergy, METER_ID, start, None, 'one_hour')
+        self.cache.get_readings(self.discovergy, METER_ID, start, None, 'one_hour')
+
+        self.assertEqual(self.fetch_readings.call_count, 2)
+        self.assertEqual(self.cache.size(), 0)
+
+    def test_invalidate(self):
+        """ Test function invalidate() of class ReadingsCache. """
+
+        self.cache.get_readings(self.discovergy, METER_ID, 0, DAY - 1, 'raw')
+        self.cache.get_readings(self.discovergy, 'other', 0, DAY - 1, 'raw')
+        self.cache.invalidate(METER_ID)
+        self.cache.get_readings(self.discovergy, METER_ID, 0, DAY - 1, 'raw')
+        self.cache.get_readings(self.discovergy, 'other', 0, DAY - 1, 'raw')
+
+        self.assertEqual(self.fetch_readings.call_count, 3)
+
+    def test_eviction(self):
+        """ Test that least recently used buckets are evicted. """
+
+        self.cache.get_readings(self.discovergy, METER_ID, 0, DAY - 1, 'raw')
+        bucket_size = self.cache.size()
+        cache = ReadingsCache(':memory:', max_bytes=2 * bucket_size + bucket_size // 2)
+        self.addCleanup(cache.close)
+
+        cache.get_readings(self.discovergy, METER_ID, 0, DAY - 1, 'raw')
+        cache.get_readings(self.discovergy, METER_ID, DAY, 2 * DAY - 1, 'raw')
+        cache.get_readings(self.discovergy, METER_ID, 0, DAY - 1, 'raw')
+        cache.get_readings(self.discovergy, METER_ID, 2 * DAY, 3 * DAY - 1, 'raw')
+        self.assertEqual(self.fetch_readings.call_count, 4)
+        self.assertTrue(cache.size() < 3 * bucket_size)
+
+        # Check the least recently used bucket was evicted
+        cache.get_readings(self.discovergy, METER_ID, 0, DAY - 1, 'raw')
+        self.assertEqual(self.fetch_readings.call_count, 4)
+        cache.get_readings(self.discovergy, METER_ID, DAY, 2 * DAY - 1, 'raw')
+        self.assertEqual(self.fetch_readings.call_count, 5)
+
+    def test_coarse_resolution(self):
+        """ Test that consecutive missing buckets of coarse resolutions are
+        fetched in one request. """
+
+        start = 10 * DAY
+        end = 400 * DAY
+        readings = self.cache.get_readings(self.discovergy, METER_ID, start, end, 'one_day')
+        self.assertEqual(self.fetch_readings.call_count, 1)
+        self.assertEqual([reading['time'] for reading in readings],
+                         list(range(start, end, HOUR)))
+
+        self.assertEqual(self.cache.get_readings(self.discovergy, METER_ID, start, end,
+                                                 'one_day'), readings)
+        self.assertEqual(self.fetch_readings.call_count, 1)
+
+    def test_failed_request(self):
+        """ Test that failed requests are not cached. """
+
+        self.fetch_readings.side_effect = ValueError("Request failed")
+        self.assertEqual(self.cache.get_readings(self.discovergy, METER_ID, 0, DAY, 'raw'), [])
+        self.assertEqual(self.cache.size(), 0)
+
+
+class ReadingsCacheSimulatorTestCase(unittest.TestCase):
+    """ Unit tests for class ReadingsCache against the simulated API. """
+
+    def test_aligned_interval(self):
+        """ Test that an interval ending on a bucket boundary returns the
+        same readings as a direct request. """
+
+        cache = ReadingsCache(':memory:')
+        self.addCleanup(cache.close)
+        with Simulator(meters=1, interval=60000) as simulator:
+            discovergy = Discovergy('TestClient', base_url=simulator.base_url)
+            discovergy.login('test@test.com', '123test')
+            meter_id = simulator.meter_ids[0]
+
+            readings = discovergy.get_readings(meter_id, DAY, 3 * DAY, 'raw')
+            self.assertEqual(len(readings), 2 * 24 * 60)
+            self.assertEqual(cache.get_readings(discovergy, meter_id, DAY, 3 * DAY, 'raw'),
+                             readings)
+            self.assertEqual(cache.get_readings(discovergy, meter_id, DAY, 3 * DAY, 'raw'),
+                             readings)
+
+    def test_closed_interval(self):
+        """ Test that a closed interval of coarse resolutions is served
+        from the cache on the second call. """
+
+        start = round(datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp() * 1e3)
+        end = round(datetime(2024, 12, 31, 12, tzinfo=timezone.utc).timestamp() * 1e3)
+        cache = ReadingsCache(':memory:')
+        self.addCleanup(cache.close)
+        with Simulator(meters=1) as simulator:
+            discovergy = Discovergy('TestClient', base_url=simulator.base_url)
+            discovergy.login('test@test.com', '123test')
+            meter_id = simulator.meter_ids[0]
+
+            for resolution in ['one_day', 'one_week', 'one_month']:
+                readings = cache.get_readings(discovergy, meter_id, start, end, resolution)
+                self.assertTrue(readings)
+                self.assertEqual(readings,
+                                 discovergy.get_readings(meter_id, start, end, resolution))
+
+                # Check the second call sends no requests
+                requests = simulator.requests['/readings']
+                self.assertEqual(cache.get_readings(discovergy, meter_id, start, end,
+                                                    resolution), readings)
+                self.assertEqual(simulator.requests['/readings'], requests)
+
+        self.assertTrue(cache.size() > 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
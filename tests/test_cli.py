@@ -0,0 +1,96 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+from discovergy import cli
+from discovergy.simulator import Simulator
+
+
+class CliTestCase(unittest.TestCase):
+    """ Unit tests for the command line client. """
+
+    def setUp(self):
+        self.simulator = Simulator(meters=3)
+        self.simulator.start()
+        self.addCleanup(self.simulator.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.environment = {'DISCOVERGY_EMAIL': 'test@test.com',
+                            'DISCOVERGY_PASSWORD': '123test',
+                            'DISCOVERGY_TOKENS': os.path.join(directory.name, 'tokens.json')}
+
+    def run_cli(self, *argv, password=True):
+        environment = dict(self.environment)
+        if not password:
+            del environment['DISCOVERGY_PASSWORD']
+        output = io.StringIO()
+        with mock.patch.dict(os.environ, environment), redirect_stdout(output), \
+                mock.patch('sys.stdin', io.StringIO()):
+            status = cli.main(['--base-url', self.simulator.base_url] + list(argv))
+        return status, [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_last_readings(self):
+        """ Test that last-readings uses cached tokens. """
+
+        self.assertEqual(self.run_cli('login'), (0, []))
+        self.assertEqual(self.simulator.requests['/oauth1/access_token'], 1)
+
+        status, lines = self.run_cli('last-readings', *self.simulator.meter_ids, password=False)
+        self.assertEqual(status, 0)
+        self.assertEqual([line['meterId'] for line in lines], self.simulator.meter_ids)
+        self.assertEqual(set(lines[0]), {'meterId', 'time', 'values'})
+        self.assertIn('power', lines[0]['values'])
+        self.assertEqual(self.simulator.requests['/oauth1/access_token'], 1)
+
+        status, lines = self.run_cli('readings', self.simulator.meter_ids[0], '--from', '0',
+                                     '--to', str(60 * 60 * 1000), '--resolution', 'three_minutes')
+        self.assertEqual((status, len(lines)), (0, 20))
+
+    def test_rejected_tokens(self):
+        """ Test that rejected tokens are renewed if a password is set. """
+
+        self.run_cli('login')
+        self.simulator.expire_tokens()
+        status, lines = self.run_cli('meters')
+        self.assertEqual((status, len(lines)), (0, 3))
+        self.assertEqual(self.simulator.requests['/oauth1/access_token'], 2)
+
+        self.simulator.expire_tokens()
+        self.assertEqual(self.run_cli('meters', password=False), (1, []))
+
+    def test_tokens_rejected_during_command(self):
+        """ Test that only the rejected request is sent again, so no line is
+        written twice. """
+
+        self.run_cli('login')
+        write = cli.write
+
+        def expire_after_first_line(value):
+            write(value)
+            if value['meterId'] == self.simulator.meter_ids[0]:
+                self.simulator.expire_tokens()
+
+        with mock.patch.object(cli, 'write', side_effect=expire_after_first_line):
+            status, lines = self.run_cli('last-readings', '--max-workers', '1',
+                                         *self.simulator.meter_ids)
+        self.assertEqual(status, 0)
+        self.assertEqual([line['meterId'] for line in lines], self.simulator.meter_ids)
+        self.assertEqual(self.simulator.requests['/oauth1/access_token'], 2)
+
+    def test_lazy_imports(self):
+        """ Test that importing the client does not import requests. """
+
+        code = "import sys, discovergy.cli; print(sorted({'requests', 'requests_oauthlib', " \
+               "'oauthlib', 'urllib3'} & set(sys.modules)))"
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+        self.assertEqual(output.stdout.strip(), '[]')
+
+
+if __name__ == "__main__":
+    unittest.main()
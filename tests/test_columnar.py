@@ -0,0 +1,50 @@
+import unittest
+from discovergy.columnar import ColumnarReadings
+from tests.test_discovergy import READINGS
+
+
+class ColumnarReadingsTestCase(unittest.TestCase):
+    """ Unit tests for class ColumnarReadings. """
+
+    def test_from_readings(self):
+        """ Test function from_readings() of class ColumnarReadings. """
+
+        columns = ColumnarReadings.from_readings(READINGS)
+
+        # Check column types
+        self.assertEqual(columns.time.typecode, 'q')
+        self.assertEqual(columns['energy'].typecode, 'q')
+
+        # Check column values
+        self.assertEqual(len(columns), 2)
+        self.assertEqual(list(columns['time']), [1574244000000, 1574247600000])
+        self.assertEqual(list(columns['power3']), [-27279, -25192])
+        self.assertEqual(list(columns['energy']), [2180256872214000] * 2)
+        self.assertEqual(columns.nbytes, 2 * 7 * 8)
+        self.assertEqual(columns.to_readings(), READINGS)
+
+    def test_fieldnames(self):
+        """ Test that only the requested fields are kept. """
+
+        columns = ColumnarReadings.from_readings(READINGS, ['power', 'voltage1'])
+
+        self.assertEqual(columns.fieldnames, ['power', 'voltage1'])
+        self.assertEqual(list(columns['power']), [0, 0])
+
+        # Check missing values switch the column to float NaN
+        self.assertEqual(columns['voltage1'].typecode, 'd')
+        self.assertTrue(all(value != value for value in columns['voltage1']))
+
+    def test_float_values(self):
+        """ Test that float values switch the column to float64. """
+
+        readings = [{'time': 1, 'values': {'voltage': 230}},
+                    {'time': 2, 'values': {'voltage': 229.5}}]
+        columns = ColumnarReadings.from_readings(readings)
+
+        self.assertEqual(columns['voltage'].typecode, 'd')
+        self.assertEqual(list(columns['voltage']), [230.0, 229.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
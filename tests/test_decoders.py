@@ -0,0 +1,66 @@
+import json
+import logging
+import time
+import unittest
+from discovergy.decoders import get_decoder, stdlib_loads
+
+
+logger = logging.getLogger(__name__)
+
+
+def available_decoders():
+    """ Return the installed decoders by name. """
+
+    decoders = {}
+    for name in ('orjson', 'ujson', 'json'):
+        try:
+            decoders[name] = get_decoder(name)
+        except ImportError:
+            pass
+    return decoders
+
+
+class DecodersTestCase(unittest.TestCase):
+    """ Unit tests for module decoders. """
+
+    def test_get_decoder(self):
+        """ Test function get_decoder(). """
+
+        self.assertIs(get_decoder('json'), stdlib_loads)
+        self.assertIn(get_decoder(), available_decoders().values())
+        with self.assertRaises(ValueError):
+            get_decoder('simplejson')
+
+        content = json.dumps({'values': {'power': -12345, 'voltage1': 230.5},
+                              'name': 'Spülmaschine'}, ensure_ascii=False).encode('utf-8')
+        for name, decoder in available_decoders().items():
+            self.assertEqual(decoder(content), json.loads(content.decode('utf-8')), name)
+            with self.assertRaises(ValueError):
+                decoder(b'[{"time": 1')
+
+    def test_benchmark(self):
+        """ Compare the installed decoders on a day of raw readings, the
+        largest response of the API. """
+
+        readings = [{'time': 1546300800000 + i * 2000,
+                     'values': {'power': 123456 + i, 'power1': 41152, 'power2': 41152,
+                                'power3': 41152, 'energy': 35000000000 + i * 70000,
+                                'energyOut': 0, 'voltage1': 230100, 'voltage2': 229800,
+                                'voltage3': 230400}}
+                    for i in range(43200)]
+        content = json.dumps(readings).encode('utf-8')
+
+        timings = {}
+        for name, decoder in available_decoders().items():
+            self.assertEqual(decoder(content), readings, name)
+            best = None
+            for _ in range(3):
+                started = time.perf_counter()
+                decoder(content)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+            logger.info("%s decodes %d bytes in %.1f ms", name, len(content), best * 1000)
+
+        if 'orjson' in timings:
+            self.assertLess(timings['orjson'], timings['json'])
@@ -0,0 +1,53 @@
+import unittest
+from discovergy.discovergy import DAY, DISAGGREGATION_WINDOW, Discovergy
+from discovergy.disaggregation import DisaggregationMatrix
+from discovergy.simulator import Simulator
+
+
+CHUNKS = [{'1574101800000': {'Grundlast-1': 2500000, 'Waschmaschine-1': 0},
+           '1574100900000': {'Grundlast-1': 2400000, 'Spülmaschine-1': 700000}},
+          {'1574102700000': {'Grundlast-1': 2600000, 'Waschmaschine-1': 1200000}}]
+
+
+class DisaggregationMatrixTestCase(unittest.TestCase):
+    """ Unit tests for class DisaggregationMatrix. """
+
+    def test_from_chunks(self):
+        """ Test function from_chunks() of class DisaggregationMatrix. """
+
+        matrix = DisaggregationMatrix.from_chunks(CHUNKS)
+        self.assertEqual(matrix.shape, (3, 3))
+        self.assertEqual(list(matrix.time), [1574100900000, 1574101800000, 1574102700000])
+        self.assertEqual(matrix.devices, ('Grundlast-1', 'Spülmaschine-1', 'Waschmaschine-1'))
+        self.assertEqual(list(matrix.row(0)), [2400000, 700000, 0])
+        self.assertEqual(list(matrix.column('Waschmaschine-1')), [0, 0, 1200000])
+        self.assertEqual(matrix.values.typecode, 'q')
+
+        self.assertEqual(matrix.totals(), {'Grundlast-1': 7500000, 'Spülmaschine-1': 700000,
+                                           'Waschmaschine-1': 1200000})
+        self.assertAlmostEqual(sum(matrix.shares().values()), 1.0)
+        self.assertEqual(DisaggregationMatrix.from_dict(matrix.to_dict()).to_dict(),
+                         matrix.to_dict())
+
+    def test_empty(self):
+        """ Test an empty DisaggregationMatrix. """
+
+        matrix = DisaggregationMatrix.from_dict({})
+        self.assertEqual(matrix.shape, (0, 0))
+        self.assertEqual(matrix.totals(), {})
+        self.assertEqual(matrix.to_dict(), {})
+
+    def test_get_disaggregation_matrix(self):
+        """ Test function get_disaggregation_matrix() of class Discovergy. """
+
+        with Simulator(meters=1) as simulator:
+            discovergy = Discovergy('TestClient', base_url=simulator.base_url)
+            discovergy.login('test@test.com', '123test')
+            meter_id = simulator.meter_ids[0]
+            end = DAY + 2 * DISAGGREGATION_WINDOW + DAY
+            matrix = discovergy.get_disaggregation_matrix(meter_id, DAY, end)
+
+            self.assertEqual(simulator.requests['/disaggregation'], 3)
+            self.assertEqual(len(matrix), (end - DAY) // (15 * 60 * 1000))
+            self.assertEqual(list(matrix.time), sorted(set(matrix.time)))
+            self.assertEqual(matrix.to_dict(), discovergy.get_disaggregation(meter_id, DAY, end))
@@ -1,9 +1,15 @@
 import unittest
 from unittest import mock
 import json
+import time
 from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qs
 from requests_oauthlib import OAuth1Session
-from discovergy.discovergy import Discovergy
+from discovergy.tokens import MemoryTokenStore
+from discovergy.transport import Transport
+from discovergy.ratelimit import RateLimiter
+from discovergy.metadata import MetadataCache
+from discovergy.discovergy import Discovergy, retry_after, DAY
 
 
 MOCK_RESPONSE_POST = '{"key":"9srhl1op4jemrcpafqpr2hhcq9",\
@@ -69,13 +75,25 @@ READINGS = [{'time': 1574244000000, 'values': {'power': 0, 'power3': -27279,
 class MockResponse:
     """ Mock class requests.models.Response for unit testing"""
 
-    def __init__(self, content, status_code):
+    def __init__(self, content, status_code, headers=None):
         self.content = content
         self.status_code = status_code
+        self.headers = headers or {}
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
 
     def json(self):
         return json.loads(self.content)
 
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
 
 def mock_requests_post(*args, **kwargs):
     """ Mock function requests.post() for Discovergy:_fetch_consumer_tokens(). """
@@ -134,6 +152,30 @@ def mock_oauth1session_get_readings(*args, **kwargs):
     return MockResponse(MOCK_RESPONSE_READINGS.encode(), 200)
 
 
+def mock_oauth1session_get_readings_range(url, *args, **kwargs):
+    """ Mock function OAuth1Session.get() for
+    Discovergy:get_readings_range(), returning one reading per hour of the
+    requested interval including both bounds. """
+
+    query = parse_qs(urlparse(url).query)
+    start = int(query['from'][0])
+    end = int(query['to'][0])
+    hour = 60 * 60 * 1000
+    readings = [{'time': t, 'values': {'power': t // hour}}
+                for t in range(start - start % hour, end + 1, hour) if t >= start]
+    return MockResponse(json.dumps(readings).encode(), 200)
+
+
+def mock_oauth1session_get_last_readings(url, *args, **kwargs):
+    """ Mock function OAuth1Session.get() for
+    Discovergy:get_last_readings(), failing for meter ids starting with
+    'bad'. """
+
+    if 'meterId=bad' in url:
+        return MockResponse(b'{"reason": "Meter not found"}', 404)
+    return MockResponse(MOCK_RESPONSE_READING.encode(), 200)
+
+
 class DiscovergyTestCase(unittest.TestCase):
     """ Unit tests for class Discovergy. """
 
@@ -160,7 +202,7 @@ class DiscovergyTestCase(unittest.TestCase):
         self.assertEqual(d._oauth_key, None)
         self.assertEqual(d._oauth_secret, None)
 
-    @mock.patch('requests.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
     def test_fetch_consumer_tokens(self, post):
         """ Test function _fetch_consumer_token() of class Discovergy. """
 
@@ -176,7 +218,7 @@ class DiscovergyTestCase(unittest.TestCase):
         self.assertEqual(d._oauth_key, response.json()['key'])
         self.assertEqual(d._oauth_secret, response.json()['secret'])
 
-    @mock.patch('requests.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
                 side_effect=mock_oauth1session_fetch_request_token)
     def test_fetch_request_token(self, post, fetch_request_token):
@@ -211,7 +253,7 @@ class DiscovergyTestCase(unittest.TestCase):
         self.assertTrue(isinstance(
             oauth_token_response.get('oauth_token_secret'), str))
 
-    @mock.patch('requests.get', side_effect=mock_requests_get)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
     def test_authorize_request_token(self, get):
         """ Test function _authorize_request_token() of class Discovergy. """
 
@@ -225,7 +267,7 @@ class DiscovergyTestCase(unittest.TestCase):
         # Check verifier value
         self.assertEqual(verifier, '3bfea9ada8c144afb81b5992b992303e')
 
-    @mock.patch('requests.get', side_effect=mock_requests_get)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
                 side_effect=mock_oauth1session_fetch_access_token)
     def test_fetch_access_token(self, get, fetch_access_token):
@@ -244,8 +286,8 @@ class DiscovergyTestCase(unittest.TestCase):
         self.assertEqual(access_token, dict(token='2a28117b269e4f99893e9f758136becc',
                                             token_secret='b75c7fc5142842afb3fd6686cacb675b'))
 
-    @mock.patch('requests.post', side_effect=mock_requests_post)
-    @mock.patch('requests.get', side_effect=mock_requests_get)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
                 side_effect=mock_oauth1session_fetch_access_token)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
@@ -264,8 +306,8 @@ class DiscovergyTestCase(unittest.TestCase):
 
     @mock.patch('requests_oauthlib.OAuth1Session.get',
                 side_effect=mock_oauth1session_get_meters)
-    @mock.patch('requests.post', side_effect=mock_requests_post)
-    @mock.patch('requests.get', side_effect=mock_requests_get)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
                 side_effect=mock_oauth1session_fetch_access_token)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
@@ -287,8 +329,8 @@ class DiscovergyTestCase(unittest.TestCase):
 
     @mock.patch('requests_oauthlib.OAuth1Session.get',
                 side_effect=mock_oauth1session_get_fieldnames)
-    @mock.patch('requests.post', side_effect=mock_requests_post)
-    @mock.patch('requests.get', side_effect=mock_requests_get)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
                 side_effect=mock_oauth1session_fetch_access_token)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
@@ -309,8 +351,8 @@ class DiscovergyTestCase(unittest.TestCase):
 
     @mock.patch('requests_oauthlib.OAuth1Session.get',
                 side_effect=mock_oauth1session_get_reading)
-    @mock.patch('requests.post', side_effect=mock_requests_post)
-    @mock.patch('requests.get', side_effect=mock_requests_get)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
                 side_effect=mock_oauth1session_fetch_access_token)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
@@ -331,8 +373,8 @@ class DiscovergyTestCase(unittest.TestCase):
 
     @mock.patch('requests_oauthlib.OAuth1Session.get',
                 side_effect=mock_oauth1session_get_disaggregation)
-    @mock.patch('requests.post', side_effect=mock_requests_post)
-    @mock.patch('requests.get', side_effect=mock_requests_get)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
                 side_effect=mock_oauth1session_fetch_access_token)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
@@ -357,8 +399,8 @@ class DiscovergyTestCase(unittest.TestCase):
 
     @mock.patch('requests_oauthlib.OAuth1Session.get',
                 side_effect=mock_oauth1session_get_readings)
-    @mock.patch('requests.post', side_effect=mock_requests_post)
-    @mock.patch('requests.get', side_effect=mock_requests_get)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
                 side_effect=mock_oauth1session_fetch_access_token)
     @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
@@ -379,6 +421,315 @@ class DiscovergyTestCase(unittest.TestCase):
         # Check response values
         self.assertEqual(measurement, READINGS)
 
+    @mock.patch('requests_oauthlib.OAuth1Session.get',
+                side_effect=mock_oauth1session_get_readings_range)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
+                side_effect=mock_oauth1session_fetch_access_token)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
+                side_effect=mock_oauth1session_fetch_request_token)
+    def test_get_readings_range(self, fetch_request_token, fetch_access_token,
+                                get, post, get_readings):
+        """ Test function get_readings_range() of class Discovergy. """
+
+        d = Discovergy('TestClient')
+        login = d.login('test@test.com', '123test')
+        measurements = d.get_readings_range(METER_ID, 0, 3 * DAY, 'raw',
+                                            max_workers=2)
+
+        # One request per day of raw data
+        self.assertEqual(get_readings.call_count, 3)
+
+        # Check response type
+        self.assertTrue(isinstance(measurements, list))
+
+        # Check response values: ordered, without the duplicated window bounds
+        times = [measurement['time'] for measurement in measurements]
+        self.assertEqual(times, list(range(0, 3 * DAY + 1, 60 * 60 * 1000)))
+
+    @mock.patch('requests_oauthlib.OAuth1Session.get',
+                side_effect=mock_oauth1session_get_readings)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
+                side_effect=mock_oauth1session_fetch_access_token)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
+                side_effect=mock_oauth1session_fetch_request_token)
+    def test_iter_readings(self, fetch_request_token, fetch_access_token,
+                           get, post, get_readings):
+        """ Test function iter_readings() of class Discovergy. """
+
+        d = Discovergy('TestClient')
+        login = d.login('test@test.com', '123test')
+
+        # Check single measurements
+        measurements = list(d.iter_readings(METER_ID, 0, None, 'one_hour',
+                                            chunk_size=16))
+        self.assertEqual(measurements, READINGS)
+        self.assertTrue(get_readings.call_args[1]['stream'])
+
+        # Check batches
+        batches = list(d.iter_readings(METER_ID, 0, None, 'one_hour',
+                                       batch_size=1))
+        self.assertEqual(batches, [[READINGS[0]], [READINGS[1]]])
+
+    @mock.patch('requests_oauthlib.OAuth1Session.get',
+                side_effect=mock_oauth1session_get_last_readings)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
+                side_effect=mock_oauth1session_fetch_access_token)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
+                side_effect=mock_oauth1session_fetch_request_token)
+    def test_get_last_readings(self, fetch_request_token, fetch_access_token,
+                               get, post, get_last_readings):
+        """ Test function get_last_readings() of class Discovergy. """
+
+        d = Discovergy('TestClient')
+        login = d.login('test@test.com', '123test')
+        meter_ids = ['meter%d' % i for i in range(20)] + ['bad1']
+        readings = d.get_last_readings(meter_ids, max_workers=16)
+
+        # Check result type
+        self.assertTrue(isinstance(readings, dict))
+
+        # Check result values
+        self.assertEqual(readings, {'meter%d' % i: READING for i in range(20)})
+        self.assertEqual(list(readings.errors.keys()), ['bad1'])
+        self.assertTrue(isinstance(readings.errors['bad1'], ValueError))
+        self.assertTrue(readings.elapsed >= 0)
+
+        # Check that the connection pool was grown for the workers
+        adapter = d._discovergy_oauth.get_adapter('https://')
+        self.assertEqual(adapter.poolmanager.connection_pool_kw['maxsize'], 16)
+
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
+                side_effect=mock_oauth1session_fetch_access_token)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
+                side_effect=mock_oauth1session_fetch_request_token)
+    def test_login_token_store(self, fetch_request_token, fetch_access_token,
+                               get, post):
+        """ Test function login() of class Discovergy with a token store. """
+
+        store = MemoryTokenStore()
+        d = Discovergy('TestClient', token_store=store)
+        self.assertTrue(d.login('test@test.com', '123test'))
+        self.assertEqual(post.call_count, 1)
+
+        # Check saved tokens
+        self.assertEqual(store.load('TestClient:test@test.com'),
+                         dict(consumer_key='9srhl1op4jemrcpafqpr2hhcq9',
+                              consumer_secret='i5nu32jmjsjunttq0lpi4r2qo0',
+                              token=MOCK_ACCESS_TOKEN['oauth_token'],
+                              token_secret=MOCK_ACCESS_TOKEN['oauth_token_secret']))
+
+        # Check a second client reuses the tokens without network calls
+        d = Discovergy('TestClient', token_store=store)
+        self.assertTrue(d.login('test@test.com', '123test'))
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(fetch_access_token.call_count, 1)
+        self.assertEqual(d._oauth_key, '9srhl1op4jemrcpafqpr2hhcq9')
+
+        # Check rejected tokens trigger the full workflow once
+        responses = [MockResponse(b'Unauthorized', 401),
+                     MockResponse(MOCK_RESPONSE_READING.encode(), 200)]
+        with mock.patch('requests_oauthlib.OAuth1Session.get',
+                        side_effect=responses):
+            self.assertEqual(d.get_last_reading(METER_ID), READING)
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(fetch_access_token.call_count, 2)
+
+    @mock.patch('requests_oauthlib.OAuth1Session.get',
+                side_effect=mock_oauth1session_get_readings)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
+                side_effect=mock_oauth1session_fetch_access_token)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
+                side_effect=mock_oauth1session_fetch_request_token)
+    def test_get_readings_columnar(self, fetch_request_token, fetch_access_token,
+                                   get, post, get_readings):
+        """ Test function get_readings_columnar() of class Discovergy. """
+
+        d = Discovergy('TestClient')
+        login = d.login('test@test.com', '123test')
+        columns = d.get_readings_columnar(METER_ID, 0, None, 'one_hour',
+                                          fieldnames=FIELDNAMES)
+
+        # Check result values
+        self.assertEqual(columns.fieldnames, FIELDNAMES)
+        self.assertEqual(list(columns.time), [reading['time'] for reading in READINGS])
+        self.assertEqual(list(columns['power2']), [-2437, -2443])
+
+    @mock.patch('requests_oauthlib.OAuth1Session.get',
+                side_effect=mock_oauth1session_get_readings_range)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
+                side_effect=mock_oauth1session_fetch_access_token)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
+                side_effect=mock_oauth1session_fetch_request_token)
+    def test_get_readings_resampled(self, fetch_request_token, fetch_access_token,
+                                    get, post, get_readings):
+        """ Test function get_readings_resampled() of class Discovergy. """
+
+        d = Discovergy('TestClient')
+        login = d.login('test@test.com', '123test')
+        hour = 60 * 60 * 1000
+        columns = d.get_readings_resampled(METER_ID, hour, 6 * hour, 2 * hour)
+
+        # Check the coarsest exact resolution and the aligned start were requested
+        self.assertIn('from=0&to=%d&resolution=one_hour' % (7 * hour),
+                      get_readings.call_args[0][0])
+
+        # Check result values of complete buckets, 'power' is the hour index
+        self.assertEqual(list(columns.time), [0, 2 * hour, 4 * hour])
+        self.assertEqual(list(columns['power']), [0.5, 2.5, 4.5])
+
+    @mock.patch('requests_oauthlib.OAuth1Session.get',
+                side_effect=mock_oauth1session_get_reading)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
+                side_effect=mock_oauth1session_fetch_access_token)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
+                side_effect=mock_oauth1session_fetch_request_token)
+    def test_transport(self, fetch_request_token, fetch_access_token, get, post,
+                       get_reading):
+        """ Test that class Discovergy sends all requests through its
+        transport with the configured timeouts. """
+
+        transport = Transport(pool_maxsize=4)
+        d = Discovergy('TestClient', transport=transport, timeout=5)
+
+        # Check the pool can grow before login
+        d._ensure_pool_size(8)
+        self.assertEqual(transport.pool_maxsize, 8)
+        login = d.login('test@test.com', '123test')
+
+        # Check auth requests
+        self.assertEqual(post.call_args[1]['timeout'], 5)
+        self.assertEqual(get.call_args[1]['timeout'], 5)
+        self.assertEqual(fetch_access_token.call_args[1]['timeout'], 5)
+
+        # Check data requests share the connection pool
+        self.assertIs(d._discovergy_oauth.get_adapter('https://'), transport.adapter)
+        d.get_last_reading(METER_ID)
+        self.assertEqual(get_reading.call_args[1]['timeout'], 5)
+        d.get_last_reading(METER_ID, timeout=1)
+        self.assertEqual(get_reading.call_args[1]['timeout'], 1)
+
+    @mock.patch('requests_oauthlib.OAuth1Session.get',
+                side_effect=mock_oauth1session_get_last_readings)
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
+                side_effect=mock_oauth1session_fetch_access_token)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
+                side_effect=mock_oauth1session_fetch_request_token)
+    def test_metrics(self, fetch_request_token, fetch_access_token, get, post,
+                     get_last_readings):
+        """ Test that class Discovergy records metrics of its requests. """
+
+        d = Discovergy('TestClient')
+        login = d.login('test@test.com', '123test')
+        events = []
+        d.metrics.add_hook(events.append)
+        d.get_last_reading(METER_ID)
+        d.get_last_reading('bad1')
+        metrics = d.metrics.to_dict()
+
+        # Check recorded values
+        self.assertEqual(metrics['/oauth1']['requests'], 1)
+        self.assertEqual(metrics['/last_reading']['requests'], 2)
+        self.assertEqual(metrics['/last_reading']['failures'], 1)
+        self.assertEqual(metrics['/last_reading']['bytes'],
+                         len(MOCK_RESPONSE_READING.encode()) +
+                         len(b'{"reason": "Meter not found"}'))
+        self.assertEqual([event['meter_id'] for event in events], [METER_ID, 'bad1'])
+        self.assertEqual([event['status'] for event in events], [200, 404])
+
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
+                side_effect=mock_oauth1session_fetch_access_token)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
+                side_effect=mock_oauth1session_fetch_request_token)
+    def test_throttling(self, fetch_request_token, fetch_access_token, get, post):
+        """ Test that class Discovergy retries 429 responses after
+        Retry-After and informs the rate limiter. """
+
+        limiter = RateLimiter(rate=100)
+        d = Discovergy('TestClient', rate_limiter=limiter)
+        login = d.login('test@test.com', '123test')
+        responses = [MockResponse(b'Too Many Requests', 429, {'Retry-After': '0.05'}),
+                     MockResponse(MOCK_RESPONSE_READING.encode(), 200)]
+
+        with mock.patch('requests_oauthlib.OAuth1Session.get',
+                        side_effect=responses) as get_reading:
+            started = time.monotonic()
+            measurement = d.get_last_reading(METER_ID)
+
+        self.assertEqual(measurement, READING)
+        self.assertEqual(get_reading.call_count, 2)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(d.metrics.to_dict()['/last_reading']['retries'], 1)
+        self.assertLess(limiter.rate, 100)
+
+    def test_retry_after(self):
+        """ Test function retry_after(). """
+
+        self.assertEqual(retry_after(MockResponse(b'', 429, {'Retry-After': '3'})), 3)
+        self.assertEqual(retry_after(MockResponse(b'', 429)), None)
+        self.assertEqual(retry_after(MockResponse(b'', 429, {'Retry-After': 'soon'})), None)
+        self.assertEqual(retry_after(MockResponse(
+            b'', 429, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})), 0)
+
+    @mock.patch('requests.Session.post', side_effect=mock_requests_post)
+    @mock.patch('requests.Session.get', side_effect=mock_requests_get)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_access_token',
+                side_effect=mock_oauth1session_fetch_access_token)
+    @mock.patch('requests_oauthlib.OAuth1Session.fetch_request_token',
+                side_effect=mock_oauth1session_fetch_request_token)
+    def test_metadata_cache(self, fetch_request_token, fetch_access_token, get, post):
+        """ Test that class Discovergy serves metadata from its cache. """
+
+        d = Discovergy('TestClient', metadata_cache=MetadataCache())
+        login = d.login('test@test.com', '123test')
+
+        def mock_get(url, *args, **kwargs):
+            if '/meters' in url:
+                return mock_oauth1session_get_meters()
+            return mock_oauth1session_get_fieldnames()
+
+        with mock.patch('requests_oauthlib.OAuth1Session.get',
+                        side_effect=mock_get) as get_metadata:
+            meters = d.get_meters()
+            self.assertEqual(d.get_meters(), meters)
+            self.assertEqual(get_metadata.call_count, 1)
+
+            # Check prefetching only requests meters missing from the cache
+            self.assertEqual(d.get_fieldnames_for_meter(METER_ID), FIELDNAMES)
+            fieldnames = d.prefetch_fieldnames([METER_ID, 'meter1', 'meter2'])
+            self.assertEqual(fieldnames, {METER_ID: FIELDNAMES, 'meter1': FIELDNAMES,
+                                          'meter2': FIELDNAMES})
+            self.assertEqual(get_metadata.call_count, 4)
+            self.assertEqual(d.get_fieldnames_for_meter('meter2'), FIELDNAMES)
+            self.assertEqual(get_metadata.call_count, 4)
+
+            # Check invalidation
+            d.invalidate_metadata('meter2')
+            d.get_fieldnames_for_meter('meter2')
+            d.get_fieldnames_for_meter('meter1')
+            self.assertEqual(get_metadata.call_count, 5)
+            d.invalidate_metadata()
+            d.get_meters()
+            d.get_fieldnames_for_meter('meter1')
+            self.assertEqual(get_metadata.call_count, 7)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,113 @@
+import csv
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from array import array
+from discovergy.columnar import ColumnarReadings
+from discovergy.discovergy import DAY, Discovergy
+from discovergy.export import default_format, export_readings, partition_path, write_parquet
+from discovergy.simulator import Simulator
+
+
+class ExportTestCase(unittest.TestCase):
+    """ Unit tests for module export. """
+
+    def setUp(self):
+        self.simulator = Simulator(meters=2, interval=60000)
+        self.simulator.start()
+        self.addCleanup(self.simulator.stop)
+        self.discovergy = Discovergy('TestClient', base_url=self.simulator.base_url)
+        self.discovergy.login('test@test.com', '123test')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_export_csv(self):
+        """ Test function export_readings() writing CSV files. """
+
+        result = export_readings(self.discovergy, self.simulator.meter_ids, DAY - 1,
+                                 4 * DAY + 1, 'fifteen_minutes', self.directory, 'csv')
+        self.assertEqual(result, {'written': 6, 'skipped': 0, 'failed': []})
+
+        path = partition_path(self.directory, self.simulator.meter_ids[1], 2 * DAY, 'csv')
+        self.assertTrue(path.endswith(os.path.join('date=1970-01-03', 'readings.csv')))
+        with open(path, newline='') as csv_file:
+            rows = list(csv.reader(csv_file))
+        self.assertEqual(rows[0][:3], ['time', 'energy', 'energyOut'])
+        self.assertEqual(len(rows), 1 + 96)
+        self.assertEqual(int(rows[1][0]), 2 * DAY)
+        self.assertEqual(int(rows[-1][0]), 3 * DAY - 15 * 60000)
+
+        # Readings of a partition match a direct request
+        readings = self.discovergy.get_readings(self.simulator.meter_ids[1], 2 * DAY, 3 * DAY,
+                                                'fifteen_minutes')
+        self.assertEqual([int(row[1]) for row in rows[1:]],
+                         [reading['values']['energy'] for reading in readings])
+
+    def test_resume(self):
+        """ Test that an interrupted export only fetches missing partitions. """
+
+        meter_id = self.simulator.meter_ids[0]
+        iter_readings = self.discovergy.iter_readings
+
+        def fail_on_third_day(meter_id, start, end, resolution):
+            for reading in iter_readings(meter_id, start, end, resolution):
+                if reading['time'] >= 3 * DAY:
+                    raise ValueError("Connection lost")
+                yield reading
+
+        with mock.patch.object(self.discovergy, 'iter_readings',
+                               side_effect=fail_on_third_day):
+            result = export_readings(self.discovergy, [meter_id], DAY, 5 * DAY, 'raw',
+                                     self.directory, 'csv')
+        self.assertEqual(result['written'], 2)
+        self.assertEqual(result['failed'], [(meter_id, 3 * DAY), (meter_id, 4 * DAY)])
+
+        requests = self.simulator.requests['/readings']
+        result = export_readings(self.discovergy, [meter_id], DAY, 5 * DAY, 'raw',
+                                 self.directory, 'csv')
+        self.assertEqual(result, {'written': 2, 'skipped': 2, 'failed': []})
+        self.assertEqual(self.simulator.requests['/readings'] - requests, 2)
+
+    def test_export_parquet(self):
+        """ Test function export_readings() writing Parquet files. """
+
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            self.assertEqual(default_format(), 'csv')
+            self.skipTest("pyarrow is not installed")
+
+        meter_id = self.simulator.meter_ids[0]
+        export_readings(self.discovergy, [meter_id], DAY, 2 * DAY, 'one_hour', self.directory)
+        table = pyarrow.parquet.read_table(partition_path(self.directory, meter_id, DAY,
+                                                          'parquet'))
+        self.assertEqual(table.num_rows, 24)
+        self.assertEqual(table.column_names[:2], ['time', 'energy'])
+
+    def test_write_parquet(self):
+        """ Test that function write_parquet() hands the column buffers to
+        pyarrow without copying them. """
+
+        columns = ColumnarReadings(['energy', 'power'])
+        columns.time = array('q', [0, 60000])
+        columns.fields['energy'] = array('q', [10, 20])
+        columns.fields['power'] = array('d', [1.5, float('nan')])
+        pyarrow = mock.MagicMock()
+        with mock.patch.dict(sys.modules, {'pyarrow': pyarrow,
+                                           'pyarrow.parquet': pyarrow.parquet}):
+            write_parquet(columns, 'readings.parquet')
+
+        buffers = [call[0][0] for call in pyarrow.py_buffer.call_args_list]
+        self.assertEqual([id(buffer) for buffer in buffers],
+                         [id(columns.time), id(columns['energy']), id(columns['power'])])
+        data_types = [call[0][0] for call in pyarrow.Array.from_buffers.call_args_list]
+        self.assertEqual(data_types, [pyarrow.timestamp.return_value, pyarrow.int64.return_value,
+                                      pyarrow.float64.return_value])
+        pyarrow.timestamp.assert_called_once_with('ms', tz='UTC')
+        self.assertEqual(pyarrow.Table.from_arrays.call_args[1]['names'],
+                         ['time', 'energy', 'power'])
+        pyarrow.parquet.write_table.assert_called_once_with(
+            pyarrow.Table.from_arrays.return_value, 'readings.parquet')
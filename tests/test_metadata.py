@@ -0,0 +1,51 @@
+import os
+import tempfile
+import time
+import unittest
+from discovergy.metadata import MetadataCache
+
+
+class MetadataCacheTestCase(unittest.TestCase):
+    """ Unit tests for class MetadataCache. """
+
+    def test_get_set(self):
+        """ Test functions get() and set() of class MetadataCache. """
+
+        cache = MetadataCache(ttl=0.05)
+        self.assertIsNone(cache.get('TestClient/test@test.com/meters'))
+
+        cache.set('TestClient/test@test.com/meters', [{'meterId': 'abc'}])
+        self.assertEqual(cache.get('TestClient/test@test.com/meters'), [{'meterId': 'abc'}])
+
+        # Check values expire
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('TestClient/test@test.com/meters'))
+
+    def test_invalidate(self):
+        """ Test functions delete() and invalidate() of class MetadataCache. """
+
+        cache = MetadataCache()
+        cache.set_many({'a/field_names/1': ['power'], 'a/field_names/12': ['energy'],
+                        'a/meters': [], 'b/meters': []})
+
+        cache.delete('a/field_names/1')
+        self.assertIsNone(cache.get('a/field_names/1'))
+        self.assertEqual(cache.get('a/field_names/12'), ['energy'])
+
+        cache.invalidate('a/')
+        self.assertIsNone(cache.get('a/meters'))
+        self.assertEqual(cache.get('b/meters'), [])
+
+    def test_persistence(self):
+        """ Test that a cache with path survives a restart. """
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'metadata.json')
+            MetadataCache(path=path).set('a/meters', [{'meterId': 'abc'}])
+
+            self.assertEqual(MetadataCache(path=path).get('a/meters'), [{'meterId': 'abc'}])
+            self.assertIsNone(MetadataCache(ttl=0, path=path).get('b/meters'))
+
+
+if __name__ == "__main__":
+    unittest.main()
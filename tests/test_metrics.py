@@ -0,0 +1,83 @@
+import unittest
+from discovergy.metrics import Metrics
+
+
+def event(endpoint, duration, status=200, error=None, nbytes=100):
+    """ Build a request event as recorded by class Measurement. """
+
+    return {'endpoint': endpoint, 'url': 'https://example.com' + endpoint,
+            'meter_id': None, 'status': status, 'duration': duration,
+            'bytes': nbytes, 'decode_time': 0.001, 'retries': 0, 'error': error}
+
+
+class MetricsTestCase(unittest.TestCase):
+    """ Unit tests for class Metrics. """
+
+    def test_record(self):
+        """ Test functions record() and to_dict() of class Metrics. """
+
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.record(event('/readings', 0.05))
+        metrics.record(event('/readings', 0.5, status=429))
+        metrics.record(event('/readings', 5.0, error=ValueError()))
+        metrics.record(event('/meters', 0.01))
+        result = metrics.to_dict()
+
+        self.assertEqual(result['/readings']['requests'], 3)
+        self.assertEqual(result['/readings']['failures'], 2)
+        self.assertEqual(result['/readings']['bytes'], 300)
+        self.assertEqual(result['/readings']['duration_buckets'], {0.1: 1, 1.0: 2})
+        self.assertAlmostEqual(result['/readings']['duration_seconds'], 5.55)
+        self.assertEqual(result['/meters']['failures'], 0)
+
+        metrics.reset()
+        self.assertEqual(metrics.to_dict(), {})
+
+    def test_measure(self):
+        """ Test function measure() of class Metrics. """
+
+        metrics = Metrics()
+        events = []
+        metrics.add_hook(events.append)
+
+        with metrics.measure('/last_reading', 'https://example.com/last_reading?meterId=abc'):
+            pass
+        with self.assertRaises(KeyError):
+            with metrics.measure('/last_reading', 'https://example.com/last_reading'):
+                raise KeyError('meterId')
+
+        self.assertEqual(events[0]['meter_id'], 'abc')
+        self.assertIsNone(events[0]['error'])
+        self.assertTrue(isinstance(events[1]['error'], KeyError))
+        self.assertEqual(metrics.to_dict()['/last_reading']['failures'], 1)
+
+    def test_hook_failure(self):
+        """ Test that failing hooks do not break requests. """
+
+        metrics = Metrics()
+        metrics.add_hook(lambda event: 1 / 0)
+        metrics.record(event('/meters', 0.01))
+        self.assertEqual(metrics.to_dict()['/meters']['requests'], 1)
+
+    def test_to_prometheus(self):
+        """ Test function to_prometheus() of class Metrics. """
+
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.record(event('/readings', 0.05))
+        metrics.record(event('/readings', 0.5))
+        text = metrics.to_prometheus()
+
+        self.assertIn('# TYPE discovergy_requests_total counter\n', text)
+        self.assertIn('discovergy_requests_total{endpoint="/readings"} 2\n', text)
+        self.assertIn('discovergy_response_bytes_total{endpoint="/readings"} 200\n', text)
+        self.assertIn('# TYPE discovergy_request_duration_seconds histogram\n', text)
+        self.assertIn('discovergy_request_duration_seconds_bucket'
+                      '{endpoint="/readings",le="0.1"} 1\n', text)
+        self.assertIn('discovergy_request_duration_seconds_bucket'
+                      '{endpoint="/readings",le="+Inf"} 2\n', text)
+        self.assertIn('discovergy_request_duration_seconds_count{endpoint="/readings"} 2\n',
+                      text)
+
+
+if __name__ == "__main__":
+    unittest.main()
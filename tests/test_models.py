@@ -0,0 +1,95 @@
+import json
+import pickle
+import unittest
+from discovergy.models import Schema, Reading, Meter, Location, Activity
+from tests.test_discovergy import MOCK_RESPONSE_METERS, READING, READINGS
+
+
+class ReadingTestCase(unittest.TestCase):
+    """ Unit tests for class Reading. """
+
+    def test_from_dict(self):
+        """ Test function from_dict() of class Reading. """
+
+        reading = Reading.from_dict(READING)
+
+        self.assertEqual(reading.time, 1574243404449)
+        self.assertEqual(reading.power, 5861890)
+        self.assertEqual(reading.get('energy'), 413189496760000)
+        self.assertEqual(reading.get('voltage1', 0), 0)
+        self.assertEqual(reading.to_dict(), READING)
+        with self.assertRaises(AttributeError):
+            reading.voltage1
+        with self.assertRaises(AttributeError):
+            reading.other = 1
+
+    def test_from_dicts(self):
+        """ Test that readings with the same fields share one schema. """
+
+        other = {'time': 1574243404449, 'values': {'power': 1, 'voltage1': 230}}
+        readings = Reading.from_dicts(READINGS + [READING, other])
+
+        self.assertIs(readings[0].schema, readings[1].schema)
+        self.assertIs(readings[0].schema, readings[2].schema)
+        self.assertIs(readings[0].schema, Schema.get(READINGS[0]['values']))
+        self.assertIsNot(readings[0].schema, readings[3].schema)
+        self.assertEqual(readings[3].voltage1, 230)
+        self.assertEqual([reading.to_dict() for reading in readings],
+                         READINGS + [READING, other])
+
+    def test_field_order(self):
+        """ Test that the schema of the same fields in another order is shared
+        and values are mapped by name. """
+
+        values = READING['values']
+        reordered = {'time': READING['time'], 'values': dict(reversed(list(values.items())))}
+        reading = Reading.from_dict(reordered)
+
+        self.assertIs(reading.schema, Schema.get(values))
+        self.assertIs(Reading.from_dict(READING).schema, reading.schema)
+        self.assertEqual(reading.power, values['power'])
+        self.assertEqual(reading, Reading.from_dict(READING))
+
+    def test_pickle(self):
+        """ Test that readings survive pickling, e.g. to worker processes. """
+
+        reading = Reading.from_dict(READING)
+        self.assertEqual(pickle.loads(pickle.dumps(reading)), reading)
+
+
+class MeterTestCase(unittest.TestCase):
+    """ Unit tests for classes Meter and Location. """
+
+    def test_from_dict(self):
+        """ Test function from_dict() of class Meter. """
+
+        data = json.loads(MOCK_RESPONSE_METERS)[0]
+        meter = Meter.from_dict(data)
+
+        self.assertEqual(meter.meter_id, 'a31f06058fc71fd0fd8d5330e8abfd80')
+        self.assertEqual(meter.scaling_factor, 1)
+        self.assertTrue(isinstance(meter.location, Location))
+        self.assertEqual(meter.location.street, 'BUZZN people power')
+        self.assertEqual(meter.to_dict(), data)
+        self.assertFalse(hasattr(meter, '__dict__'))
+
+
+class ActivityTestCase(unittest.TestCase):
+    """ Unit tests for class Activity. """
+
+    def test_from_dict(self):
+        """ Test function from_dict() of class Activity. """
+
+        data = {'startTime': 1574101800000, 'endTime': 1574102700000,
+                'deviceName': 'Waschmaschine-1', 'id': 'a1'}
+        activity = Activity.from_dict(data)
+
+        self.assertEqual(activity.device_name, 'Waschmaschine-1')
+        self.assertEqual(activity.end_time - activity.start_time, 900000)
+        self.assertEqual(activity, Activity(start_time=1574101800000, end_time=1574102700000,
+                                            device_name='Waschmaschine-1', id='a1'))
+        self.assertEqual(activity.to_dict(), data)
+
+
+if __name__ == "__main__":
+    unittest.main()
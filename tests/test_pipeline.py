@@ -0,0 +1,76 @@
+import multiprocessing
+import time
+import unittest
+from discovergy import analytics
+from discovergy.discovergy import DAY, Discovergy
+from discovergy.pipeline import Pipeline
+from discovergy.simulator import Simulator
+
+
+def daily_consumption(meter_id, columns):
+    """ Processing function for the tests, runs in a worker process. """
+
+    start = columns.time[0] - columns.time[0] % DAY
+    return len(columns), list(analytics.consumption(columns, [start, start + DAY]))
+
+
+def fail(meter_id, columns):
+    raise RuntimeError("Processing failed")
+
+
+class PipelineTestCase(unittest.TestCase):
+    """ Unit tests for class Pipeline. """
+
+    def setUp(self):
+        self.simulator = Simulator(meters=3, interval=60000)
+        self.simulator.start()
+        self.addCleanup(self.simulator.stop)
+        self.discovergy = Discovergy('TestClient', base_url=self.simulator.base_url)
+        self.discovergy.login('test@test.com', '123test')
+
+    def test_run(self):
+        """ Test function run() of class Pipeline. """
+
+        pipeline = Pipeline(self.discovergy, daily_consumption, processes=2)
+        results = list(pipeline.run(self.simulator.meter_ids, DAY, 3 * DAY, 'raw'))
+
+        self.assertEqual(sorted(result[:3] for result in results),
+                         sorted((meter_id, start, start + DAY)
+                                for meter_id in self.simulator.meter_ids
+                                for start in (DAY, 2 * DAY)))
+        self.assertEqual(pipeline.errors, {})
+        meter_id, start, end, (count, consumption) = results[0]
+        self.assertEqual(count, 24 * 60)
+        self.assertEqual(consumption, list(analytics.consumption(
+            self.discovergy.get_readings(meter_id, start, end, 'raw'), [start, start + DAY])))
+
+    def test_back_pressure(self):
+        """ Test that no more than max_pending responses are fetched ahead of
+        the consumer. """
+
+        pipeline = Pipeline(self.discovergy, daily_consumption, processes=1, max_pending=2)
+        consumed = 0
+        for _ in pipeline.run(self.simulator.meter_ids, DAY, 5 * DAY, 'raw'):
+            consumed += 1
+            time.sleep(0.05)
+            self.assertLessEqual(self.simulator.requests['/readings'], consumed + 2)
+        self.assertEqual(consumed, 12)
+
+    def test_errors(self):
+        """ Test that failed windows are reported in errors. """
+
+        pipeline = Pipeline(self.discovergy, fail, processes=1)
+        meter_id = self.simulator.meter_ids[0]
+        self.assertEqual(list(pipeline.run([meter_id, 'unknown'], DAY, 2 * DAY, 'raw')), [])
+        self.assertIsInstance(pipeline.errors[(meter_id, DAY)], RuntimeError)
+        self.assertIsInstance(pipeline.errors[('unknown', DAY)], ValueError)
+
+    def test_interrupted(self):
+        """ Test that the worker processes are shut down when the consumer
+        stops with an exception. """
+
+        pipeline = Pipeline(self.discovergy, daily_consumption, processes=2)
+        with self.assertRaises(KeyboardInterrupt):
+            for _ in pipeline.run(self.simulator.meter_ids, DAY, 5 * DAY, 'raw'):
+                raise KeyboardInterrupt
+        self.assertEqual(multiprocessing.active_children(), [])
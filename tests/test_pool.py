@@ -0,0 +1,76 @@
+import unittest
+from discovergy.discovergy import DAY
+from discovergy.pool import DiscovergyPool
+from discovergy.simulator import Simulator
+from discovergy.tokens import MemoryTokenStore
+
+
+def count_readings(meter_id, columns):
+    """ Post-processing function for test_map_readings(). """
+
+    return len(columns)
+
+
+class DiscovergyPoolTestCase(unittest.TestCase):
+    """ Unit tests for class DiscovergyPool. """
+
+    def setUp(self):
+        self.simulator = Simulator(meters=1, interval=60000,
+                                   accounts={'a@test.com': 2, 'b@test.com': 3})
+        self.simulator.start()
+        self.addCleanup(self.simulator.stop)
+        self.pool = DiscovergyPool('TestClient', [('a@test.com', 'a'), ('b@test.com', 'b')],
+                                   token_store=MemoryTokenStore(),
+                                   base_url=self.simulator.base_url)
+
+    def test_login(self):
+        """ Test function login() of class DiscovergyPool. """
+
+        self.assertTrue(self.pool.login())
+        self.assertEqual(sorted(self.pool.meter_ids), sorted(self.simulator.meter_ids))
+        self.assertEqual(len(self.pool.get_meters()), 6)
+
+        # Meters are routed to their owner, shared ones to the first account
+        for meter_id, owner in self.simulator.owners.items():
+            self.assertIs(self.pool.account(meter_id),
+                          self.pool.clients[owner or 'a@test.com'])
+        with self.assertRaises(KeyError):
+            self.pool.account('unknown')
+
+        # All accounts share the connection pool and metrics
+        clients = list(self.pool.clients.values())
+        self.assertIs(clients[0]._transport, clients[1]._transport)
+        self.assertEqual(self.pool.metrics.to_dict()['/meters']['requests'], 2)
+
+    def test_failed_login(self):
+        """ Test that accounts failing to login own no meters. """
+
+        pool = DiscovergyPool('TestClient', [('a@test.com', 'a'), ('c@test.com', 'c')],
+                              base_url=self.simulator.base_url)
+        self.assertFalse(pool.login())
+        self.assertEqual(len(pool.meter_ids), 3)
+
+    def test_get_last_readings(self):
+        """ Test function get_last_readings() of class DiscovergyPool. """
+
+        self.pool.login()
+        readings = self.pool.get_last_readings(self.pool.meter_ids + ['unknown'])
+        self.assertEqual(sorted(readings), sorted(self.simulator.meter_ids))
+        self.assertIsInstance(readings.errors['unknown'], KeyError)
+
+        meter_id = self.simulator.meter_ids[-1]
+        self.assertEqual(self.pool.get_last_reading(meter_id), readings[meter_id])
+        self.assertEqual(len(self.pool.get_readings(meter_id, DAY, 2 * DAY, 'one_hour')), 24)
+
+    def test_map_readings(self):
+        """ Test function map_readings() of class DiscovergyPool. """
+
+        self.pool.login()
+        results = {meter_id: result for meter_id, _, _, result in self.pool.map_readings(
+            count_readings, DAY, 2 * DAY, 'one_hour', processes=2)}
+        self.assertEqual(results, dict.fromkeys(self.simulator.meter_ids, 24))
+
+        with self.assertLogs('discovergy.pipeline', 'ERROR'):
+            results = list(self.pool.map_readings(count_readings, DAY, 2 * DAY, 'one_hour',
+                                                  meter_ids=['unknown'], processes=1))
+        self.assertEqual(results, [])
@@ -0,0 +1,106 @@
+import threading
+import time
+import unittest
+from discovergy.discovergy import DAY, Discovergy
+from discovergy.ratelimit import RateLimiter, LIVE, BACKFILL
+from discovergy.simulator import Simulator
+
+
+class RecordingRateLimiter(RateLimiter):
+    """ RateLimiter recording the priority of every acquired request. """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.priorities = []
+
+    def acquire(self, priority=None, timeout=None):
+        self.priorities.append(self.current_priority() if priority is None else priority)
+        return super().acquire(priority, timeout)
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    """ Unit tests for class RateLimiter. """
+
+    def test_acquire(self):
+        """ Test function acquire() of class RateLimiter. """
+
+        limiter = RateLimiter(rate=100, burst=5)
+        started = time.monotonic()
+        for _ in range(15):
+            self.assertTrue(limiter.acquire())
+        elapsed = time.monotonic() - started
+
+        # Check the burst is served at once and the rest at the rate
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 1)
+
+    def test_acquire_timeout(self):
+        """ Test that acquire() gives up after timeout. """
+
+        limiter = RateLimiter(rate=1, burst=1)
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire(timeout=0.05))
+
+    def test_throttled(self):
+        """ Test functions throttled() and succeeded() of class RateLimiter. """
+
+        limiter = RateLimiter(rate=100, burst=10)
+        limiter.throttled(0.1)
+        self.assertEqual(limiter.rate, 50)
+
+        started = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+        for _ in range(100):
+            limiter.succeeded()
+        self.assertEqual(limiter.rate, 100)
+
+        for _ in range(10):
+            limiter.throttled(0)
+        self.assertEqual(limiter.rate, 100 / 16)
+
+    def test_priority(self):
+        """ Test that live requests are served before backfill requests. """
+
+        limiter = RateLimiter(rate=20, burst=1)
+        limiter.acquire()
+        order = []
+
+        def request(name, priority):
+            with limiter.priority(priority):
+                limiter.acquire()
+            order.append(name)
+
+        backfill = [threading.Thread(target=request, args=('backfill', BACKFILL))
+                    for _ in range(3)]
+        for thread in backfill:
+            thread.start()
+        time.sleep(0.01)
+        live = threading.Thread(target=request, args=('live', LIVE))
+        live.start()
+        for thread in backfill + [live]:
+            thread.join()
+
+        self.assertEqual(order[0], 'live')
+
+    def test_priority_in_thread_pools(self):
+        """ Test that the workers of get_readings_range() acquire with the
+        priority of the caller. """
+
+        with Simulator(meters=1, interval=60000) as simulator:
+            limiter = RecordingRateLimiter(rate=1000)
+            discovergy = Discovergy('TestClient', base_url=simulator.base_url,
+                                    rate_limiter=limiter)
+            discovergy.login('test@test.com', '123test')
+            with limiter.priority(BACKFILL):
+                readings = discovergy.get_readings_range(simulator.meter_ids[0], DAY, 4 * DAY,
+                                                         'raw', max_workers=3)
+            discovergy.get_last_reading(simulator.meter_ids[0])
+
+        self.assertEqual(len(readings), 3 * 24 * 60)
+        self.assertEqual(limiter.priorities, [BACKFILL] * 3 + [LIVE])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import json
+import unittest
+from discovergy.readings import iter_json_array, merge_readings, split_interval
+
+
+class ReadingsTestCase(unittest.TestCase):
+    """ Unit tests for the functions of module readings. """
+
+    def test_split_interval(self):
+        """ Test function split_interval(). """
+
+        self.assertEqual(split_interval(0, 25, 10), [(0, 10), (10, 20), (20, 25)])
+        self.assertEqual(split_interval(0, 10, 10), [(0, 10)])
+        self.assertEqual(split_interval(10, 10, 10), [])
+
+    def test_merge_readings(self):
+        """ Test function merge_readings(). """
+
+        chunks = [[{'time': 2, 'values': {}}, {'time': 3, 'values': {'a': 1}}],
+                  [{'time': 1, 'values': {}}, {'time': 3, 'values': {'a': 2}}]]
+        merged = merge_readings(chunks)
+
+        self.assertEqual([reading['time'] for reading in merged], [1, 2, 3])
+        self.assertEqual(merged[2]['values'], {'a': 2})
+
+    def test_iter_json_array(self):
+        """ Test function iter_json_array(). """
+
+        content = json.dumps([{'a': 'Spülmaschine'}, 12345, [1, 2], -0.5, None],
+                             ensure_ascii=False).encode()
+        for chunk_size in (1, 3, 7, len(content)):
+            chunks = [content[i:i + chunk_size]
+                      for i in range(0, len(content), chunk_size)]
+            self.assertEqual(list(iter_json_array(chunks)),
+                             [{'a': 'Spülmaschine'}, 12345, [1, 2], -0.5, None])
+
+        self.assertEqual(list(iter_json_array([b' [ ] '])), [])
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'{"a": 1}']))
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'[1, 2']))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import math
+import unittest
+from discovergy.resample import best_resolution, resample, MINUTE
+
+
+HOUR = 60 * MINUTE
+
+
+class ResampleTestCase(unittest.TestCase):
+    """ Unit tests for module resample. """
+
+    def test_best_resolution(self):
+        """ Test function best_resolution(). """
+
+        self.assertEqual(best_resolution(5 * MINUTE), 'raw')
+        self.assertEqual(best_resolution(6 * MINUTE), 'three_minutes')
+        self.assertEqual(best_resolution(30 * MINUTE), 'fifteen_minutes')
+        self.assertEqual(best_resolution(2 * HOUR), 'one_hour')
+        self.assertEqual(best_resolution(7 * 24 * HOUR), 'one_day')
+
+    def test_power_average(self):
+        """ Test time-weighted averaging of power fields. """
+
+        readings = [{'time': 0, 'values': {'power': 100}},
+                    {'time': 20 * MINUTE, 'values': {'power': 400}},
+                    {'time': 30 * MINUTE, 'values': {'power': 1000}},
+                    {'time': 90 * MINUTE, 'values': {'power': 0}}]
+        result = resample(readings, 30 * MINUTE)
+
+        self.assertEqual(list(result.time), [0, 30 * MINUTE, 60 * MINUTE, 90 * MINUTE])
+        self.assertEqual(list(result['power'])[:3], [200.0, 1000.0, 1000.0])
+
+        # Check buckets ending after end are left out
+        result = resample(readings, 30 * MINUTE, end=75 * MINUTE)
+        self.assertEqual(list(result.time), [0, 30 * MINUTE])
+        self.assertEqual(len(resample(readings, 30 * MINUTE, end=20 * MINUTE)), 0)
+
+    def test_power_gap(self):
+        """ Test that values hold at most max_gap across missing readings. """
+
+        readings = [{'time': 0, 'values': {'power': 100}},
+                    {'time': 2 * HOUR, 'values': {'power': 300}},
+                    {'time': 2 * HOUR + MINUTE, 'values': {'power': 300}}]
+        result = resample(readings, HOUR, max_gap=15 * MINUTE)
+
+        self.assertEqual(result['power'][0], 100.0)
+        self.assertTrue(math.isnan(result['power'][1]))
+        self.assertEqual(result['power'][2], 300.0)
+
+    def test_power_nan(self):
+        """ Test that NaN values are left out of the averages. """
+
+        readings = [{'time': 0, 'values': {'power': 100.0}},
+                    {'time': 10 * MINUTE, 'values': {'power': float('nan')}},
+                    {'time': 20 * MINUTE, 'values': {'power': 300.0}},
+                    {'time': 60 * MINUTE, 'values': {'power': 300.0}}]
+        result = resample(readings, HOUR)
+
+        self.assertEqual(list(result['power']), [260.0, 300.0])
+
+    def test_energy_counter(self):
+        """ Test differencing of cumulative counters with resets and gaps. """
+
+        readings = [{'time': 0, 'values': {'energy': 1000, 'energyOut': 0}},
+                    {'time': 15 * MINUTE, 'values': {'energy': 1100, 'energyOut': 0}},
+                    {'time': 30 * MINUTE, 'values': {'energy': 1300, 'energyOut': 50}},
+                    # Counter reset
+                    {'time': 45 * MINUTE, 'values': {'energy': 40, 'energyOut': 50}},
+                    # Gap of 90 minutes
+                    {'time': 135 * MINUTE, 'values': {'energy': 340, 'energyOut': 50}}]
+        result = resample(readings, HOUR)
+
+        self.assertEqual(list(result['energy']), [390.0, 200.0, 50.0])
+        self.assertEqual(list(result['energyOut']), [50.0, 0.0, 0.0])
+        self.assertEqual(sum(result['energy']), 640.0)
+
+    def test_empty(self):
+        """ Test resampling without measurements. """
+
+        result = resample([], HOUR)
+        self.assertEqual(len(result), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
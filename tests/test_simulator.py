@@ -0,0 +1,86 @@
+import json
+import time
+import unittest
+from discovergy.discovergy import DAY, Discovergy
+from discovergy.simulator import Simulator
+
+
+class SimulatorTestCase(unittest.TestCase):
+    """ Integration tests of class Discovergy against class Simulator. """
+
+    def setUp(self):
+        self.simulator = Simulator(meters=3, interval=60000)
+        self.simulator.start()
+        self.addCleanup(self.simulator.stop)
+        self.discovergy = Discovergy('TestClient', base_url=self.simulator.base_url)
+        self.assertTrue(self.discovergy.login('test@test.com', '123test'))
+
+    def test_endpoints(self):
+        """ Test the endpoints of class Simulator. """
+
+        meters = self.discovergy.get_meters()
+        self.assertEqual([meter['meterId'] for meter in meters], self.simulator.meter_ids)
+        meter_id = self.simulator.meter_ids[0]
+        self.assertIn('power', self.discovergy.get_fieldnames_for_meter(meter_id))
+        self.assertIn('energy', self.discovergy.get_last_reading(meter_id)['values'])
+
+        readings = self.discovergy.get_readings(meter_id, DAY, 2 * DAY, 'raw')
+        self.assertEqual(len(readings), 24 * 60)
+        self.assertEqual(readings[0]['time'], DAY)
+        energy = [reading['values']['energy'] for reading in readings]
+        self.assertEqual(energy, sorted(energy))
+        self.assertEqual(len(self.discovergy.get_readings(meter_id, DAY, 2 * DAY, 'one_hour')),
+                         24)
+
+        self.assertEqual(len(self.discovergy.get_disaggregation(meter_id, DAY, DAY + 3600000)),
+                         4)
+        start = int(time.time() * 1000) - 3600000
+        self.assertGreaterEqual(len(self.discovergy.get_disaggregation(meter_id, start, None)), 3)
+        self.assertEqual(self.discovergy.get_readings('unknown', DAY, 2 * DAY, 'raw'), [])
+        with self.assertRaisesRegex(ValueError, "status code 400"):
+            list(self.discovergy.iter_readings('unknown', DAY, 2 * DAY, 'raw'))
+        with self.assertRaisesRegex(ValueError, "status code 400"):
+            self.discovergy.fetch_readings('unknown', DAY, 2 * DAY, 'raw')
+        content = self.discovergy.fetch_readings(meter_id, DAY, 2 * DAY, 'one_hour', decode=False)
+        self.assertEqual(json.loads(content), self.discovergy.get_readings(meter_id, DAY, 2 * DAY,
+                                                                           'one_hour'))
+
+    def test_readings_resampled(self):
+        """ Test that get_readings_resampled() only returns complete
+        buckets. """
+
+        meter_id = self.simulator.meter_ids[0]
+        columns = self.discovergy.get_readings_resampled(meter_id, DAY, 3 * DAY, DAY)
+        readings = self.discovergy.get_readings(meter_id, DAY, 3 * DAY + 1, 'one_day')
+        energy = [reading['values']['energy'] for reading in readings]
+
+        self.assertEqual(list(columns.time), [DAY, 2 * DAY])
+        self.assertEqual(list(columns['energy']), [energy[1] - energy[0], energy[2] - energy[1]])
+        self.assertTrue(columns['energy'][1] > 0)
+
+    def test_expired_tokens(self):
+        """ Test that the client logs in again after its tokens expired. """
+
+        self.simulator.expire_tokens()
+        self.assertEqual(len(self.discovergy.get_meters()), 3)
+        self.assertEqual(self.simulator.requests['/oauth1/access_token'], 2)
+
+        self.simulator.expire_tokens()
+        meter_id = self.simulator.meter_ids[0]
+        self.assertEqual(len(self.discovergy.get_readings_columnar(
+            meter_id, DAY, 2 * DAY, 'raw', fieldnames=['power'])), 24 * 60)
+        self.assertEqual(self.simulator.requests['/oauth1/access_token'], 3)
+
+    def test_throttling(self):
+        """ Test that throttled requests are retried after Retry-After. """
+
+        self.simulator.stop()
+        self.simulator = Simulator(meters=3, rate=20, burst=1)
+        self.simulator.start()
+        self.addCleanup(self.simulator.stop)
+        discovergy = Discovergy('TestClient', base_url=self.simulator.base_url)
+        discovergy.login('test@test.com', '123test')
+
+        readings = discovergy.get_last_readings(self.simulator.meter_ids, max_workers=3)
+        self.assertEqual(len(readings), 3)
+        self.assertGreater(discovergy.metrics.to_dict()['/last_reading']['retries'], 0)
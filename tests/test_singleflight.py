@@ -0,0 +1,85 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from discovergy.discovergy import Discovergy
+from discovergy.simulator import Simulator
+from discovergy.singleflight import SingleFlight
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    """ Unit tests for class SingleFlight. """
+
+    def test_do(self):
+        """ Test that concurrent calls with the same key share one call. """
+
+        single_flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def slow(value):
+            calls.append(value)
+            started.set()
+            time.sleep(0.1)
+            return [value]
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            first = executor.submit(single_flight.do, 'a', slow, 1)
+            started.wait()
+            self.assertEqual(single_flight.in_flight(), 1)
+            others = [executor.submit(single_flight.do, 'a', slow, 1) for _ in range(3)]
+            other_key = executor.submit(single_flight.do, 'b', slow, 2)
+            results = [future.result() for future in [first] + others]
+
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertEqual(other_key.result(), [2])
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(single_flight.in_flight(), 0)
+
+        # Later calls run again
+        self.assertEqual(single_flight.do('a', slow, 3), [3])
+
+    def test_error(self):
+        """ Test that waiting threads receive the exception of the call. """
+
+        single_flight = SingleFlight()
+        started = threading.Event()
+
+        def fail():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("Request failed")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(single_flight.do, 'a', fail)
+            started.wait()
+            second = executor.submit(single_flight.do, 'a', fail)
+            for future in (first, second):
+                with self.assertRaises(ValueError):
+                    future.result()
+
+    def test_discovergy(self):
+        """ Test request coalescing and the last reading cache of class
+        Discovergy. """
+
+        with Simulator(meters=1, latency=0.1) as simulator:
+            meter_id = simulator.meter_ids[0]
+            discovergy = Discovergy('TestClient', base_url=simulator.base_url,
+                                    last_reading_ttl=60)
+            discovergy.login('test@test.com', '123test')
+
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                readings = list(executor.map(discovergy.get_last_reading, [meter_id] * 5))
+            self.assertEqual(simulator.requests['/last_reading'], 1)
+            self.assertTrue(all(reading == readings[0] for reading in readings))
+
+            # Cached for last_reading_ttl seconds
+            self.assertEqual(discovergy.get_last_reading(meter_id), readings[0])
+            self.assertEqual(simulator.requests['/last_reading'], 1)
+
+            # Without coalescing every thread sends its request
+            discovergy = Discovergy('TestClient', base_url=simulator.base_url, coalesce=False)
+            discovergy.login('test@test.com', '123test')
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                list(executor.map(discovergy.get_last_reading, [meter_id] * 5))
+            self.assertEqual(simulator.requests['/last_reading'], 6)
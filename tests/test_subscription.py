@@ -0,0 +1,111 @@
+import threading
+import time
+import unittest
+from discovergy.subscription import LiveSubscription
+
+
+class MockDiscovergy:
+    """ Mock class Discovergy whose meter 'live' has a new reading on every
+    call, meter 'static' always the same and meter 'broken' none. """
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def get_last_reading(self, meter_id):
+        with self.lock:
+            self.calls[meter_id] = self.calls.get(meter_id, 0) + 1
+            count = self.calls[meter_id]
+        if meter_id == 'broken':
+            return {}
+        if meter_id == 'static':
+            return {'time': 1574243404449, 'values': {'power': 1}}
+        return {'time': round(time.time() * 1e3) + count, 'values': {'power': count}}
+
+
+class LiveSubscriptionTestCase(unittest.TestCase):
+    """ Unit tests for class LiveSubscription. """
+
+    def test_callback(self):
+        """ Test that only new readings are passed to the callback. """
+
+        discovergy = MockDiscovergy()
+        emitted = []
+        subscription = LiveSubscription(discovergy, ['live', 'static', 'broken'],
+                                        callback=lambda *item: emitted.append(item),
+                                        max_workers=2, min_interval=0.01,
+                                        initial_interval=0.02)
+        with subscription:
+            time.sleep(0.3)
+
+        live = [reading for meter_id, reading in emitted if meter_id == 'live']
+        static = [reading for meter_id, reading in emitted if meter_id == 'static']
+
+        # Check new readings were emitted once each
+        self.assertGreater(len(live), 3)
+        self.assertEqual(len(live), len({reading['time'] for reading in live}))
+        self.assertEqual(len(static), 1)
+        self.assertNotIn('broken', [meter_id for meter_id, _ in emitted])
+
+        # Check unchanged meters are polled less often
+        self.assertLess(discovergy.calls['static'], discovergy.calls['live'])
+
+    def test_iterate(self):
+        """ Test iterating over a subscription without callback. """
+
+        discovergy = MockDiscovergy()
+        subscription = LiveSubscription(discovergy, ['static'], min_interval=0.01)
+        subscription.start()
+        threading.Timer(0.1, subscription.stop).start()
+
+        self.assertEqual([meter_id for meter_id, _ in subscription], ['static'])
+
+    def test_remove(self):
+        """ Test function remove() of class LiveSubscription. """
+
+        discovergy = MockDiscovergy()
+        subscription = LiveSubscription(discovergy, ['live'], callback=lambda *item: None,
+                                        min_interval=0.01)
+        with subscription:
+            time.sleep(0.05)
+            subscription.remove('live')
+            time.sleep(0.05)
+            calls = discovergy.calls['live']
+            time.sleep(0.05)
+
+        self.assertEqual(discovergy.calls['live'], calls)
+
+
+    def test_max_workers(self):
+        """ Test that no more than max_workers polls are in flight and that
+        failed polls free their slot. """
+
+        discovergy = MockDiscovergy()
+        active = []
+        peak = []
+
+        def get_last_reading(meter_id):
+            with discovergy.lock:
+                active.append(meter_id)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with discovergy.lock:
+                active.remove(meter_id)
+            if meter_id == 'broken':
+                raise ValueError("Request failed with status code 500")
+            return MockDiscovergy.get_last_reading(discovergy, meter_id)
+
+        discovergy.get_last_reading = get_last_reading
+        subscription = LiveSubscription(discovergy, ['live', 'static', 'broken', 'other'],
+                                        callback=lambda *item: None, max_workers=2,
+                                        min_interval=0.01, initial_interval=0.02)
+        with self.assertLogs('discovergy.subscription', 'ERROR'):
+            with subscription:
+                time.sleep(0.3)
+
+        self.assertEqual(max(peak), 2)
+        self.assertGreater(discovergy.calls['live'], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from discovergy.discovergy import DAY, Discovergy
+from discovergy.simulator import Simulator
+from discovergy.sync import SyncEngine
+
+
+MINUTE = 60 * 1000
+
+
+class SyncEngineTestCase(unittest.TestCase):
+    """ Unit tests for class SyncEngine. """
+
+    def setUp(self):
+        self.simulator = Simulator(meters=2, interval=MINUTE)
+        self.simulator.start()
+        self.addCleanup(self.simulator.stop)
+        self.discovergy = Discovergy('TestClient', base_url=self.simulator.base_url)
+        self.discovergy.login('test@test.com', '123test')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'sync.sqlite')
+
+    def engine(self, **kwargs):
+        engine = SyncEngine(self.discovergy, self.path, DAY, **kwargs)
+        self.addCleanup(engine.close)
+        return engine
+
+    def test_sync(self):
+        """ Test that sync() only fetches readings after the high-water
+        mark. """
+
+        engine = self.engine()
+        result = engine.sync(end=DAY + 2 * DAY)
+        self.assertEqual(result['readings'], dict.fromkeys(self.simulator.meter_ids, 2 * 24 * 60))
+        self.assertEqual(result['errors'], {})
+        meter_id = self.simulator.meter_ids[0]
+        self.assertEqual(engine.high_water_mark(meter_id), 3 * DAY)
+        self.assertEqual(engine.get_readings(meter_id, 2 * DAY, 2 * DAY + 2 * MINUTE),
+                         self.discovergy.get_readings(meter_id, 2 * DAY, 2 * DAY + 2 * MINUTE,
+                                                      'raw'))
+
+        requests = self.simulator.requests['/readings']
+        result = engine.sync([meter_id], end=3 * DAY + 60 * MINUTE)
+        self.assertEqual(result['readings'], {meter_id: 60})
+        self.assertEqual(self.simulator.requests['/readings'] - requests, 1)
+        self.assertEqual(engine.gaps(), [])
+
+    def test_resume(self):
+        """ Test that an interrupted sync resumes after the last committed
+        window. """
+
+        meter_id = self.simulator.meter_ids[0]
+        engine = self.engine()
+        fetch_readings = self.discovergy.fetch_readings
+
+        def fail_on_third_day(meter_id, start, end, resolution):
+            if start >= 3 * DAY:
+                raise ValueError("Connection lost")
+            return fetch_readings(meter_id, start, end, resolution)
+
+        with mock.patch.object(self.discovergy, 'fetch_readings',
+                               side_effect=fail_on_third_day):
+            result = engine.sync([meter_id], end=5 * DAY)
+        self.assertIsInstance(result['errors'][meter_id], ValueError)
+        self.assertEqual(engine.high_water_mark(meter_id), 3 * DAY)
+
+        # A restarted engine continues from the durable mark
+        engine.close()
+        engine = self.engine()
+        result = engine.sync([meter_id], end=5 * DAY)
+        self.assertEqual(result['readings'], {meter_id: 2 * 24 * 60})
+        self.assertEqual(len(engine.get_readings(meter_id, DAY, 5 * DAY)), 4 * 24 * 60)
+
+    def test_gaps(self):
+        """ Test that gaps are recorded and fetched again. """
+
+        meter_id = self.simulator.meter_ids[0]
+        engine = self.engine()
+        fetch_readings = self.discovergy.fetch_readings
+
+        def drop_readings(meter_id, start, end, resolution):
+            return [reading for reading in fetch_readings(meter_id, start, end, resolution)
+                    if not DAY + 10 * MINUTE <= reading['time'] < DAY + 20 * MINUTE]
+
+        with mock.patch.object(self.discovergy, 'fetch_readings', side_effect=drop_readings):
+            engine.sync([meter_id], end=2 * DAY)
+            self.assertEqual(engine.gaps(), [(meter_id, DAY + 9 * MINUTE, DAY + 20 * MINUTE, 1)])
+        self.assertEqual(engine.gaps(), [(meter_id, DAY + 9 * MINUTE, DAY + 20 * MINUTE, 1)])
+
+        result = engine.sync([meter_id], end=2 * DAY)
+        self.assertEqual(result['readings'], {meter_id: 10})
+        self.assertEqual(engine.gaps(), [])
+        self.assertEqual(len(engine.get_readings(meter_id, DAY, 2 * DAY)), 24 * 60)
+
+    def test_callback(self):
+        """ Test that a failing callback rolls back the commit. """
+
+        callback = mock.Mock(side_effect=[OSError("Disk full"), None])
+        meter_id = self.simulator.meter_ids[0]
+        engine = self.engine(callback=callback)
+
+        result = engine.sync([meter_id], end=2 * DAY)
+        self.assertIsInstance(result['errors'][meter_id], OSError)
+        self.assertIsNone(engine.high_water_mark(meter_id))
+        self.assertEqual(engine.get_readings(meter_id, DAY, 2 * DAY), [])
+
+        engine.sync([meter_id], end=2 * DAY)
+        self.assertEqual(engine.high_water_mark(meter_id), 2 * DAY)
+        self.assertEqual(len(callback.call_args[0][1]), 24 * 60)
+
+    def test_concurrent_callbacks(self):
+        """ Test that a slow callback does not block the sync of other
+        meters. """
+
+        barrier = threading.Barrier(2, timeout=5)
+        engine = self.engine(callback=lambda meter_id, readings: barrier.wait())
+
+        result = engine.sync(end=2 * DAY)
+        self.assertEqual(result['errors'], {})
+        self.assertEqual(result['readings'], dict.fromkeys(self.simulator.meter_ids, 24 * 60))
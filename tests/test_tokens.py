@@ -0,0 +1,71 @@
+import os
+import stat
+import tempfile
+import unittest
+from discovergy.tokens import MemoryTokenStore, FileTokenStore
+
+
+TOKENS = dict(consumer_key='9srhl1op4jemrcpafqpr2hhcq9',
+              consumer_secret='i5nu32jmjsjunttq0lpi4r2qo0',
+              token='2a28117b269e4f99893e9f758136becc',
+              token_secret='b75c7fc5142842afb3fd6686cacb675b')
+
+
+class MemoryTokenStoreTestCase(unittest.TestCase):
+    """ Unit tests for class MemoryTokenStore. """
+
+    def test_save_load_delete(self):
+        """ Test functions save(), load() and delete() of class MemoryTokenStore. """
+
+        store = MemoryTokenStore()
+        self.assertEqual(store.load('TestClient:test@test.com'), None)
+
+        store.save('TestClient:test@test.com', TOKENS)
+        self.assertEqual(store.load('TestClient:test@test.com'), TOKENS)
+        self.assertEqual(store.load('TestClient:other@test.com'), None)
+
+        store.delete('TestClient:test@test.com')
+        self.assertEqual(store.load('TestClient:test@test.com'), None)
+
+
+class FileTokenStoreTestCase(unittest.TestCase):
+    """ Unit tests for class FileTokenStore. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'tokens.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_load_delete(self):
+        """ Test functions save(), load() and delete() of class FileTokenStore. """
+
+        store = FileTokenStore(self.path)
+        self.assertEqual(store.load('TestClient:test@test.com'), None)
+
+        store.save('TestClient:test@test.com', TOKENS)
+        store.save('TestClient:other@test.com', TOKENS)
+
+        # Check tokens survive a new store instance and are private
+        self.assertEqual(FileTokenStore(self.path).load('TestClient:test@test.com'), TOKENS)
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+        store.delete('TestClient:test@test.com')
+        self.assertEqual(store.load('TestClient:test@test.com'), None)
+        self.assertEqual(store.load('TestClient:other@test.com'), TOKENS)
+
+    def test_corrupt_file(self):
+        """ Test that an unreadable token file counts as empty. """
+
+        with open(self.path, 'w') as token_file:
+            token_file.write('{not json')
+
+        store = FileTokenStore(self.path)
+        self.assertEqual(store.load('TestClient:test@test.com'), None)
+        store.save('TestClient:test@test.com', TOKENS)
+        self.assertEqual(store.load('TestClient:test@test.com'), TOKENS)
+
+
+if __name__ == "__main__":
+    unittest.main()
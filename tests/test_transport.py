@@ -0,0 +1,60 @@
+import unittest
+from requests_oauthlib import OAuth1Session
+from discovergy.transport import Transport
+
+
+class TransportTestCase(unittest.TestCase):
+    """ Unit tests for class Transport. """
+
+    def test_init(self):
+        """ Test function __init__() of class Transport. """
+
+        transport = Transport(pool_connections=2, pool_maxsize=32, max_retries=5,
+                              backoff_factor=1)
+        self.addCleanup(transport.close)
+
+        self.assertIs(transport.session.get_adapter('https://'), transport.adapter)
+        self.assertEqual(transport.adapter.poolmanager.connection_pool_kw['maxsize'], 32)
+        self.assertEqual(transport.adapter.max_retries.total, 5)
+        self.assertEqual(transport.adapter.max_retries.backoff_factor, 1)
+        self.assertIn(503, transport.adapter.max_retries.status_forcelist)
+
+    def test_mount(self):
+        """ Test function mount() of class Transport. """
+
+        transport = Transport(keep_alive=False)
+        self.addCleanup(transport.close)
+        session = OAuth1Session('key', client_secret='secret')
+        transport.mount(session)
+
+        self.assertIs(session.get_adapter('https://'), transport.adapter)
+        self.assertIs(session.get_adapter('http://'), transport.adapter)
+        self.assertEqual(session.headers['Connection'], 'close')
+
+    def test_resize(self):
+        """ Test function resize() of class Transport. """
+
+        transport = Transport()
+        self.addCleanup(transport.close)
+        transport.resize(20)
+        adapter = transport.adapter
+        self.assertEqual(adapter.poolmanager.connection_pool_kw['maxsize'], 20)
+
+        session = OAuth1Session('key', client_secret='secret')
+        transport.mount(session)
+        pool_manager = adapter.poolmanager
+        pool_manager.connection_from_url('http://localhost/')
+        transport.resize(50)
+
+        # Check mounted sessions keep the adapter with the new pools
+        self.assertEqual(transport.pool_maxsize, 50)
+        self.assertIs(session.get_adapter('https://'), adapter)
+        self.assertIs(transport.session.get_adapter('https://'), adapter)
+        self.assertEqual(adapter.poolmanager.connection_pool_kw['maxsize'], 50)
+
+        # Check the old pools are closed
+        self.assertIsNot(adapter.poolmanager, pool_manager)
+        self.assertEqual(len(pool_manager.pools), 0)
+
+if __name__ == "__main__":
+    unittest.main()